@@ -3,6 +3,8 @@ import streamlit as st
 from decimal import Decimal, getcontext, ROUND_HALF_UP
 import numpy as np
 import pandas as pd
+import os
+import sys
 from tax_visualizations import (
     create_tax_breakdown_pie,
     create_tax_comparison_bar,
@@ -11,6 +13,10 @@ from tax_visualizations import (
     create_total_tax_pie
 )
 
+# The NY engine lives in the repository's states package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from states import get_calculator
+
 IRS_TRIVIA = [
     "Did you know? The new 2024 W-4 no longer uses withholding allowances — you enter dollar amounts instead.",
     "Tip: If you have more than one job, checking Step 2 can prevent underwithholding later in the year.",
@@ -371,100 +377,13 @@ def calculate_mi(gross: Decimal, period: str, annual: bool) -> Decimal:
     mi_ann = base * MEDICARE_RATE
     return (mi_ann if annual else mi_ann / p).quantize(Decimal("0.01"), ROUND_HALF_UP)
 
-# NY State Tax Constants (2024 - Subject to update when NY releases final figures)
-NY_STANDARD_DEDUCTION = {
-    "Single": Decimal("8500"),  # Estimated 2024
-    "Married": Decimal("17050"), # Estimated 2024
-    "Head": Decimal("11800"),    # Estimated 2024
-    "Separate": Decimal("8500"), # Estimated 2024
-    "Widow": Decimal("17050")    # Estimated 2024
-}
-
-NY_TAX_BRACKETS = {
-    "Single": [
-        {"min": Decimal("0"), "max": Decimal("8500"), "rate": Decimal("0.04"), "base": Decimal("0")},
-        {"min": Decimal("8500"), "max": Decimal("11700"), "rate": Decimal("0.045"), "base": Decimal("340")},
-        {"min": Decimal("11700"), "max": Decimal("13900"), "rate": Decimal("0.0525"), "base": Decimal("484")},
-        {"min": Decimal("13900"), "max": Decimal("21400"), "rate": Decimal("0.0585"), "base": Decimal("600")},
-        {"min": Decimal("21400"), "max": Decimal("80650"), "rate": Decimal("0.0625"), "base": Decimal("1042")},
-        {"min": Decimal("80650"), "max": Decimal("215400"), "rate": Decimal("0.0685"), "base": Decimal("4842")},
-        {"min": Decimal("215400"), "max": Decimal("1077550"), "rate": Decimal("0.0965"), "base": Decimal("14220")},
-        {"min": Decimal("1077550"), "max": Decimal("5000000"), "rate": Decimal("0.103"), "base": Decimal("78990")},
-        {"min": Decimal("5000000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("360491")}
-    ],
-    "Married": [
-        {"min": Decimal("0"), "max": Decimal("17150"), "rate": Decimal("0.04"), "base": Decimal("0")},
-        {"min": Decimal("17150"), "max": Decimal("23600"), "rate": Decimal("0.045"), "base": Decimal("686")},
-        {"min": Decimal("23600"), "max": Decimal("27900"), "rate": Decimal("0.0525"), "base": Decimal("899")},
-        {"min": Decimal("27900"), "max": Decimal("43000"), "rate": Decimal("0.0585"), "base": Decimal("1116")},
-        {"min": Decimal("43000"), "max": Decimal("161300"), "rate": Decimal("0.0625"), "base": Decimal("2004")},
-        {"min": Decimal("161300"), "max": Decimal("323200"), "rate": Decimal("0.0685"), "base": Decimal("9051")},
-        {"min": Decimal("323200"), "max": Decimal("2155350"), "rate": Decimal("0.0965"), "base": Decimal("20797")},
-        {"min": Decimal("2155350"), "max": Decimal("5000000"), "rate": Decimal("0.103"), "base": Decimal("183010")},
-        {"min": Decimal("5000000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("447441")}
-    ],
-    "Head": [  # Head of Household brackets
-        {"min": Decimal("0"), "max": Decimal("12800"), "rate": Decimal("0.04"), "base": Decimal("0")},
-        {"min": Decimal("12800"), "max": Decimal("17650"), "rate": Decimal("0.045"), "base": Decimal("512")},
-        {"min": Decimal("17650"), "max": Decimal("20900"), "rate": Decimal("0.0525"), "base": Decimal("730")},
-        {"min": Decimal("20900"), "max": Decimal("32200"), "rate": Decimal("0.0585"), "base": Decimal("901")},
-        {"min": Decimal("32200"), "max": Decimal("107650"), "rate": Decimal("0.0625"), "base": Decimal("1568")},
-        {"min": Decimal("107650"), "max": Decimal("269300"), "rate": Decimal("0.0685"), "base": Decimal("6253")},
-        {"min": Decimal("269300"), "max": Decimal("1616450"), "rate": Decimal("0.0965"), "base": Decimal("17233")},
-        {"min": Decimal("1616450"), "max": Decimal("5000000"), "rate": Decimal("0.103"), "base": Decimal("131000")},
-        {"min": Decimal("5000000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("404016")}
-    ],
-    "Separate": [  # Married Filing Separately (half of married brackets)
-        {"min": Decimal("0"), "max": Decimal("8575"), "rate": Decimal("0.04"), "base": Decimal("0")},
-        {"min": Decimal("8575"), "max": Decimal("11800"), "rate": Decimal("0.045"), "base": Decimal("343")},
-        {"min": Decimal("11800"), "max": Decimal("13950"), "rate": Decimal("0.0525"), "base": Decimal("450")},
-        {"min": Decimal("13950"), "max": Decimal("21500"), "rate": Decimal("0.0585"), "base": Decimal("558")},
-        {"min": Decimal("21500"), "max": Decimal("80650"), "rate": Decimal("0.0625"), "base": Decimal("1002")},
-        {"min": Decimal("80650"), "max": Decimal("161600"), "rate": Decimal("0.0685"), "base": Decimal("4526")},
-        {"min": Decimal("161600"), "max": Decimal("1077675"), "rate": Decimal("0.0965"), "base": Decimal("10399")},
-        {"min": Decimal("1077675"), "max": Decimal("2500000"), "rate": Decimal("0.103"), "base": Decimal("91505")},
-        {"min": Decimal("2500000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("223721")}
-    ]
-}
-
-# NYC Tax Rates (2024 estimated)
-NYC_TAX_RATES = {
-    "Single": Decimal("0.03078"),
-    "Married": Decimal("0.03078"),
-    "Head": Decimal("0.03078"),
-    "Separate": Decimal("0.03078"),
-    "Widow": Decimal("0.03078")
-}
-
-# Yonkers Tax Rate (2024)
-YONKERS_TAX_RATE = Decimal("0.16675")  # 16.75% of NY state tax
-
-# NY Tax Credits and Deductions
-NY_DEPENDENT_CREDIT = Decimal("100")  # Per qualifying dependent
-NY_EMPIRE_STATE_CHILD_CREDIT = Decimal("333")  # Per qualifying child
-NY_HOUSEHOLD_CREDIT = {
-    "Single": [
-        (Decimal("5000"), Decimal("75")),
-        (Decimal("6000"), Decimal("60")),
-        (Decimal("7000"), Decimal("50")),
-        (Decimal("20000"), Decimal("45")),
-        (Decimal("25000"), Decimal("40")),
-        (Decimal("28000"), Decimal("20")),
-        (Decimal("32000"), Decimal("15")),
-        (None, Decimal("0"))
-    ],
-    "Married": [
-        (Decimal("5000"), Decimal("90")),
-        (Decimal("6000"), Decimal("75")),
-        (Decimal("7000"), Decimal("65")),
-        (Decimal("20000"), Decimal("60")),
-        (Decimal("22000"), Decimal("60")),
-        (Decimal("25000"), Decimal("50")),
-        (Decimal("28000"), Decimal("40")),
-        (Decimal("32000"), Decimal("20")),
-        (None, Decimal("0"))
-    ]
-}
+# NY state, NYC and Yonkers tax: the shared NY engine (states/specs/ny.json)
+NY = get_calculator("NY")
+NY_STANDARD_DEDUCTION = NY.rules.standard
+NY_LOCAL_TAXES = {local.name: local for local in NY.rules.local_taxes}
+NYC_TAX_RATES = NY_LOCAL_TAXES["nyc"].rates
+YONKERS_TAX_RATE = NY_LOCAL_TAXES["yonkers"].rates["Single"]  # share of NY state tax, same for every status
+PERIOD_NAMES = {int(count): name for name, count in PERIODS.items()}
 
 NY_ITEMIZED_CATEGORIES = {
     "medical": "Medical and Dental Expenses",
@@ -476,23 +395,6 @@ NY_ITEMIZED_CATEGORIES = {
     "other": "Other Itemized Deductions"
 }
 
-def calculate_ny_household_credit(income: Decimal, status: str, dependents: int) -> Decimal:
-    """Calculate NY Household Credit based on income and filing status."""
-    if status not in NY_HOUSEHOLD_CREDIT:
-        return Decimal("0")
-        
-    credit = Decimal("0")
-    for threshold, amount in NY_HOUSEHOLD_CREDIT[status]:
-        if threshold is None or income <= threshold:
-            credit = amount
-            break
-            
-    # Additional credit for dependents (married only)
-    if status == "Married" and dependents > 0:
-        credit += Decimal("15") * Decimal(str(min(dependents, 5)))
-        
-    return credit
-
 def calculate_ny_withholding(
     annual_salary: Decimal,
     pay_periods: int,
@@ -510,98 +412,31 @@ def calculate_ny_withholding(
     supplemental_amount: Decimal = Decimal("0")
 ) -> tuple[Decimal, Decimal, Decimal]:
     """
-    Calculate NY state, NYC, and Yonkers withholding with improved precision.
+    Calculate NY state, NYC, and Yonkers withholding with the shared NY engine.
     Returns a tuple of (state_tax, nyc_tax, yonkers_tax) per pay period.
     """
     if not calc_ny:
         return Decimal("0"), Decimal("0"), Decimal("0")
-        
+
     try:
-        # Convert inputs to Decimal
-        annual_salary = Decimal(str(annual_salary))
-        ny_extra = Decimal(str(ny_extra))
-        
-        # Handle supplemental wages
-        if supplemental_wages:
-            supplemental_amount = Decimal(str(supplemental_amount))
-            supplemental_tax = supplemental_amount * Decimal("0.0985")  # NY supplemental wage rate
-            annual_salary += supplemental_amount
-        else:
-            supplemental_tax = Decimal("0")
-        
-        # Calculate itemized deductions
-        total_itemized = Decimal("0")
-        if itemized_deductions:
-            for category, amount in itemized_deductions.items():
-                if category in NY_ITEMIZED_CATEGORIES:
-                    total_itemized += Decimal(str(amount))
-        
-        # Determine deduction (greater of standard or itemized)
-        standard_deduction = NY_STANDARD_DEDUCTION[ny_status]
-        deduction = max(standard_deduction, total_itemized)
-        
-        # Calculate NY taxable income
-        allowance_amount = Decimal(str(ny_allow)) * Decimal("1000")
-        taxable = max(annual_salary - allowance_amount - deduction, Decimal("0"))
-        
-        # Calculate base state tax
-        brackets = NY_TAX_BRACKETS[ny_status]
-        state_tax = Decimal("0")
-        
-        for bracket in brackets:
-            if bracket["max"] is None or taxable <= bracket["max"]:
-                excess = taxable - bracket["min"]
-                state_tax = bracket["base"] + (excess * bracket["rate"])
-                break
-        
-        # Calculate credits
-        credits = Decimal("0")
-        
-        # Household credit
-        household_credit = calculate_ny_household_credit(annual_salary, ny_status, num_dependents)
-        credits += household_credit
-        
-        # Dependent credit
-        if num_dependents > 0:
-            credits += NY_DEPENDENT_CREDIT * Decimal(str(num_dependents))
-        
-        # Empire State Child Credit
-        if qualifying_children > 0:
-            credits += NY_EMPIRE_STATE_CHILD_CREDIT * Decimal(str(qualifying_children))
-        
-        # Apply credits
-        state_tax = max(state_tax - credits, Decimal("0"))
-        
-        # Part-year resident adjustment
-        if part_year_resident:
-            # Assume 6 months for demonstration - this should be configurable
-            state_tax = state_tax * Decimal("0.5")
-        
-        # Calculate NYC Tax if applicable
-        nyc_tax = Decimal("0")
-        if is_nyc_resident:
-            nyc_tax = taxable * NYC_TAX_RATES[ny_status]
-            if part_year_resident:
-                nyc_tax *= Decimal("0.5")
-            
-        # Calculate Yonkers Tax if applicable
-        yonkers_tax = Decimal("0")
-        if is_yonkers_resident:
-            yonkers_tax = state_tax * YONKERS_TAX_RATE
-            if part_year_resident:
-                yonkers_tax *= Decimal("0.5")
-        
-        # Add supplemental tax if applicable
-        state_tax += supplemental_tax
-        
-        # Convert to per-period amounts
-        periods = Decimal(str(pay_periods))
-        state_tax = round_to_penny(state_tax / periods) + ny_extra
-        nyc_tax = round_to_penny(nyc_tax / periods)
-        yonkers_tax = round_to_penny(yonkers_tax / periods)
-        
+        result = NY.calculate(
+            Decimal(str(annual_salary)),
+            ny_status,
+            PERIOD_NAMES[pay_periods],
+            allowances=ny_allow,
+            is_nyc_resident=is_nyc_resident,
+            is_yonkers_resident=is_yonkers_resident,
+            itemized_deductions={k: v for k, v in (itemized_deductions or {}).items() if k in NY_ITEMIZED_CATEGORIES},
+            num_dependents=num_dependents,
+            qualifying_children=qualifying_children,
+            part_year_resident=part_year_resident,
+            supplemental_wages=supplemental_amount if supplemental_wages else Decimal("0")
+        )
+        state_tax = round_to_penny(result.state_tax) + Decimal(str(ny_extra))
+        nyc_tax = round_to_penny(result.local_taxes.get("nyc", Decimal("0")))
+        yonkers_tax = round_to_penny(result.local_taxes.get("yonkers", Decimal("0")))
         return state_tax, nyc_tax, yonkers_tax
-        
+
     except Exception as e:
         st.error(f"Error calculating NY taxes: {str(e)}")
         return Decimal("0"), Decimal("0"), Decimal("0")
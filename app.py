@@ -1,7 +1,14 @@
 import random, streamlit as st, time, json, os, hashlib, uuid
 from decimal import Decimal, getcontext, ROUND_HALF_UP
 from datetime import datetime
-from states import get_calculator, STATE_CALCULATORS
+from concurrent.futures import ThreadPoolExecutor
+from states import get_available_states, get_calculator, get_state_name
+import federal
+from federal import PERIODS
+from payroll.compare import compare_states
+from payroll.paycheck import PaycheckInput
+from payroll.upload import MAX_UPLOAD_MB, UploadJob, start_pool
+from currency_input import currency_input
 
 def init_analytics():
     if 'visitor_id' not in st.session_state: st.session_state.visitor_id = str(uuid.uuid4())
@@ -48,24 +55,6 @@ def track_pageview(utm_params=None):
 init_analytics()
 track_pageview()
 
-def formatted_currency_input(label, default_value="0.00", key=None, help=None):
-    def format_input():
-        raw = st.session_state[key].replace(",", "")
-        try:
-            if "." in raw:
-                integer_part, decimal_part = raw.split(".")
-                decimal_part = decimal_part[:2]
-                num = float(f"{integer_part}.{decimal_part}")
-            else:
-                num = float(raw)
-            formatted = f"{num:,.2f}"
-            st.session_state[key] = formatted
-            st.session_state.gross_val = num
-            perform_calculation()
-        except:
-            pass
-    return st.sidebar.text_input(label=label, value=default_value, key=key, on_change=format_input, help=help)
-
 st.set_page_config(page_title="2024 Withholding (Pub 15-T)", page_icon="💸", layout="wide")
 
 st.markdown("""<style>
@@ -183,262 +172,159 @@ def track_feature_usage(feature_name: str):
 getcontext().prec = 28
 getcontext().rounding = ROUND_HALF_UP
 
-STANDARD_DEDUCTION = {"single": Decimal("14600"), "married": Decimal("29200"), "head": Decimal("21900")}
-FICA_CAP = Decimal("168600")
-SOCIAL_RATE = Decimal("0.062")
-MEDICARE_RATE = Decimal("0.0145")
-PERIODS = {"weekly": Decimal("52"), "biweekly": Decimal("26"), "semimonthly": Decimal("24"), "monthly": Decimal("12")}
-
-PERCENTAGE_METHOD_TABLES = {
-    "weekly": {
-        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("76"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("291"),"base":Decimal("21.50"),"rate":Decimal("0.12")},{"min":Decimal("933"),"base":Decimal("104.26"),"rate":Decimal("0.22")},{"min":Decimal("1822"),"base":Decimal("326.26"),"rate":Decimal("0.24")},{"min":Decimal("3692"),"base":Decimal("788.50"),"rate":Decimal("0.32")},{"min":Decimal("4600"),"base":Decimal("1086.90"),"rate":Decimal("0.35")},{"min":Decimal("11950"),"base":Decimal("3700.27"),"rate":Decimal("0.37")}],
-        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("230"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("711"),"base":Decimal("48.10"),"rate":Decimal("0.12")},{"min":Decimal("1691"),"base":Decimal("165.98"),"rate":Decimal("0.22")},{"min":Decimal("3185"),"base":Decimal("488.38"),"rate":Decimal("0.24")},{"min":Decimal("5159"),"base":Decimal("955.10"),"rate":Decimal("0.32")},{"min":Decimal("6479"),"base":Decimal("1356.54"),"rate":Decimal("0.35")},{"min":Decimal("16942"),"base":Decimal("4627.58"),"rate":Decimal("0.37")}],
-        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("145"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("457"),"base":Decimal("31.20"),"rate":Decimal("0.12")},{"min":Decimal("1034"),"base":Decimal("102.54"),"rate":Decimal("0.22")},{"min":Decimal("1611"),"base":Decimal("228.58"),"rate":Decimal("0.24")},{"min":Decimal("3117"),"base":Decimal("604.90"),"rate":Decimal("0.32")},{"min":Decimal("3933"),"base":Decimal("865.62"),"rate":Decimal("0.35")},{"min":Decimal("10225"),"base":Decimal("2950.56"),"rate":Decimal("0.37")}]
-    },
-    "biweekly": {
-        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("153"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("583"),"base":Decimal("43"),"rate":Decimal("0.12")},{"min":Decimal("1866"),"base":Decimal("208.52"),"rate":Decimal("0.22")},{"min":Decimal("3644"),"base":Decimal("652.52"),"rate":Decimal("0.24")},{"min":Decimal("7385"),"base":Decimal("1577.00"),"rate":Decimal("0.32")},{"min":Decimal("9200"),"base":Decimal("2173.80"),"rate":Decimal("0.35")},{"min":Decimal("23900"),"base":Decimal("7400.70"),"rate":Decimal("0.37")}],
-        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("460"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1423"),"base":Decimal("96.10"),"rate":Decimal("0.12")},{"min":Decimal("3382"),"base":Decimal("331.96"),"rate":Decimal("0.22")},{"min":Decimal("6370"),"base":Decimal("976.76"),"rate":Decimal("0.24")},{"min":Decimal("10318"),"base":Decimal("1910.20"),"rate":Decimal("0.32")},{"min":Decimal("12958"),"base":Decimal("2714.14"),"rate":Decimal("0.35")},{"min":Decimal("33884"),"base":Decimal("9255.38"),"rate":Decimal("0.37")}],
-        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("289"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("913"),"base":Decimal("62.50"),"rate":Decimal("0.12")},{"min":Decimal("2067"),"base":Decimal("205.20"),"rate":Decimal("0.22")},{"min":Decimal("3222"),"base":Decimal("457.16"),"rate":Decimal("0.24")},{"min":Decimal("6234"),"base":Decimal("1209.40"),"rate":Decimal("0.32")},{"min":Decimal("7866"),"base":Decimal("1731.24"),"rate":Decimal("0.35")},{"min":Decimal("20450"),"base":Decimal("5901.12"),"rate":Decimal("0.37")}]
-    },
-    "semimonthly": {
-        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("166"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("632"),"base":Decimal("46.60"),"rate":Decimal("0.12")},{"min":Decimal("2022"),"base":Decimal("224.72"),"rate":Decimal("0.22")},{"min":Decimal("3953"),"base":Decimal("703.20"),"rate":Decimal("0.24")},{"min":Decimal("8015"),"base":Decimal("1697.84"),"rate":Decimal("0.32")},{"min":Decimal("9983"),"base":Decimal("2338.72"),"rate":Decimal("0.35")},{"min":Decimal("25900"),"base":Decimal("7963.20"),"rate":Decimal("0.37")}],
-        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("500"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1543"),"base":Decimal("104.20"),"rate":Decimal("0.12")},{"min":Decimal("3662"),"base":Decimal("359.28"),"rate":Decimal("0.22")},{"min":Decimal("6890"),"base":Decimal("1056.88"),"rate":Decimal("0.24")},{"min":Decimal("11100"),"base":Decimal("2066.40"),"rate":Decimal("0.32")},{"min":Decimal("13908"),"base":Decimal("2935.36"),"rate":Decimal("0.35")},{"min":Decimal("36358"),"base":Decimal("10005.84"),"rate":Decimal("0.37")}],
-        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("314"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("995"),"base":Decimal("68.60"),"rate":Decimal("0.12")},{"min":Decimal("2248"),"base":Decimal("225.60"),"rate":Decimal("0.22")},{"min":Decimal("3500"),"base":Decimal("502.48"),"rate":Decimal("0.24")},{"min":Decimal("6781"),"base":Decimal("1329.20"),"rate":Decimal("0.32")},{"min":Decimal("8550"),"base":Decimal("1900.36"),"rate":Decimal("0.35")},{"min":Decimal("22215"),"base":Decimal("6472.84"),"rate":Decimal("0.37")}]
-    },
-    "monthly": {
-        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("333"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1250"),"base":Decimal("90.40"),"rate":Decimal("0.12")},{"min":Decimal("4043"),"base":Decimal("450.48"),"rate":Decimal("0.22")},{"min":Decimal("7900"),"base":Decimal("1405.44"),"rate":Decimal("0.24")},{"min":Decimal("16031"),"base":Decimal("3395.68"),"rate":Decimal("0.32")},{"min":Decimal("19967"),"base":Decimal("4677.84"),"rate":Decimal("0.35")},{"min":Decimal("51800"),"base":Decimal("15921.84"),"rate":Decimal("0.37")}],
-        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1000"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("3087"),"base":Decimal("208.40"),"rate":Decimal("0.12")},{"min":Decimal("7325"),"base":Decimal("718.56"),"rate":Decimal("0.22")},{"min":Decimal("13781"),"base":Decimal("2113.76"),"rate":Decimal("0.24")},{"min":Decimal("22200"),"base":Decimal("4132.80"),"rate":Decimal("0.32")},{"min":Decimal("27817"),"base":Decimal("5870.72"),"rate":Decimal("0.35")},{"min":Decimal("72717"),"base":Decimal("19650.72"),"rate":Decimal("0.37")}],
-        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("628"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("2000"),"base":Decimal("138.20"),"rate":Decimal("0.12")},{"min":Decimal("4525"),"base":Decimal("451.40"),"rate":Decimal("0.22")},{"min":Decimal("7034"),"base":Decimal("1004.96"),"rate":Decimal("0.24")},{"min":Decimal("13562"),"base":Decimal("2658.40"),"rate":Decimal("0.32")},{"min":Decimal("17098"),"base":Decimal("3800.72"),"rate":Decimal("0.35")},{"min":Decimal("44433"),"base":Decimal("12945.68"),"rate":Decimal("0.37")}]
-    }
-}
-
-MULTIPLE_JOBS_RANGES = {
-    "single": [
-        {"range": (0, 14200), "adjustment": Decimal("0")},
-        {"range": (14200, 34000), "adjustment": Decimal("1020")},
-        {"range": (34000, 100000), "adjustment": Decimal("2040")},
-        {"range": (100000, 200000), "adjustment": Decimal("3060")},
-        {"range": (200000, float('inf')), "adjustment": Decimal("4080")}
-    ],
-    "married": [
-        {"range": (0, 17000), "adjustment": Decimal("0")},
-        {"range": (17000, 45000), "adjustment": Decimal("2040")},
-        {"range": (45000, 120000), "adjustment": Decimal("4080")},
-        {"range": (120000, 240000), "adjustment": Decimal("6120")},
-        {"range": (240000, float('inf')), "adjustment": Decimal("8160")}
-    ],
-    "head": [
-        {"range": (0, 14200), "adjustment": Decimal("0")},
-        {"range": (14200, 34000), "adjustment": Decimal("1020")},
-        {"range": (34000, 100000), "adjustment": Decimal("2040")},
-        {"range": (100000, 200000), "adjustment": Decimal("3060")},
-        {"range": (200000, float('inf')), "adjustment": Decimal("4080")}
-    ]
-}
-
-def get_multiple_jobs_adjustment(annual_income: Decimal, filing_status: str) -> Decimal:
-    for bracket in MULTIPLE_JOBS_RANGES[filing_status]:
-        if bracket["range"][0] <= float(annual_income) < bracket["range"][1]: return bracket["adjustment"]
-    return Decimal("0")
-
-def round_to_penny(amount: Decimal) -> Decimal:
-    return amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-def find_bracket(table, status, amt):
-    if amt < Decimal("0"): raise ValueError("Taxable amount cannot be negative")
-    for row in reversed(table[status]):
-        if amt >= row["min"]: return row
-    return table[status][0]
-
-def calculate_periodic_pct_tax(status, taxable, period):
-    if taxable < Decimal("0"): raise ValueError("Taxable amount cannot be negative")
-    taxable = round_to_penny(taxable)
-    row = find_bracket(PERCENTAGE_METHOD_TABLES[period], status, taxable)
-    excess = round_to_penny(taxable - row["min"])
-    tax = row["base"] + (excess * row["rate"])
-    return round_to_penny(tax)
-
-def calculate_annual_pct_tax(status, taxable):
-    if taxable < Decimal("0"): raise ValueError("Taxable amount cannot be negative")
-    row = find_bracket(IRS_1040_BRACKETS, status, taxable)
-    tax = row["base"] + (taxable - row["min"]) * row["rate"]
-    return round_to_penny(tax)
-
 @st.cache_data
 def calculate_fed(gross: Decimal, status: str, multi: bool, dep_credit: Decimal, oth: Decimal, ded: Decimal, extra: Decimal, period: str, annual: bool, other_job_amount: Decimal = Decimal("0")) -> Decimal:
     try:
-        if any(x < Decimal("0") for x in [gross, dep_credit, oth, ded, extra]): raise ValueError("Negative values not allowed")
-        p = PERIODS[period]
-        if not annual:
-            base, other_periodic, ded_periodic, annual_gross = gross, oth/p, ded/p, gross*p
-        else:
-            base, other_periodic, ded_periodic, annual_gross = gross/p, oth/p, ded/p, gross
-        if multi:
-            adjustment = get_multiple_jobs_adjustment(max(annual_gross, other_job_amount), status) if other_job_amount > Decimal("0") else get_multiple_jobs_adjustment(annual_gross, status)
-            base += adjustment / p
-        standard_ded_periodic = STANDARD_DEDUCTION[status] / p
-        taxable = max(base + other_periodic - standard_ded_periodic - ded_periodic, Decimal("0"))
-        fed = calculate_periodic_pct_tax(status, taxable, period)
-        fed = max(fed - dep_credit/p, Decimal("0")) + extra
-        return round_to_penny(fed * p if annual else fed)
+        return federal.calculate_fed(gross, status, multi, dep_credit, oth, ded, extra, period, annual, other_job_amount)
     except Exception as e:
         st.error(f"Error calculating federal tax: {str(e)}")
         return Decimal("0")
 
-def calculate_ss(gross: Decimal, period: str, annual: bool) -> Decimal:
-    p = PERIODS[period]
-    base = gross if annual else gross * p
-    ss_ann = min(base, FICA_CAP) * SOCIAL_RATE
-    return (ss_ann if annual else ss_ann / p).quantize(Decimal("0.01"), ROUND_HALF_UP)
-
-def calculate_mi(gross: Decimal, period: str, annual: bool) -> Decimal:
-    p = PERIODS[period]
-    base = gross if annual else gross * p
-    mi_ann = base * MEDICARE_RATE
-    return (mi_ann if annual else mi_ann / p).quantize(Decimal("0.01"), ROUND_HALF_UP)
-
-def format_currency(value: str) -> str:
-    try:
-        clean_value = value.replace(",", "").replace(" ", "")
-        parts = clean_value.split(".")
-        whole = "{:,}".format(int(parts[0])) if parts[0] else "0"
-        if len(parts) > 1:
-            decimal = parts[1][:2].ljust(2, "0")
-            return f"{whole}.{decimal}"
-        return f"{whole}.00"
-    except: return "0.00"
-
-def formatted_number_input(label: str, value: str, help: str = "") -> str:
-    key = f"formatted_input_{label}"
-    if key not in st.session_state: st.session_state[key] = format_currency(value)
-    new_value = st.text_input(label, value=st.session_state[key], help=help, key=f"{key}_input")
-    formatted_value = format_currency(new_value)
-    st.session_state[key] = formatted_value
-    return formatted_value
+calculate_ss, calculate_mi = federal.calculate_ss, federal.calculate_mi
 
 st.sidebar.title("Inputs")
 mode = st.sidebar.radio("Mode", ["Single Paycheck", "Full Year"])
 annual = mode == "Full Year"
 st.session_state.annual = annual
 
-gross_input = formatted_currency_input("Annual Gross Salary ($)" if annual else "Gross Amount per Paycheck ($)", "60,000.00" if annual else "1,000.00", key="annual_gross" if annual else "paycheck_gross", help="Enter your gross salary")
+def show_results():
+    st.session_state.results_view = "calculate"
 
-try:
-    gross_val = float(gross_input.replace(",", "").strip())
-    if gross_val < 0: st.sidebar.error("Gross amount cannot be negative"); gross_val = 0
-    st.session_state.gross_val = gross_val
-except ValueError: st.sidebar.error("Please enter a valid number"); st.session_state.gross_val = 0
+with st.sidebar:
+    # Formatted and validated in the browser; only the final amount comes back
+    st.session_state.gross_val = currency_input("Annual Gross Salary ($)" if annual else "Gross Amount per Paycheck ($)",
+                                                60_000.0 if annual else 1_000.0, key="annual_gross" if annual else "paycheck_gross",
+                                                help="Enter your gross salary", on_change=show_results)
 
-period = st.sidebar.selectbox("Pay Frequency", ["weekly","biweekly","semimonthly","monthly"])
-st.session_state.period = period
+def w4_inputs():
+    """Steps 1-4 of the W-4."""
+    period = st.selectbox("Pay Frequency", ["weekly","biweekly","semimonthly","monthly"])
+    st.session_state.period = period
 
-st.sidebar.subheader("Step 2: Multiple Jobs / Spouse Works")
-multi = st.sidebar.checkbox("Check if any of these apply:")
-st.session_state.multi = multi
+    st.subheader("Step 2: Multiple Jobs / Spouse Works")
+    multi = st.checkbox("Check if any of these apply:")
+    st.session_state.multi = multi
 
-if multi:
-    st.sidebar.markdown("""📋 **Multiple Jobs Worksheet**
+    if multi:
+        st.markdown("""📋 **Multiple Jobs Worksheet**
     - You have more than one job at the same time
     - You're married filing jointly and your spouse also works""")
-    job_count = st.sidebar.radio("Select your situation:", ["Two jobs total", "Three or more jobs total"])
-    st.session_state.job_count = job_count
-    if job_count == "Two jobs total":
-        st.sidebar.markdown("For most accurate withholding with two jobs:")
-        other_job_input = st.sidebar.text_input("Annual salary of other job ($)", value="0.00", help="Enter the annual salary of the other job")
-        try:
-            other_job_amount = Decimal(other_job_input.replace(',', '').strip())
-            if other_job_amount < 0: st.sidebar.error("Salary cannot be negative"); other_job_amount = Decimal("0")
-            st.session_state.other_job_amount = other_job_amount
-        except: st.sidebar.error("Please enter a valid number"); st.session_state.other_job_amount = Decimal("0")
-
-st.sidebar.subheader("Step 3: Dependent Credits")
-st.sidebar.markdown("""Enter total dependent credits:
+        job_count = st.radio("Select your situation:", ["Two jobs total", "Three or more jobs total"])
+        st.session_state.job_count = job_count
+        if job_count == "Two jobs total":
+            st.markdown("For most accurate withholding with two jobs:")
+            other_job = currency_input("Annual salary of other job ($)", 0.0, key="other_job_salary", help="Enter the annual salary of the other job")
+            st.session_state.other_job_amount = Decimal(f"{other_job:.2f}")
+
+    st.subheader("Step 3: Dependent Credits")
+    st.markdown("""Enter total dependent credits:
 - $2,000 per qualifying child under 17
 - $1,500 per dependent 17 and older""")
-dep_credit_input = st.sidebar.text_input("Total Dependent Credits ($)", value="0.00", help="Enter total dependent credits")
-
-try:
-    dep_credit = float(dep_credit_input.replace(',', '').strip())
-    if dep_credit < 0: st.sidebar.error("Dependent credits cannot be negative"); dep_credit = 0
-except ValueError: st.sidebar.error("Please enter a valid number for dependent credits"); dep_credit = 0
-
-oth = Decimal(str(st.sidebar.number_input("Step 4(a): Other income ($)", value=0.0, step=100.0)))
-ded = Decimal(str(st.sidebar.number_input("Step 4(b): Deductions over standard ($)", value=0.0, step=100.0)))
-extra = Decimal(str(st.sidebar.number_input("Step 4(c): Extra withholding per period ($)", value=0.0, step=5.0)))
-filing = st.sidebar.selectbox("Filing Status (Step 1c)", ["single","married","head"])
-
-st.sidebar.markdown("---")
-st.sidebar.subheader("State Tax")
-selected_state = st.sidebar.selectbox("Select State", ["None"] + sorted(STATE_CALCULATORS.keys()), format_func=lambda x: "No state tax" if x == "None" else f"{get_calculator(x).state_name} ({x})")
-
-state_inputs = {}
-if selected_state != "None":
-    calculator = get_calculator(selected_state)
-    ui_components = calculator.get_ui_components()
-    if "render" in ui_components: state_inputs = ui_components["render"](st.sidebar)
-else: calculator = None
-
-st.session_state.update({
-    'dep_credit': dep_credit, 'oth': oth, 'ded': ded, 'extra': extra, 'filing': filing,
-    'selected_state': selected_state, 'calculator': calculator, 'state_inputs': state_inputs
-})
-
-def perform_calculation():
-    if 'gross_val' not in st.session_state or st.session_state.gross_val > 400_000:
-        st.error("who we lying to 👀")
-        return
+    dep_credit = currency_input("Total Dependent Credits ($)", 0.0, key="dep_credit_total", help="Enter total dependent credits")
+
+    oth = Decimal(str(st.number_input("Step 4(a): Other income ($)", value=0.0, step=100.0)))
+    ded = Decimal(str(st.number_input("Step 4(b): Deductions over standard ($)", value=0.0, step=100.0)))
+    extra = Decimal(str(st.number_input("Step 4(c): Extra withholding per period ($)", value=0.0, step=5.0)))
+    filing = st.selectbox("Filing Status (Step 1c)", ["single","married","head"])
+    st.session_state.update({'dep_credit': dep_credit, 'oth': oth, 'ded': ded, 'extra': extra, 'filing': filing})
+
+def state_options():
+    """The state picker and the chosen state's own inputs."""
+    st.markdown("---")
+    st.subheader("State Tax")
+    selected_state = st.selectbox("Select State", ["None"] + get_available_states(), format_func=lambda x: "No state tax" if x == "None" else f"{get_state_name(x)} ({x})")
+
+    state_inputs = {}
+    if selected_state != "None":
+        calculator = get_calculator(selected_state)
+        ui_components = calculator.get_ui_components()
+        if "render" in ui_components: state_inputs = ui_components["render"](st.container())
+    else: calculator = None
+    st.session_state.update({'selected_state': selected_state, 'calculator': calculator, 'state_inputs': state_inputs})
+
+RESULTS_MEMO_SIZE = 32  # input sets remembered per session
+
+def calculation_key(view: str) -> str:
+    """Hash of every input a calculation reads (federal fields and state_inputs), per view."""
+    s = st.session_state
+    other_job = s.other_job_amount if s.multi and s.get('job_count') == "Two jobs total" else Decimal("0")
+    inputs = (view, s.gross_val, s.period, s.annual, s.multi, other_job, s.dep_credit, s.oth, s.ded, s.extra,
+              s.filing, s.selected_state, sorted(s.state_inputs.items()))
+    return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+def memoized(view: str, compute):
+    """compute() for the current inputs, run at most once per distinct input set in this session."""
+    memo = st.session_state.setdefault('results_memo', {})
+    key = calculation_key(view)
+    if key not in memo:
+        memo[key] = compute()
+        while len(memo) > RESULTS_MEMO_SIZE: memo.pop(next(iter(memo)))
+    return memo[key]
+
+def compute_paycheck():
     track_feature_usage('calculator_used')
     if st.session_state.multi: track_feature_usage('multiple_jobs')
     if st.session_state.dep_credit > 0: track_feature_usage('dependent_credits')
     if st.session_state.selected_state != "None": track_feature_usage(f'state_tax_{st.session_state.selected_state}')
-    
+
     gross = Decimal(str(st.session_state.gross_val))
     dep_credit_dec = Decimal(str(st.session_state.dep_credit))
     other_job = Decimal(str(st.session_state.other_job_amount)) if st.session_state.multi and st.session_state.job_count == "Two jobs total" else Decimal("0")
-    
+
     fed = calculate_fed(gross, st.session_state.filing, st.session_state.multi, dep_credit_dec,
                        st.session_state.oth, st.session_state.ded, st.session_state.extra,
                        st.session_state.period, st.session_state.annual, other_job)
-    
+
     ss = calculate_ss(gross, st.session_state.period, st.session_state.annual)
     mi = calculate_mi(gross, st.session_state.period, st.session_state.annual)
-    
-    if st.session_state.annual:
-        net = gross - fed - ss - mi
-        per_pay = gross / PERIODS[st.session_state.period]
-    else:
-        per_pay = gross
-        net = per_pay - fed - ss - mi
 
-    cols = st.columns(4)
-    with cols[0]:
-        st.metric("Federal Tax", f"${fed:,.2f}")
-    with cols[1]:
-        st.metric("Social Security", f"${ss:,.2f}")
-    with cols[2]:
-        st.metric("Medicare", f"${mi:,.2f}")
-    with cols[3]:
-        st.metric("Net Pay", f"${net:,.2f}")
+    net = gross - fed - ss - mi
 
-    if st.session_state.calculator is not None:
+    calculator, result = st.session_state.calculator, None
+    if calculator is not None:
         annual_income = Decimal(str(gross if st.session_state.annual else gross * PERIODS[st.session_state.period]))
         # Normalize filing status case for state calculators
         state_filing_status = st.session_state.filing.capitalize()
-        result = st.session_state.calculator.calculate(
+        result = calculator.calculate(
             income=annual_income,
             pay_period=st.session_state.period,
             filing_status=state_filing_status,
             is_annual=st.session_state.annual,
             **{k: v for k, v in st.session_state.state_inputs.items() if k != 'filing_status'}
         )
-        
-        st.markdown(f"### {st.session_state.calculator.state_name} Tax Breakdown")
+    return {'fed': fed, 'ss': ss, 'mi': mi, 'net': net, 'annual': st.session_state.annual, 'period': st.session_state.period,
+            'calculator': calculator, 'result': result}
+
+def perform_calculation():
+    if 'gross_val' not in st.session_state or st.session_state.gross_val > 400_000:
+        st.error("who we lying to 👀")
+        return
+    try:
+        r = memoized('calculate', compute_paycheck)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    fed, ss, mi, net = r['fed'], r['ss'], r['mi'], r['net']
+
+    cols = st.columns(4)
+    with cols[0]:
+        st.metric("Federal Tax", f"${fed:,.2f}")
+    with cols[1]:
+        st.metric("Social Security", f"${ss:,.2f}")
+    with cols[2]:
+        st.metric("Medicare", f"${mi:,.2f}")
+    with cols[3]:
+        st.metric("Net Pay", f"${net:,.2f}")
+
+    calculator, result = r['calculator'], r['result']
+    if calculator is not None:
+        st.markdown(f"### {calculator.state_name} Tax Breakdown")
         num_cols = 4 if result.local_taxes else 3
         state_cols = st.columns(num_cols)
         
         with state_cols[0]:
-            st.metric(f"{st.session_state.calculator.state_code} State Tax", f"${result.state_tax:,.2f}",
-                     help=f"{st.session_state.calculator.state_name} state withholding tax per pay period")
+            st.metric(f"{calculator.state_code} State Tax", f"${result.state_tax:,.2f}",
+                     help=f"{calculator.state_name} state withholding tax per pay period")
         
         col_index = 1
         total_tax = result.state_tax
@@ -451,20 +337,109 @@ def perform_calculation():
         with state_cols[-2]:
             st.metric("Effective Rate", f"{float(result.effective_rate)*100:.2f}%", help="Total effective tax rate (state + local)")
         with state_cols[-1]:
-            st.metric("Total State Tax", f"${total_tax:,.2f}", help=f"Total {st.session_state.calculator.state_name} taxes per pay period")
+            st.metric("Total State Tax", f"${total_tax:,.2f}", help=f"Total {calculator.state_name} taxes per pay period")
         
-        if not st.session_state.annual:
-            annual_state = total_tax * PERIODS[st.session_state.period]
-            st.markdown(f"#### Annual Equivalent\n**Total {st.session_state.calculator.state_name} Tax: ${annual_state:,.2f}**")
+        if not r['annual']:
+            annual_state = total_tax * PERIODS[r['period']]
+            st.markdown(f"#### Annual Equivalent\n**Total {calculator.state_name} Tax: ${annual_state:,.2f}**")
         else:
-            st.markdown(f"#### Annual Total\n**Total {st.session_state.calculator.state_name} Tax: ${total_tax:,.2f}**")
+            st.markdown(f"#### Annual Total\n**Total {calculator.state_name} Tax: ${total_tax:,.2f}**")
         
+        if result.credits:
+            st.caption("Credits (per year): " + ", ".join(f"{name.replace('_', ' ')} ${amount:,.2f}" for name, amount in result.credits.items()))
+
         if result.warnings:
             for warning in result.warnings: st.warning(f"⚠️ {warning}")
         if result.errors:
             for error in result.errors: st.error(f"❗ {error}")
 
-if st.sidebar.button("Calculate"): perform_calculation()
+def compute_comparison():
+    track_feature_usage('compare_states')
+    multi_two_jobs = st.session_state.multi and st.session_state.get('job_count') == "Two jobs total"
+    profile = PaycheckInput(
+        gross=Decimal(str(st.session_state.gross_val)), period=st.session_state.period, filing_status=st.session_state.filing,
+        annual=st.session_state.annual, multi=st.session_state.multi,
+        other_job_amount=Decimal(str(st.session_state.other_job_amount)) if multi_two_jobs else Decimal("0"),
+        dep_credit=Decimal(str(st.session_state.dep_credit)), other_income=st.session_state.oth,
+        deductions=st.session_state.ded, extra=st.session_state.extra,
+        state_kwargs={k: v for k, v in st.session_state.state_inputs.items() if k != 'filing_status'}
+    )
+    return compare_states(profile)
+
+def compare_all_states():
+    if 'gross_val' not in st.session_state or st.session_state.gross_val > 400_000:
+        st.error("who we lying to 👀")
+        return
+    try:
+        rows = memoized('compare', compute_comparison)
+    except ValueError as e:
+        st.error(f"❗ {e}")
+        return
+    per = "per year" if st.session_state.annual else "per pay period"
+    st.markdown(f"### State Comparison ({per})")
+    st.dataframe([{
+        "Rank": rank, "State": f"{row.name} ({row.state})", "State Tax": f"${row.state_tax:,.2f}",
+        "Local Tax": f"${row.local_tax:,.2f}", "State + Local": f"${row.total_tax:,.2f}", "Net Pay": f"${row.net_pay:,.2f}"
+    } for rank, row in enumerate(rows, 1)], hide_index=True)
+    st.caption("Net pay is after federal, FICA, state and local tax. The selected state's options apply wherever a state uses them.")
+
+def results_panel():
+    """Calculate / Compare and the results for the inputs as they stand."""
+    calc_col, compare_col = st.columns(2)
+    if calc_col.button("Calculate"): st.session_state.results_view = "calculate"
+    if compare_col.button("Compare All States"): st.session_state.results_view = "compare"
+    view = st.session_state.get("results_view")
+    if view == "calculate": perform_calculation()
+    elif view == "compare": compare_all_states()
+
+@st.fragment
+def paycheck_panel():
+    """
+    The W-4 steps and state options (written to the sidebar) together with the
+    results panel: changing any of those inputs, or clicking Calculate or
+    Compare, reruns only this block, and results already showing are
+    recomputed in the same run.
+    """
+    with st.sidebar:
+        w4_inputs()
+        state_options()
+    results_panel()
+
+paycheck_panel()
+
+@st.cache_resource
+def bulk_executor():
+    # Shared by all sessions; each job only coordinates, rows run in worker processes
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="bulk-upload")
+
+@st.cache_resource
+def bulk_pool():
+    # Spawned once per server and shared by every upload, so no job waits on process start-up
+    return start_pool(2)
+
+@st.fragment(run_every=1)
+def bulk_progress():
+    job = st.session_state.bulk_job
+    st.progress(job.fraction, text=f"Processed {job.rows_done:,} of {job.total:,} employees")
+    if job.done: st.rerun()
+
+with st.expander("📁 Bulk CSV Upload"):
+    st.markdown("""Upload an employee CSV with a `gross` column and any of `employee_id`, `period`, `filing_status`, `annual`,
+    `multi`, `other_job_amount`, `dep_credit`, `other_income`, `deductions`, `extra`, `state` and `state_<option>` columns.""")
+    uploaded = st.file_uploader("Employee CSV", type="csv", key="bulk_csv", max_upload_size=MAX_UPLOAD_MB)
+    if uploaded is not None and st.button("Run Batch"):
+        if st.session_state.get("bulk_job"): st.session_state.bulk_job.close()
+        st.session_state.bulk_job = None
+        try:
+            st.session_state.bulk_job = UploadJob.start(uploaded, bulk_executor(), bulk_pool())
+            track_feature_usage('bulk_upload')
+        except ValueError as e: st.error(f"❗ {e}")
+    job = st.session_state.get("bulk_job")
+    if job is not None and not job.done: bulk_progress()
+    elif job is not None and job.error: st.error(f"Batch failed: {job.error}")
+    elif job is not None:
+        st.success(f"Processed {job.rows_done:,} employees")
+        st.download_button("Download Results CSV", data=job.results_bytes, file_name="withholding_results.csv", mime="text/csv")
 
 with st.expander("💬 Have feedback or suggestions?"):
     name = st.text_input("Your name (optional)", placeholder="If you'd like to be credited…")
@@ -527,11 +502,3 @@ st.markdown(f"""<!-- Google Analytics 4 -->
   gtag('js', new Date());
   gtag('config', '{GA_TRACKING_ID}');
 </script>""", unsafe_allow_html=True)
-
-IRS_1040_BRACKETS = {
-    "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("11600"),"base":Decimal("1160"),"rate":Decimal("0.12")},{"min":Decimal("47150"),"base":Decimal("5426"),"rate":Decimal("0.22")},{"min":Decimal("100525"),"base":Decimal("17206"),"rate":Decimal("0.24")},{"min":Decimal("191950"),"base":Decimal("39146"),"rate":Decimal("0.32")},{"min":Decimal("243725"),"base":Decimal("55682"),"rate":Decimal("0.35")},{"min":Decimal("609350"),"base":Decimal("183647"),"rate":Decimal("0.37")}],
-    "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("23200"),"base":Decimal("2320"),"rate":Decimal("0.12")},{"min":Decimal("94300"),"base":Decimal("8620"),"rate":Decimal("0.22")},{"min":Decimal("201050"),"base":Decimal("29366"),"rate":Decimal("0.24")},{"min":Decimal("383900"),"base":Decimal("74766"),"rate":Decimal("0.32")},{"min":Decimal("487450"),"base":Decimal("105654"),"rate":Decimal("0.35")},{"min":Decimal("731200"),"base":Decimal("196669"),"rate":Decimal("0.37")}],
-    "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("16550"),"base":Decimal("1655"),"rate":Decimal("0.12")},{"min":Decimal("63100"),"base":Decimal("7206"),"rate":Decimal("0.22")},{"min":Decimal("100500"),"base":Decimal("15498"),"rate":Decimal("0.24")},{"min":Decimal("191950"),"base":Decimal("37236"),"rate":Decimal("0.32")},{"min":Decimal("243700"),"base":Decimal("53772"),"rate":Decimal("0.35")},{"min":Decimal("609350"),"base":Decimal("183074"),"rate":Decimal("0.37")}]
-}
-
-
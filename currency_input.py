@@ -0,0 +1,117 @@
+"""
+A dollar-amount text box that formats and validates in the browser.
+
+    gross = currency_input("Gross Amount per Paycheck ($)", 1000.0, key="paycheck_gross")
+
+Keystrokes never reach the server. The box only takes digits, commas and a
+decimal point, flags anything that is not an amount with at most two
+decimal places, and shows 1234.5 as 1,234.50 once it loses focus or Enter
+is pressed. Only then, and only when the amount changed, is the number
+sent back, so an edit costs one rerun instead of a text round trip plus a
+second rerun to write the reformatted text back into the box.
+
+The browser's checks are a convenience, not a guarantee: the server checks
+the number again and keeps the previous amount, with an error, for anything
+that is not finite, is negative or has more than two decimal places.
+"""
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+HTML = """<div class="currency">
+<label><span class="label"></span><input type="text" inputmode="decimal" autocomplete="off" spellcheck="false"></label>
+<small class="error"></small>
+</div>"""
+
+CSS = """
+.currency{font-family:var(--st-font,sans-serif);color:var(--st-text-color,#31333F);margin-bottom:0.5rem}
+.label{display:block;font-size:0.875rem;margin-bottom:0.25rem}
+input{box-sizing:border-box;width:100%;font:inherit;color:inherit;background:white;border:2px solid #E0E0E0;border-radius:8px;padding:0.5rem 0.75rem;outline:none;transition:all 0.3s ease}
+input:focus{border-color:#1E88E5;box-shadow:0 0 0 2px rgba(30,136,229,0.2)}
+.invalid input{border-color:#E53935}
+.error{color:#E53935;font-size:0.8rem}
+"""
+
+JS = """
+const AMOUNT = /^\\d*(\\.\\d{0,2})?$/;
+
+function parse(text) {
+    const clean = text.replace(/[,\\s]/g, "");
+    if (!AMOUNT.test(clean) || !/\\d/.test(clean)) return null;
+    return Math.round(parseFloat(clean) * 100) / 100;
+}
+
+const format = (value) => value.toLocaleString("en-US", {minimumFractionDigits: 2, maximumFractionDigits: 2});
+
+export default function({ data, parentElement, setStateValue }) {
+    const root = parentElement.querySelector(".currency");
+    const input = root.querySelector("input");
+    const error = root.querySelector(".error");
+    root.querySelector(".label").textContent = data.label;
+    root.title = data.help;
+    input.setAttribute("aria-label", data.label);
+
+    const check = () => {
+        const value = parse(input.value);
+        root.classList.toggle("invalid", value === null);
+        error.textContent = value === null ? "Enter an amount like 1,234.56" : "";
+        return value;
+    };
+    const commit = () => {
+        const value = check();
+        if (value === null) return;
+        input.value = format(value);
+        if (value !== root.sent) {
+            root.sent = value;
+            setStateValue("value", value);
+        }
+    };
+    input.oninput = () => {
+        const kept = input.value.replace(/[^\\d.,]/g, "");
+        if (kept !== input.value) input.value = kept;
+        check();
+    };
+    input.onblur = commit;
+    input.onkeydown = (event) => { if (event.key === "Enter") commit(); };
+
+    if (input.getRootNode().activeElement !== input) {
+        root.sent = data.value;
+        input.value = format(data.value);
+        check();
+    }
+}
+"""
+
+_component = st.components.v2.component("currency_input", html=HTML, css=CSS, js=JS)
+
+def _amount(value: Any) -> Optional[float]:
+    """value as a finite, non-negative amount with at most two decimal places, or None."""
+    if isinstance(value, bool):
+        return None
+    try:
+        amount = Decimal(str(value))
+        if amount.is_finite() and amount >= 0 and amount == amount.quantize(Decimal("0.01")):
+            return float(amount)
+    except (InvalidOperation, ValueError):
+        pass
+    return None
+
+def currency_input(label: str, value: float, key: str, help: Optional[str] = None,
+                   on_change: Optional[Callable[[], None]] = None) -> float:
+    """
+    Show the box in the current container and return its amount (value until
+    the user enters one). on_change runs, as a widget callback, whenever the
+    browser sends a new amount.
+    """
+    last = st.session_state.get(f"{key}_last", value)
+    current = _amount((st.session_state.get(key) or {}).get("value", last))
+    current = last if current is None else current
+    result = _component(key=key, data={"label": label, "help": help or "", "value": current},
+                        default={"value": value}, on_value_change=on_change or (lambda: None))
+    amount = _amount(result.get("value", current))
+    if amount is None:
+        st.error(f"{label}: {result.get('value')!r} is not an amount like 1,234.56; keeping {current:,.2f}")
+        amount = current
+    st.session_state[f"{key}_last"] = amount
+    return amount
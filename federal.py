@@ -0,0 +1,126 @@
+"""Federal withholding math (IRS Pub 15-T percentage method) and FICA.
+
+Kept free of Streamlit so the same calculations can run in app.py, batch
+jobs and worker processes.
+"""
+from decimal import Decimal, DefaultContext, getcontext, ROUND_HALF_UP
+
+# New threads (Streamlit sessions, thread pools) copy DefaultContext, not this thread's context
+for context in (DefaultContext, getcontext()):
+    context.prec = 28
+    context.rounding = ROUND_HALF_UP
+
+STANDARD_DEDUCTION = {"single": Decimal("14600"), "married": Decimal("29200"), "head": Decimal("21900")}
+FICA_CAP = Decimal("168600")
+SOCIAL_RATE = Decimal("0.062")
+MEDICARE_RATE = Decimal("0.0145")
+PERIODS = {"weekly": Decimal("52"), "biweekly": Decimal("26"), "semimonthly": Decimal("24"), "monthly": Decimal("12")}
+
+PERCENTAGE_METHOD_TABLES = {
+    "weekly": {
+        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("76"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("291"),"base":Decimal("21.50"),"rate":Decimal("0.12")},{"min":Decimal("933"),"base":Decimal("104.26"),"rate":Decimal("0.22")},{"min":Decimal("1822"),"base":Decimal("326.26"),"rate":Decimal("0.24")},{"min":Decimal("3692"),"base":Decimal("788.50"),"rate":Decimal("0.32")},{"min":Decimal("4600"),"base":Decimal("1086.90"),"rate":Decimal("0.35")},{"min":Decimal("11950"),"base":Decimal("3700.27"),"rate":Decimal("0.37")}],
+        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("230"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("711"),"base":Decimal("48.10"),"rate":Decimal("0.12")},{"min":Decimal("1691"),"base":Decimal("165.98"),"rate":Decimal("0.22")},{"min":Decimal("3185"),"base":Decimal("488.38"),"rate":Decimal("0.24")},{"min":Decimal("5159"),"base":Decimal("955.10"),"rate":Decimal("0.32")},{"min":Decimal("6479"),"base":Decimal("1356.54"),"rate":Decimal("0.35")},{"min":Decimal("16942"),"base":Decimal("4627.58"),"rate":Decimal("0.37")}],
+        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("145"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("457"),"base":Decimal("31.20"),"rate":Decimal("0.12")},{"min":Decimal("1034"),"base":Decimal("102.54"),"rate":Decimal("0.22")},{"min":Decimal("1611"),"base":Decimal("228.58"),"rate":Decimal("0.24")},{"min":Decimal("3117"),"base":Decimal("604.90"),"rate":Decimal("0.32")},{"min":Decimal("3933"),"base":Decimal("865.62"),"rate":Decimal("0.35")},{"min":Decimal("10225"),"base":Decimal("2950.56"),"rate":Decimal("0.37")}]
+    },
+    "biweekly": {
+        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("153"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("583"),"base":Decimal("43"),"rate":Decimal("0.12")},{"min":Decimal("1866"),"base":Decimal("208.52"),"rate":Decimal("0.22")},{"min":Decimal("3644"),"base":Decimal("652.52"),"rate":Decimal("0.24")},{"min":Decimal("7385"),"base":Decimal("1577.00"),"rate":Decimal("0.32")},{"min":Decimal("9200"),"base":Decimal("2173.80"),"rate":Decimal("0.35")},{"min":Decimal("23900"),"base":Decimal("7400.70"),"rate":Decimal("0.37")}],
+        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("460"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1423"),"base":Decimal("96.10"),"rate":Decimal("0.12")},{"min":Decimal("3382"),"base":Decimal("331.96"),"rate":Decimal("0.22")},{"min":Decimal("6370"),"base":Decimal("976.76"),"rate":Decimal("0.24")},{"min":Decimal("10318"),"base":Decimal("1910.20"),"rate":Decimal("0.32")},{"min":Decimal("12958"),"base":Decimal("2714.14"),"rate":Decimal("0.35")},{"min":Decimal("33884"),"base":Decimal("9255.38"),"rate":Decimal("0.37")}],
+        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("289"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("913"),"base":Decimal("62.50"),"rate":Decimal("0.12")},{"min":Decimal("2067"),"base":Decimal("205.20"),"rate":Decimal("0.22")},{"min":Decimal("3222"),"base":Decimal("457.16"),"rate":Decimal("0.24")},{"min":Decimal("6234"),"base":Decimal("1209.40"),"rate":Decimal("0.32")},{"min":Decimal("7866"),"base":Decimal("1731.24"),"rate":Decimal("0.35")},{"min":Decimal("20450"),"base":Decimal("5901.12"),"rate":Decimal("0.37")}]
+    },
+    "semimonthly": {
+        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("166"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("632"),"base":Decimal("46.60"),"rate":Decimal("0.12")},{"min":Decimal("2022"),"base":Decimal("224.72"),"rate":Decimal("0.22")},{"min":Decimal("3953"),"base":Decimal("703.20"),"rate":Decimal("0.24")},{"min":Decimal("8015"),"base":Decimal("1697.84"),"rate":Decimal("0.32")},{"min":Decimal("9983"),"base":Decimal("2338.72"),"rate":Decimal("0.35")},{"min":Decimal("25900"),"base":Decimal("7963.20"),"rate":Decimal("0.37")}],
+        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("500"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1543"),"base":Decimal("104.20"),"rate":Decimal("0.12")},{"min":Decimal("3662"),"base":Decimal("359.28"),"rate":Decimal("0.22")},{"min":Decimal("6890"),"base":Decimal("1056.88"),"rate":Decimal("0.24")},{"min":Decimal("11100"),"base":Decimal("2066.40"),"rate":Decimal("0.32")},{"min":Decimal("13908"),"base":Decimal("2935.36"),"rate":Decimal("0.35")},{"min":Decimal("36358"),"base":Decimal("10005.84"),"rate":Decimal("0.37")}],
+        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("314"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("995"),"base":Decimal("68.60"),"rate":Decimal("0.12")},{"min":Decimal("2248"),"base":Decimal("225.60"),"rate":Decimal("0.22")},{"min":Decimal("3500"),"base":Decimal("502.48"),"rate":Decimal("0.24")},{"min":Decimal("6781"),"base":Decimal("1329.20"),"rate":Decimal("0.32")},{"min":Decimal("8550"),"base":Decimal("1900.36"),"rate":Decimal("0.35")},{"min":Decimal("22215"),"base":Decimal("6472.84"),"rate":Decimal("0.37")}]
+    },
+    "monthly": {
+        "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("333"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1250"),"base":Decimal("90.40"),"rate":Decimal("0.12")},{"min":Decimal("4043"),"base":Decimal("450.48"),"rate":Decimal("0.22")},{"min":Decimal("7900"),"base":Decimal("1405.44"),"rate":Decimal("0.24")},{"min":Decimal("16031"),"base":Decimal("3395.68"),"rate":Decimal("0.32")},{"min":Decimal("19967"),"base":Decimal("4677.84"),"rate":Decimal("0.35")},{"min":Decimal("51800"),"base":Decimal("15921.84"),"rate":Decimal("0.37")}],
+        "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("1000"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("3087"),"base":Decimal("208.40"),"rate":Decimal("0.12")},{"min":Decimal("7325"),"base":Decimal("718.56"),"rate":Decimal("0.22")},{"min":Decimal("13781"),"base":Decimal("2113.76"),"rate":Decimal("0.24")},{"min":Decimal("22200"),"base":Decimal("4132.80"),"rate":Decimal("0.32")},{"min":Decimal("27817"),"base":Decimal("5870.72"),"rate":Decimal("0.35")},{"min":Decimal("72717"),"base":Decimal("19650.72"),"rate":Decimal("0.37")}],
+        "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("628"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("2000"),"base":Decimal("138.20"),"rate":Decimal("0.12")},{"min":Decimal("4525"),"base":Decimal("451.40"),"rate":Decimal("0.22")},{"min":Decimal("7034"),"base":Decimal("1004.96"),"rate":Decimal("0.24")},{"min":Decimal("13562"),"base":Decimal("2658.40"),"rate":Decimal("0.32")},{"min":Decimal("17098"),"base":Decimal("3800.72"),"rate":Decimal("0.35")},{"min":Decimal("44433"),"base":Decimal("12945.68"),"rate":Decimal("0.37")}]
+    }
+}
+
+MULTIPLE_JOBS_RANGES = {
+    "single": [
+        {"range": (0, 14200), "adjustment": Decimal("0")},
+        {"range": (14200, 34000), "adjustment": Decimal("1020")},
+        {"range": (34000, 100000), "adjustment": Decimal("2040")},
+        {"range": (100000, 200000), "adjustment": Decimal("3060")},
+        {"range": (200000, float('inf')), "adjustment": Decimal("4080")}
+    ],
+    "married": [
+        {"range": (0, 17000), "adjustment": Decimal("0")},
+        {"range": (17000, 45000), "adjustment": Decimal("2040")},
+        {"range": (45000, 120000), "adjustment": Decimal("4080")},
+        {"range": (120000, 240000), "adjustment": Decimal("6120")},
+        {"range": (240000, float('inf')), "adjustment": Decimal("8160")}
+    ],
+    "head": [
+        {"range": (0, 14200), "adjustment": Decimal("0")},
+        {"range": (14200, 34000), "adjustment": Decimal("1020")},
+        {"range": (34000, 100000), "adjustment": Decimal("2040")},
+        {"range": (100000, 200000), "adjustment": Decimal("3060")},
+        {"range": (200000, float('inf')), "adjustment": Decimal("4080")}
+    ]
+}
+
+def get_multiple_jobs_adjustment(annual_income: Decimal, filing_status: str) -> Decimal:
+    for bracket in MULTIPLE_JOBS_RANGES[filing_status]:
+        if bracket["range"][0] <= float(annual_income) < bracket["range"][1]: return bracket["adjustment"]
+    return Decimal("0")
+
+IRS_1040_BRACKETS = {
+    "single": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("11600"),"base":Decimal("1160"),"rate":Decimal("0.12")},{"min":Decimal("47150"),"base":Decimal("5426"),"rate":Decimal("0.22")},{"min":Decimal("100525"),"base":Decimal("17206"),"rate":Decimal("0.24")},{"min":Decimal("191950"),"base":Decimal("39146"),"rate":Decimal("0.32")},{"min":Decimal("243725"),"base":Decimal("55682"),"rate":Decimal("0.35")},{"min":Decimal("609350"),"base":Decimal("183647"),"rate":Decimal("0.37")}],
+    "married": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("23200"),"base":Decimal("2320"),"rate":Decimal("0.12")},{"min":Decimal("94300"),"base":Decimal("8620"),"rate":Decimal("0.22")},{"min":Decimal("201050"),"base":Decimal("29366"),"rate":Decimal("0.24")},{"min":Decimal("383900"),"base":Decimal("74766"),"rate":Decimal("0.32")},{"min":Decimal("487450"),"base":Decimal("105654"),"rate":Decimal("0.35")},{"min":Decimal("731200"),"base":Decimal("196669"),"rate":Decimal("0.37")}],
+    "head": [{"min":Decimal("0"),"base":Decimal("0"),"rate":Decimal("0.10")},{"min":Decimal("16550"),"base":Decimal("1655"),"rate":Decimal("0.12")},{"min":Decimal("63100"),"base":Decimal("7206"),"rate":Decimal("0.22")},{"min":Decimal("100500"),"base":Decimal("15498"),"rate":Decimal("0.24")},{"min":Decimal("191950"),"base":Decimal("37236"),"rate":Decimal("0.32")},{"min":Decimal("243700"),"base":Decimal("53772"),"rate":Decimal("0.35")},{"min":Decimal("609350"),"base":Decimal("183074"),"rate":Decimal("0.37")}]
+}
+
+def round_to_penny(amount: Decimal) -> Decimal:
+    return amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+def find_bracket(table, status, amt):
+    if amt < Decimal("0"): raise ValueError("Taxable amount cannot be negative")
+    for row in reversed(table[status]):
+        if amt >= row["min"]: return row
+    return table[status][0]
+
+def calculate_periodic_pct_tax(status, taxable, period):
+    if taxable < Decimal("0"): raise ValueError("Taxable amount cannot be negative")
+    taxable = round_to_penny(taxable)
+    row = find_bracket(PERCENTAGE_METHOD_TABLES[period], status, taxable)
+    excess = round_to_penny(taxable - row["min"])
+    tax = row["base"] + (excess * row["rate"])
+    return round_to_penny(tax)
+
+def calculate_annual_pct_tax(status, taxable):
+    if taxable < Decimal("0"): raise ValueError("Taxable amount cannot be negative")
+    row = find_bracket(IRS_1040_BRACKETS, status, taxable)
+    tax = row["base"] + (taxable - row["min"]) * row["rate"]
+    return round_to_penny(tax)
+
+def calculate_fed(gross: Decimal, status: str, multi: bool, dep_credit: Decimal, oth: Decimal, ded: Decimal, extra: Decimal, period: str, annual: bool, other_job_amount: Decimal = Decimal("0")) -> Decimal:
+    if any(x < Decimal("0") for x in [gross, dep_credit, oth, ded, extra]): raise ValueError("Negative values not allowed")
+    p = PERIODS[period]
+    if not annual:
+        base, other_periodic, ded_periodic, annual_gross = gross, oth/p, ded/p, gross*p
+    else:
+        base, other_periodic, ded_periodic, annual_gross = gross/p, oth/p, ded/p, gross
+    if multi:
+        adjustment = get_multiple_jobs_adjustment(max(annual_gross, other_job_amount), status) if other_job_amount > Decimal("0") else get_multiple_jobs_adjustment(annual_gross, status)
+        base += adjustment / p
+    standard_ded_periodic = STANDARD_DEDUCTION[status] / p
+    taxable = max(base + other_periodic - standard_ded_periodic - ded_periodic, Decimal("0"))
+    fed = calculate_periodic_pct_tax(status, taxable, period)
+    fed = max(fed - dep_credit/p, Decimal("0")) + extra
+    return round_to_penny(fed * p if annual else fed)
+
+def calculate_ss(gross: Decimal, period: str, annual: bool) -> Decimal:
+    p = PERIODS[period]
+    base = gross if annual else gross * p
+    ss_ann = min(base, FICA_CAP) * SOCIAL_RATE
+    return (ss_ann if annual else ss_ann / p).quantize(Decimal("0.01"), ROUND_HALF_UP)
+
+def calculate_mi(gross: Decimal, period: str, annual: bool) -> Decimal:
+    p = PERIODS[period]
+    base = gross if annual else gross * p
+    mi_ann = base * MEDICARE_RATE
+    return (mi_ann if annual else mi_ann / p).quantize(Decimal("0.01"), ROUND_HALF_UP)
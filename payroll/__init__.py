@@ -0,0 +1,3 @@
+"""Headless payroll engine: the app.py calculations without Streamlit."""
+from .paycheck import PaycheckInput, PaycheckResult, calculate_paycheck
+from .batch import run_batch
@@ -0,0 +1,85 @@
+"""Command-line batch runner: ``python -m payroll employees.csv -o results.csv --jobs 4``."""
+import argparse
+import csv
+import os
+import sys
+
+from .batch import ExactEngine, iter_chunks, write_results
+
+# Kept here rather than imported from payroll.columnar so CSV runs never need pyarrow
+COLUMNAR_SUFFIXES = (".parquet", ".pq", ".arrow", ".feather", ".ipc")
+
+def _engine(name: str, jobs: int, tables: str = None):
+    if name == "vectorized":
+        from .sharded import VectorizedEngine
+        from .tabledata import load_data
+        return VectorizedEngine(jobs, data=load_data(tables) if tables else None)
+    return ExactEngine(jobs)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll", description="Calculate withholding for every row of an employee CSV.")
+    parser.add_argument("input", help="employee CSV, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="results CSV, or - for stdout (default)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes (default 1; 0 means one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per chunk (default 1000 exact, 10000 vectorized)")
+    parser.add_argument("--engine", choices=["exact", "vectorized"], default=None,
+                        help="exact: Decimal math row by row (default for CSV); vectorized: NumPy over chunks with tax "
+                             "tables shared between workers (default, and required, for Parquet/Arrow)")
+    parser.add_argument("--checkpoint", metavar="PATH", help="record progress after every chunk and resume from PATH if it exists")
+    parser.add_argument("--max-memory", type=int, metavar="MB", help="memory ceiling for the run; chunks shrink to stay under it")
+    parser.add_argument("--progress", action="store_true", help="report rows done and throughput after every chunk")
+    parser.add_argument("--totals", metavar="PATH", help="also write quarterly/annual totals per state to PATH")
+    parser.add_argument("--tables", metavar="PATH", help="tax table data file to use instead of the built-in tables (vectorized only)")
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    columnar = args.input.lower().endswith(COLUMNAR_SUFFIXES) or args.output.lower().endswith(COLUMNAR_SUFFIXES)
+    if columnar and args.engine == "exact":
+        parser.error("Parquet/Arrow files are only supported by the vectorized engine")
+    engine_name = args.engine or ("vectorized" if columnar or args.tables else "exact")
+    if args.tables and engine_name != "vectorized":
+        parser.error("--tables needs the vectorized engine; the exact engine uses the built-in tables")
+    engine = _engine(engine_name, jobs, args.tables)
+    chunk_size = args.chunk_size or (10000 if engine_name == "vectorized" else 1000)
+    totals = None
+
+    if columnar:
+        if args.checkpoint or args.max_memory or "-" in (args.input, args.output):
+            parser.error("Parquet/Arrow runs need file paths and do not support --checkpoint or --max-memory")
+        if args.totals:
+            parser.error("--totals is only supported for CSV runs")
+        from .columnar import run_columnar
+        count = run_columnar(args.input, args.output, engine, batch_size=args.chunk_size or 65536)
+    elif args.checkpoint or args.max_memory or args.progress:
+        if "-" in (args.input, args.output):
+            parser.error("--checkpoint, --max-memory and --progress need file paths for input and output")
+        from .resumable import CheckpointMismatch, print_progress, run_resumable
+        try:
+            count = run_resumable(args.input, args.output, engine, checkpoint_path=args.checkpoint, chunk_size=chunk_size,
+                                  max_memory=args.max_memory * 2**20 if args.max_memory else None,
+                                  progress=print_progress if args.progress else None)
+        except CheckpointMismatch as e:
+            parser.error(str(e))
+        if args.totals:
+            # A resumed run only sees part of the input, so total the finished files instead
+            from .totals import aggregate_files
+            totals = aggregate_files(args.input, args.output)
+    else:
+        if args.totals:
+            from .totals import Totals
+            totals = Totals()
+        src = sys.stdin if args.input == "-" else open(args.input, newline="")
+        dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+        try:
+            count = write_results(engine, iter_chunks(csv.DictReader(src), chunk_size), dst, totals=totals)
+        finally:
+            if src is not sys.stdin: src.close()
+            if dst is not sys.stdout: dst.close()
+    if args.totals:
+        with open(args.totals, "w", newline="") as f:
+            totals.write(f)
+    print(f"Processed {count} rows", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
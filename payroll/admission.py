@@ -0,0 +1,108 @@
+"""
+Admission control for payroll.service.
+
+Every request is admitted or rejected before any of its rows are queued,
+so an overloaded service answers in microseconds instead of letting work
+pile up:
+
+* the queue is bounded in rows (pending plus in-flight); a request that
+  would overflow it is shed with 503 and a Retry-After hint;
+* each client (X-Client-Id header, else the peer address) has a token
+  bucket refilled at ``rate`` rows per second up to ``burst``; a client
+  over its rate gets 429 while everyone else is unaffected. A request
+  larger than the queue or than ``burst`` could never be admitted and is
+  rejected with 413 instead.
+
+Counters for both decisions, the current and peak queue depth and the
+batch sizes are exported by ``AdmissionController.stats`` (GET /stats).
+"""
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Optional
+
+MAX_TRACKED_CLIENTS = 10000
+
+class Overloaded(Exception):
+    """A request was shed; ``status`` and ``retry_after`` go back to the client."""
+
+    def __init__(self, message: str, reason: str, status: int, retry_after: float):
+        super().__init__(message)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, n: float, now: float) -> float:
+        """Take n tokens; returns 0 on success or the seconds until n are available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if n <= self.tokens:
+            self.tokens -= n
+            return 0.0
+        return (n - self.tokens) / self.rate
+
+class AdmissionController:
+    """Bounded row queue plus optional per-client token buckets."""
+
+    def __init__(self, max_queue: int = 50000, rate: Optional[float] = None, burst: Optional[float] = None,
+                 clock=time.monotonic):
+        self.max_queue = max_queue
+        self.rate = rate
+        self.burst = burst or (2 * rate if rate else None)
+        self.clock = clock
+        self.depth = 0
+        self.peak_depth = 0
+        self.accepted_requests = 0
+        self.accepted_rows = 0
+        self.shed = Counter()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _bucket(self, client: str, now: float) -> TokenBucket:
+        bucket = self._buckets.pop(client, None) or TokenBucket(self.rate, self.burst, now)
+        self._buckets[client] = bucket  # most recently used last
+        if len(self._buckets) > MAX_TRACKED_CLIENTS:
+            self._buckets.popitem(last=False)
+        return bucket
+
+    def admit(self, client: str, rows: int) -> None:
+        """Reserve queue space for rows or raise Overloaded; pair with release(rows)."""
+        if rows > self.max_queue:
+            self.shed["too_large"] += 1
+            raise Overloaded(f"Batch of {rows} rows exceeds the queue size of {self.max_queue}", "too_large", 413, 0)
+        if self.rate and rows > self.burst:
+            # The bucket never holds more than burst tokens, so waiting would not help
+            self.shed["too_large"] += 1
+            raise Overloaded(f"Batch of {rows} rows exceeds the rate limit burst of {self.burst:g}", "too_large", 413, 0)
+        if self.depth + rows > self.max_queue:
+            self.shed["queue_full"] += 1
+            raise Overloaded("Service is at capacity", "queue_full", 503, 1)
+        if self.rate:
+            wait = self._bucket(client, self.clock()).take(rows, self.clock())
+            if wait:
+                self.shed["rate_limited"] += 1
+                raise Overloaded(f"Rate limit of {self.rate:g} rows/s exceeded", "rate_limited", 429, wait)
+        self.depth += rows
+        self.peak_depth = max(self.peak_depth, self.depth)
+        self.accepted_requests += 1
+        self.accepted_rows += rows
+
+    def release(self, rows: int) -> None:
+        self.depth -= rows
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.depth,
+            "queue_peak": self.peak_depth,
+            "queue_limit": self.max_queue,
+            "accepted_requests": self.accepted_requests,
+            "accepted_rows": self.accepted_rows,
+            "shed": dict(self.shed),
+            "rate_limit": self.rate,
+            "clients_tracked": len(self._buckets),
+        }
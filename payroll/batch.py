@@ -0,0 +1,210 @@
+"""
+Streaming CSV batch runs.
+
+Input columns (header names; only ``gross`` is required):
+
+    employee_id       passed through to the output unchanged
+    gross             gross pay per period, or per year when ``annual`` is true
+    period            weekly | biweekly | semimonthly | monthly (default biweekly)
+    filing_status     single | married | head (default single)
+    annual            true/false
+    multi             Step 2 checkbox
+    other_job_amount  Step 2 annual salary of the other job
+    dep_credit        Step 3 total dependent credits
+    other_income      Step 4(a)
+    deductions        Step 4(b)
+    extra             Step 4(c)
+    state             state code such as NY; blank for no state tax
+    state_<name>      passed to the state calculator as keyword <name>,
+                      e.g. state_is_nyc_resident, state_school_district_rate
+    zip               home ZIP code; fills in blank state_<name> columns from
+                      the local jurisdiction there (payroll.localities)
+    pay_date          YYYY-MM-DD; only used to group totals (payroll.totals)
+
+Rows are read, calculated and written one chunk at a time, so memory use
+depends on the chunk size and job count, not on the file size.
+"""
+import csv
+import json
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .paycheck import PaycheckInput, calculate_paycheck
+
+INPUT_COLUMNS = [
+    "employee_id", "gross", "period", "filing_status", "annual", "multi",
+    "other_job_amount", "dep_credit", "other_income", "deductions", "extra", "state"
+]
+
+OUTPUT_COLUMNS = [
+    "employee_id", "federal", "social_security", "medicare",
+    "state_tax", "local_tax", "local_taxes", "net_pay", "error"
+]
+
+STATE_KWARG_PREFIX = "state_"
+TRUE_VALUES = {"true", "yes", "y", "1", "x"}
+FALSE_VALUES = {"false", "no", "n", "0", ""}
+
+# Largest amount either engine accepts; the vectorized engine's float64 still holds every cent of it
+MAX_AMOUNT = Decimal("1000000000000")
+
+def parse_money(value: str, name: str = "amount") -> Decimal:
+    text = (value or "").replace(",", "").replace("$", "").strip()
+    try:
+        amount = Decimal(text) if text else Decimal("0")
+    except InvalidOperation:
+        raise ValueError(f"{name}: not an amount: {value!r}") from None
+    if not amount.is_finite() or abs(amount) > MAX_AMOUNT:
+        raise ValueError(f"{name}: not an amount: {value!r}")
+    return amount
+
+def parse_flag(value: str) -> bool:
+    value = (value or "").strip().lower()
+    if value in TRUE_VALUES: return True
+    if value in FALSE_VALUES: return False
+    raise ValueError(f"Not a true/false value: {value!r}")
+
+def _state_value(value: str) -> Any:
+    """Best-effort typing for free-form state_<name> columns."""
+    lowered = value.strip().lower()
+    if lowered in ("true", "false", "yes", "no"):
+        return lowered in ("true", "yes")
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return value
+
+def parse_row(row: Dict[str, str]) -> PaycheckInput:
+    """Turn one CSV row into a PaycheckInput."""
+    state_kwargs = {
+        key[len(STATE_KWARG_PREFIX):]: _state_value(value)
+        for key, value in row.items()
+        if key and key.startswith(STATE_KWARG_PREFIX) and value not in (None, "")
+    }
+    state = (row.get("state") or "").strip().upper() or None
+    if state and (row.get("zip") or "").strip():
+        # Imported here so runs without ZIP codes never open the index
+        from .localities import default_index
+        jurisdiction = default_index().lookup(row["zip"], state)
+        if jurisdiction is not None:
+            for name, value in jurisdiction.inputs.items():
+                state_kwargs.setdefault(name, _state_value(value))
+    return PaycheckInput(
+        gross=parse_money(row["gross"], "gross"),
+        period=(row.get("period") or "biweekly").strip().lower(),
+        filing_status=(row.get("filing_status") or "single").strip().lower(),
+        annual=parse_flag(row.get("annual")),
+        multi=parse_flag(row.get("multi")),
+        other_job_amount=parse_money(row.get("other_job_amount"), "other_job_amount"),
+        dep_credit=parse_money(row.get("dep_credit"), "dep_credit"),
+        other_income=parse_money(row.get("other_income"), "other_income"),
+        deductions=parse_money(row.get("deductions"), "deductions"),
+        extra=parse_money(row.get("extra"), "extra"),
+        state=state,
+        state_kwargs=state_kwargs
+    )
+
+def process_row(row: Dict[str, str]) -> Dict[str, str]:
+    """Calculate one row; bad rows get an ``error`` instead of aborting the run."""
+    out = {"employee_id": row.get("employee_id", "")}
+    try:
+        result = calculate_paycheck(parse_row(row))
+    except Exception as e:
+        out["error"] = f"{type(e).__name__}: {e}"
+        return out
+    out.update({
+        "federal": f"{result.federal:.2f}",
+        "social_security": f"{result.social_security:.2f}",
+        "medicare": f"{result.medicare:.2f}",
+        "state_tax": f"{result.state_tax:.2f}",
+        "local_tax": f"{result.local_total:.2f}",
+        "local_taxes": json.dumps({k: f"{v:.2f}" for k, v in result.local_taxes.items()}) if result.local_taxes else "",
+        "net_pay": f"{result.net_pay:.2f}",
+    })
+    return out
+
+def process_chunk(rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [process_row(row) for row in rows]
+
+def iter_chunks(rows: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk: return
+        yield chunk
+
+def _bounded(pool: Executor, fn: Callable, tagged: Iterable[Tuple[Any, Any]], jobs: int) -> Iterator[Tuple[Any, Any]]:
+    pending = deque()
+    for tag, payload in tagged:
+        pending.append((tag, pool.submit(fn, payload)))
+        if len(pending) >= 2 * jobs:
+            tag, future = pending.popleft()
+            yield tag, future.result()
+    while pending:
+        tag, future = pending.popleft()
+        yield tag, future.result()
+
+def map_ordered(fn: Callable, tagged: Iterable[Tuple[Any, Any]], jobs: int, initializer: Callable = None, initargs: tuple = (),
+                mp_context=None, pool: Optional[Executor] = None) -> Iterator[Tuple[Any, Any]]:
+    """
+    Yield (tag, fn(payload)) for each (tag, payload), in input order.
+
+    With jobs > 1 payloads go to a process pool, but at most 2 * jobs are in
+    flight at once so a slow writer never lets the input run ahead. Tags stay
+    in this process, so they can carry bookkeeping such as input offsets.
+    mp_context is passed to the pool (e.g. a "spawn" context from threaded servers).
+    Given a pool, it is used (and left running) instead of starting one.
+    """
+    if pool is not None:
+        yield from _bounded(pool, fn, tagged, max(jobs, 1))
+        return
+    if jobs <= 1:
+        for tag, payload in tagged: yield tag, fn(payload)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs, mp_context=mp_context) as pool:
+        yield from _bounded(pool, fn, tagged, jobs)
+
+class ExactEngine:
+    """Decimal math row by row (calculate_paycheck), optionally across processes (or on a shared pool)."""
+
+    def __init__(self, jobs: int = 1, mp_context=None, pool: Optional[Executor] = None):
+        self.jobs = jobs
+        self.mp_context = mp_context
+        self.pool = pool
+
+    def __enter__(self) -> "ExactEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def map(self, tagged: Iterable[Tuple[Any, List[Dict[str, str]]]]) -> Iterator[Tuple[Any, List[Dict[str, str]]]]:
+        return map_ordered(process_chunk, tagged, self.jobs, mp_context=self.mp_context, pool=self.pool)
+
+def write_results(engine, chunks: Iterable[List[Dict[str, str]]], dst: TextIO, totals=None) -> int:
+    """
+    Run chunks through an engine and stream the results to dst as CSV.
+
+    With a payroll.totals.Totals, every chunk is also folded into it.
+    """
+    writer = csv.DictWriter(dst, fieldnames=OUTPUT_COLUMNS)
+    writer.writeheader()
+    count = 0
+    with engine:
+        for chunk, results in engine.map((chunk, chunk) for chunk in chunks):
+            writer.writerows(results)
+            if totals is not None:
+                totals.add_chunk(chunk, results)
+            count += len(results)
+    return count
+
+def run_batch(src: TextIO, dst: TextIO, chunk_size: int = 1000, jobs: int = 1) -> int:
+    """Stream employee rows from src to results in dst; returns the row count."""
+    return write_results(ExactEngine(jobs), iter_chunks(csv.DictReader(src), chunk_size), dst)
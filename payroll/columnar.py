@@ -0,0 +1,250 @@
+"""
+Arrow / Parquet input and output for the vectorized engine.
+
+Record batches are turned into the engine's NumPy columns with Arrow
+compute kernels (casts, trims, set lookups) and results are written back
+as Arrow arrays built straight from the NumPy buffers, so no cell ever
+becomes a Python Decimal or str. Money columns come out as
+decimal128(18, 2). Parquet inputs are memory-mapped and read one row group
+batch at a time; Arrow IPC files (.arrow, .feather) are memory-mapped and
+sliced without copying.
+
+Input columns and their meaning are the same as for CSV (payroll.batch).
+"""
+import os
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from .batch import MAX_AMOUNT
+from .compiled import FED_STATUSES, PERIOD_CODES, CompiledTables
+from .localities import default_index
+from .vectorized import (DATE_INPUTS, LOCAL_TAX_NAMES, STATE_KWARG_DEFAULTS, check_amounts, check_columns, compute_columns,
+                         date_column, money_column)
+
+MONEY = pa.decimal128(18, 2)
+MONEY_COLUMNS = ("federal", "social_security", "medicare", "state_tax", "local_tax", "net_pay")
+
+RESULT_SCHEMA = pa.schema(
+    [("employee_id", pa.string())]
+    + [(name, MONEY) for name in MONEY_COLUMNS]
+    + [(f"local_{name}", MONEY) for name in LOCAL_TAX_NAMES]
+    + [("error", pa.string())]
+)
+
+_TRUE_VALUES = pa.array(["true", "yes", "y", "1", "x"])
+_FLAG_VALUES = pa.array(["true", "yes", "y", "1", "x", "false", "no", "n", "0", ""])
+
+def read_batches(path: str, batch_size: int = 65536) -> Iterator[pa.RecordBatch]:
+    """Stream record batches from Parquet, Arrow IPC or CSV."""
+    lower = path.lower()
+    if lower.endswith((".parquet", ".pq")):
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size)
+    elif lower.endswith((".arrow", ".feather", ".ipc")):
+        reader = ipc.open_file(pa.memory_map(path, "r"))
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            for start in range(0, batch.num_rows, batch_size):
+                yield batch.slice(start, batch_size)
+    else:
+        # Read every column as text so CSV behaves exactly like payroll.batch
+        names = pacsv.open_csv(path).schema.names
+        convert = pacsv.ConvertOptions(column_types={name: pa.string() for name in names})
+        read = pacsv.ReadOptions(block_size=1 << 22)
+        yield from pacsv.open_csv(path, read_options=read, convert_options=convert)
+
+def _text(arr: pa.Array) -> pa.Array:
+    return pc.utf8_lower(pc.utf8_trim_whitespace(arr))
+
+def _money(batch: pa.RecordBatch, name: str, errors: np.ndarray, default: float = 0.0) -> np.ndarray:
+    if name not in batch.schema.names:
+        return np.full(batch.num_rows, default)
+    arr = batch.column(name)
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        cleaned = pc.replace_substring_regex(arr, r"[,$\s]", "")
+        cleaned = pc.if_else(pc.equal(cleaned, ""), pa.scalar(None, pa.string()), cleaned)
+        try:
+            values = pc.cast(cleaned, pa.float64())
+        except pa.ArrowInvalid:
+            # Some cell is not a number; parse this column cell by cell to find it
+            rows = [{name: v} for v in arr.to_pylist()]
+            return money_column(rows, name, errors, default)
+    else:
+        values = pc.cast(arr, pa.float64())
+    given = pc.is_valid(values).to_numpy(zero_copy_only=False)
+    out = pc.fill_null(values, default).to_numpy(zero_copy_only=False).copy()
+    if given.any() and not (np.abs(out[given]) <= float(MAX_AMOUNT)).all():
+        return check_amounts(out, given, arr.to_pylist(), name, errors, default)
+    return out
+
+def _date(batch: pa.RecordBatch, name: str, errors: np.ndarray) -> np.ndarray:
+    """Days since 1970-01-01 from a date, timestamp or YYYY-MM-DD column; nan where null or blank."""
+    if name not in batch.schema.names:
+        return np.full(batch.num_rows, np.nan)
+    arr = batch.column(name)
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        text = pc.utf8_slice_codeunits(pc.utf8_trim_whitespace(arr), 0, 10)
+        text = pc.if_else(pc.equal(text, ""), pa.scalar(None, pa.string()), text)
+        try:
+            arr = pc.cast(text, pa.date32())
+        except pa.ArrowInvalid:
+            return date_column([{name: v} for v in arr.to_pylist()], name, errors)
+    elif not pa.types.is_date32(arr.type):
+        arr = pc.cast(arr, pa.date32(), safe=False)
+    days = pc.cast(pc.cast(arr, pa.int32()), pa.float64())
+    return pc.fill_null(days, np.nan).to_numpy(zero_copy_only=False)
+
+def _flag(batch: pa.RecordBatch, name: str, errors: Optional[np.ndarray] = None) -> np.ndarray:
+    """Like payroll.vectorized's flag parsing: given errors, text that is not true/false is rejected."""
+    if name not in batch.schema.names:
+        return np.zeros(batch.num_rows, dtype=bool)
+    arr = batch.column(name)
+    if pa.types.is_boolean(arr.type):
+        flags = arr
+    elif pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        text = _text(arr)
+        flags = pc.is_in(text, value_set=_TRUE_VALUES)
+        if errors is not None:
+            unknown = pc.invert(pc.fill_null(pc.is_in(text, value_set=_FLAG_VALUES), True)).to_numpy(zero_copy_only=False)
+            for i in np.flatnonzero(unknown & (errors == "")):
+                errors[i] = f"ValueError: Not a true/false value: {text[i].as_py()!r}"
+    else:
+        flags = pc.not_equal(arr, 0)
+    return pc.fill_null(flags, False).to_numpy(zero_copy_only=False)
+
+def _code(batch: pa.RecordBatch, name: str, codes, default: str, errors: np.ndarray) -> np.ndarray:
+    n = batch.num_rows
+    if name not in batch.schema.names:
+        return np.full(n, codes.index(default), dtype=np.int64)
+    text = pc.fill_null(_text(pc.cast(batch.column(name), pa.string())), default)
+    text = pc.if_else(pc.equal(text, ""), default, text)
+    idx = pc.index_in(text, value_set=pa.array(codes))
+    unknown = pc.is_null(idx).to_numpy(zero_copy_only=False)
+    for i in np.flatnonzero(unknown & (errors == "")):
+        errors[i] = f"KeyError: {text[i].as_py()!r}"
+    return pc.fill_null(idx, 0).to_numpy(zero_copy_only=False).astype(np.int64)
+
+def _states(batch: pa.RecordBatch) -> np.ndarray:
+    """State codes as an object array that shares one str per distinct code."""
+    if "state" not in batch.schema.names:
+        return np.full(batch.num_rows, "", dtype=object)
+    text = pc.utf8_upper(pc.utf8_trim_whitespace(pc.fill_null(pc.cast(batch.column("state"), pa.string()), "")))
+    encoded = pc.dictionary_encode(text).combine_chunks() if isinstance(text, pa.ChunkedArray) else pc.dictionary_encode(text)
+    dictionary = np.array(encoded.dictionary.to_pylist(), dtype=object)
+    return dictionary[encoded.indices.to_numpy(zero_copy_only=False)]
+
+def _zips(batch: pa.RecordBatch) -> np.ndarray:
+    """ZIP codes as ints (payroll.localities.zip_number), -1 where missing or malformed."""
+    arr = batch.column("zip")
+    if pa.types.is_integer(arr.type):
+        return pc.fill_null(arr, -1).to_numpy(zero_copy_only=False).astype(np.int64)
+    text = pc.utf8_slice_codeunits(_text(pc.fill_null(pc.cast(arr, pa.string()), "")), 0, 5)
+    valid = pc.match_substring_regex(text, r"^[0-9]{5}$")
+    return pc.cast(pc.if_else(valid, text, "-1"), pa.int64()).to_numpy(zero_copy_only=False)
+
+def _given(batch: pa.RecordBatch, name: str) -> np.ndarray:
+    """Rows where the column has a value (not null or blank)."""
+    if name not in batch.schema.names:
+        return np.zeros(batch.num_rows, dtype=bool)
+    arr = batch.column(name)
+    present = pc.is_valid(arr)
+    if pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type):
+        present = pc.and_(present, pc.not_equal(pc.utf8_trim_whitespace(arr), ""))
+    return pc.fill_null(present, False).to_numpy(zero_copy_only=False)
+
+def columns_from_batch(batch: pa.RecordBatch) -> Dict[str, np.ndarray]:
+    """The Arrow counterpart of payroll.vectorized.columns_from_rows."""
+    n = batch.num_rows
+    errors = np.full(n, "", dtype=object)
+    multi = _flag(batch, "multi", errors)
+    cols = {
+        "employee_id": pc.cast(batch.column("employee_id"), pa.string()) if "employee_id" in batch.schema.names else pa.nulls(n, pa.string()),
+        "gross": _money(batch, "gross", errors),
+        "period": _code(batch, "period", PERIOD_CODES, "biweekly", errors),
+        "status": _code(batch, "filing_status", FED_STATUSES, "single", errors),
+        "annual": _flag(batch, "annual", errors),
+        "multi": multi,
+        "other_job": np.where(multi, _money(batch, "other_job_amount", errors), 0.0),
+        "dep_credit": _money(batch, "dep_credit", errors),
+        "oth": _money(batch, "other_income", errors),
+        "ded": _money(batch, "deductions", errors),
+        "extra": _money(batch, "extra", errors),
+        "state": _states(batch),
+        "error": errors,
+    }
+    for name, default in STATE_KWARG_DEFAULTS.items():
+        key = f"state_{name}"
+        if name in DATE_INPUTS:
+            cols[key] = _date(batch, key, errors)
+        else:
+            cols[key] = _flag(batch, key) if isinstance(default, bool) else _money(batch, key, errors, default)
+    if "zip" in batch.schema.names:
+        given = {name: _given(batch, f"state_{name}") for name in STATE_KWARG_DEFAULTS}
+        default_index().fill_inputs(cols, _zips(batch), given, STATE_KWARG_DEFAULTS)
+    return check_columns(cols)
+
+def money_array(values: np.ndarray, valid: Optional[np.ndarray] = None) -> pa.Array:
+    """decimal128(18, 2) array built directly from the little-endian 128-bit cents buffer."""
+    cents = np.rint(np.nan_to_num(values) * 100).astype(np.int64)
+    words = np.empty((len(cents), 2), dtype=np.int64)
+    words[:, 0] = cents
+    words[:, 1] = cents >> 63  # sign extension into the high word
+    validity = None
+    if valid is not None and not valid.all():
+        validity = pa.array(valid).buffers()[1]
+    return pa.Array.from_buffers(MONEY, len(cents), [validity, pa.py_buffer(words)])
+
+def compute_batch(tables: CompiledTables, batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Kernel for VectorizedEngine.map: one input batch to one RESULT_SCHEMA batch."""
+    cols = columns_from_batch(batch)
+    res = compute_columns(tables, cols)
+    ok = res["ok"]
+    arrays = [cols["employee_id"]]
+    arrays += [money_array(res[name], ok) for name in MONEY_COLUMNS]
+    for name in LOCAL_TAX_NAMES:
+        values = res["local_taxes"].get(name)
+        if values is None:
+            arrays.append(pa.nulls(batch.num_rows, MONEY))
+        else:
+            arrays.append(money_array(values, ok & ~np.isnan(values)))
+    errors = cols["error"]
+    arrays.append(pa.array(np.where(ok, None, errors), type=pa.string()))
+    return pa.RecordBatch.from_arrays(arrays, schema=RESULT_SCHEMA)
+
+class _Writer:
+    """One writer API over Parquet, Arrow IPC and CSV outputs."""
+
+    def __init__(self, path: str):
+        lower = path.lower()
+        if lower.endswith((".parquet", ".pq")):
+            self._writer = pq.ParquetWriter(path, RESULT_SCHEMA)
+        elif lower.endswith((".arrow", ".feather", ".ipc")):
+            self._writer = ipc.new_file(path, RESULT_SCHEMA)
+        else:
+            self._writer = pacsv.CSVWriter(path, RESULT_SCHEMA)
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        self._writer.write_batch(batch)
+
+    def close(self) -> None:
+        self._writer.close()
+
+def run_columnar(input_path: str, output_path: str, engine, batch_size: int = 65536) -> int:
+    """Stream input batches through a VectorizedEngine into output_path; returns the row count."""
+    if os.path.abspath(input_path) == os.path.abspath(output_path):
+        raise ValueError("Input and output must be different files")
+    writer = _Writer(output_path)
+    count = 0
+    try:
+        with engine:
+            for _, result in engine.map(((None, b) for b in read_batches(input_path, batch_size)), kernel=compute_batch):
+                writer.write(result)
+                count += result.num_rows
+    finally:
+        writer.close()
+    return count
@@ -0,0 +1,115 @@
+"""
+One paycheck profile run through every state at once.
+
+    from payroll.compare import compare_states
+    for row in compare_states(PaycheckInput(Decimal("2500"), "biweekly", "single")):
+        print(row.state, row.total_tax, row.net_pay)
+
+The profile is repeated once per state and the whole set goes through the
+vectorized engine in a single pass, so comparing every registered state
+costs about as much as one small batch chunk. The profile's state_kwargs
+go to every state; each state only reads the inputs it declares (NYC
+residency only matters for NY, extra_withholding for every state that
+takes it). Amounts are per pay period, or per year for an annual profile,
+and agree to the cent with calculate_paycheck (see payroll.vectorized).
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from states import get_available_states, get_state_name
+from states.residency import days_column
+
+from .compiled import FED_STATUSES, PERIOD_CODES, CompiledTables, default_tables
+from .paycheck import PaycheckInput
+from .vectorized import DATE_INPUTS, STATE_KWARG_DEFAULTS, check_columns, compute_columns
+
+@dataclass
+class StateComparison:
+    """One state's withholding for the compared profile."""
+    state: str
+    name: str
+    federal: Decimal
+    fica: Decimal  # Social Security plus Medicare
+    state_tax: Decimal
+    local_taxes: Dict[str, Decimal]
+    net_pay: Decimal
+
+    @property
+    def local_tax(self) -> Decimal:
+        return sum(self.local_taxes.values(), Decimal("0"))
+
+    @property
+    def total_tax(self) -> Decimal:
+        """State plus local tax, the part that changes from state to state."""
+        return self.state_tax + self.local_tax
+
+def _money(value: float) -> Decimal:
+    return Decimal(f"{value:.2f}")
+
+def _columns(inp: PaycheckInput, codes: List[str]) -> Dict[str, np.ndarray]:
+    """Engine input columns for the profile, one row per state."""
+    try:
+        period, status = PERIOD_CODES.index(inp.period), FED_STATUSES.index(inp.filing_status)
+    except ValueError:
+        raise ValueError(f"Unknown pay period or filing status: {inp.period!r}, {inp.filing_status!r}") from None
+    n = len(codes)
+    cols = {
+        "employee_id": np.array(codes, dtype=object),
+        "gross": np.full(n, float(inp.gross)),
+        "period": np.full(n, period, dtype=np.int64),
+        "status": np.full(n, status, dtype=np.int64),
+        "annual": np.full(n, bool(inp.annual)),
+        "multi": np.full(n, bool(inp.multi)),
+        "dep_credit": np.full(n, float(inp.dep_credit)),
+        "oth": np.full(n, float(inp.other_income)),
+        "ded": np.full(n, float(inp.deductions)),
+        "extra": np.full(n, float(inp.extra)),
+        "state": np.array(codes, dtype=object),
+        "other_job": np.full(n, float(inp.other_job_amount) if inp.multi else 0.0),
+    }
+    for name, default in STATE_KWARG_DEFAULTS.items():
+        value = inp.state_kwargs.get(name)
+        if name in DATE_INPUTS:
+            cols[f"state_{name}"] = days_column(value, n)
+            continue
+        value = default if value is None else value
+        cols[f"state_{name}"] = np.full(n, bool(value) if isinstance(default, bool) else float(value))
+    cols["error"] = np.full(n, "", dtype=object)
+    return check_columns(cols)
+
+def compare_states(inp: PaycheckInput, states: Optional[Iterable[str]] = None,
+                   tables: Optional[CompiledTables] = None) -> List[StateComparison]:
+    """
+    Withholding for inp in every registered state (or just states), ranked
+    from the highest net pay to the lowest; ties keep state code order.
+    States that do not accept inp's filing status are left out. inp.state
+    is ignored.
+    """
+    tables = tables or default_tables()
+    codes = sorted(states) if states is not None else get_available_states()
+    status = inp.filing_status.capitalize()
+    codes = [code for code in codes if status in tables.state_statuses.get(code, (status,))]
+    if not codes:
+        return []
+    cols = _columns(inp, codes)
+    res = compute_columns(tables, cols)
+    if not res["ok"].all():
+        raise ValueError(cols["error"][~res["ok"]][0])
+
+    rows = [
+        StateComparison(
+            state=code,
+            name=get_state_name(code),
+            federal=_money(res["federal"][i]),
+            fica=_money(res["social_security"][i] + res["medicare"][i]),
+            state_tax=_money(res["state_tax"][i]),
+            local_taxes={name: _money(amounts[i]) for name, amounts in res["local_taxes"].items() if not np.isnan(amounts[i])},
+            net_pay=_money(res["net_pay"][i]),
+        )
+        for i, code in enumerate(codes)
+    ]
+    rows.sort(key=lambda row: -row.net_pay)
+    return rows
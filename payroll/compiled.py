@@ -0,0 +1,198 @@
+"""
+Tax tables compiled into flat float64 arrays.
+
+The tables (the built-in ones from federal.py and states/specs, or a data
+file from payroll.tabledata) are converted once into NumPy arrays that the
+vectorized engine indexes directly. Each state's rules become small numeric
+arrays too (deductions, credits and local taxes as rows that name their
+input by position in STATE_INPUTS), so a worker needs nothing but the
+buffer to evaluate any state. All arrays live in one contiguous buffer, so
+a process pool can publish them through multiprocessing.shared_memory and
+workers attach zero-copy views instead of unpickling (or rebuilding) the
+tables themselves.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import shared_memory
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from states.spec import CREDIT_STAGES, LOCAL_BASES, RESIDENCY_INPUTS, bracket_rows, builtin_specs, input_defaults
+
+from .tabledata import builtin_data
+
+PERIOD_CODES = ("weekly", "biweekly", "semimonthly", "monthly")
+FED_STATUSES = ("single", "married", "head")
+
+# Per-row state inputs the vectorized engine reads, from the built-in specs
+STATE_INPUTS = tuple(input_defaults(builtin_specs().values()))
+
+# name -> (offset, shape) into the flat buffer
+Layout = Dict[str, Tuple[int, Tuple[int, ...]]]
+
+@dataclass(frozen=True)
+class TableSpec:
+    """Everything a worker needs to attach to published tables (cheap to pickle)."""
+    shm_name: str
+    layout: Layout
+    state_statuses: Dict[str, Tuple[str, ...]]
+    version: str
+
+class CompiledTables:
+    """Named float64 arrays backed by a single, read-only buffer."""
+
+    def __init__(self, buffer: np.ndarray, layout: Layout, state_statuses: Dict[str, Tuple[str, ...]],
+                 version: str, shm=None):
+        self.buffer = buffer
+        self.layout = layout
+        self.state_statuses = state_statuses
+        self.version = version
+        self._shm = shm
+        self.arrays = MappingProxyType({
+            name: buffer[offset:offset + int(np.prod(shape))].reshape(shape)
+            for name, (offset, shape) in layout.items()
+        })
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    @property
+    def states(self) -> List[str]:
+        return sorted(self.state_statuses)
+
+    def publish(self) -> Tuple[shared_memory.SharedMemory, TableSpec]:
+        """Copy the buffer into a new shared memory block; the caller owns (and must unlink) it."""
+        shm = shared_memory.SharedMemory(create=True, size=self.buffer.nbytes)
+        np.ndarray(self.buffer.shape, dtype=np.float64, buffer=shm.buf)[:] = self.buffer
+        return shm, TableSpec(shm.name, self.layout, self.state_statuses, self.version)
+
+    @classmethod
+    def attach(cls, spec: TableSpec) -> "CompiledTables":
+        """Map tables published by another process, without copying."""
+        shm = shared_memory.SharedMemory(name=spec.shm_name)
+        size = sum(int(np.prod(shape)) for _, shape in spec.layout.values())
+        buffer = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+        buffer.flags.writeable = False
+        return cls(buffer, spec.layout, spec.state_statuses, spec.version, shm=shm)
+
+def _brackets(rows: List[dict], width: int) -> np.ndarray:
+    """(width, 4) array of min/max/base/rate; padding rows never match."""
+    out = np.zeros((width, 4))
+    out[:, 1] = np.inf
+    for i, row in enumerate(rows):
+        out[i] = [float(row["min"]), np.inf if row.get("max") is None else float(row["max"]),
+                  float(row["base"]), float(row["rate"])]
+    return out
+
+def _amount_table(rows: List[dict], width: int) -> np.ndarray:
+    """(width, 2) array of max/amount; padding rows take any income and give nothing."""
+    out = np.zeros((width, 2))
+    out[:, 0] = np.inf
+    for i, row in enumerate(rows):
+        out[i] = [np.inf if row.get("max") is None else float(row["max"]), float(row["amount"])]
+    return out
+
+def _federal_arrays(fed: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    pct = fed["percentage_method"]
+    width = max(len(rows) for table in pct.values() for rows in table.values())
+    brackets = np.stack([np.stack([_brackets(pct[p][s], width) for s in FED_STATUSES]) for p in PERIOD_CODES])
+    mj = fed["multiple_jobs"]
+    return {
+        "fed.brackets": brackets,  # (period, status, bracket, [min, max, base, rate])
+        "fed.periods": np.array([float(fed["periods"][p]) for p in PERIOD_CODES]),
+        "fed.standard": np.array([float(fed["standard_deduction"][s]) for s in FED_STATUSES]),
+        "fed.mj_lower": np.array([[float(b["range"][0]) for b in mj[s]] for s in FED_STATUSES]),
+        "fed.mj_adjustment": np.array([[float(b["adjustment"]) for b in mj[s]] for s in FED_STATUSES]),
+        "fica": np.array([float(fed["fica_cap"]), float(fed["social_rate"]), float(fed["medicare_rate"])]),
+    }
+
+def _input_index(code: str, name: str) -> int:
+    if name not in STATE_INPUTS:
+        raise ValueError(f"{code} reads input {name!r}, which the vectorized engine does not parse")
+    return STATE_INPUTS.index(name)
+
+def _optional(value: Any, default: float) -> float:
+    return default if value is None else float(value)
+
+def _state_arrays(code: str, spec: Dict[str, Any]) -> Tuple[Dict[str, np.ndarray], Tuple[str, ...]]:
+    """
+    One state spec as arrays:
+
+        <code>.brackets    (status, bracket, [min, max, base, rate])
+        <code>.standard    (status,)
+        <code>.rules       [part-year factor, adds extra withholding, exempt up to,
+                            supplemental rate, reads moved_in, moved_out, resident_income]
+        <code>.deductions  (n, [input, per unit, cap])
+        <code>.credits     (n, [input or -1, per unit x rate, cap, income limit, stage,
+                                table or -1, applies per status...])
+        <code>.credit_tables  (table, status, row, [max, amount]); every status
+                            ends in a row with an infinite max and no amount
+        <code>.local.<name>  [flag input, base, rate input or -1, rate per status...]
+    """
+    statuses = tuple(spec["filing_statuses"])
+    width = max(len(bracket_rows(spec, s)) for s in statuses)
+    inputs = spec.get("inputs", {})
+    credits = spec.get("credits", [])
+    tables = [c["table"] for c in credits if "table" in c]
+    table_width = 1 + max((len(rows) for table in tables for rows in table.values()), default=0)
+    arrays = {
+        f"{code}.brackets": np.stack([_brackets(bracket_rows(spec, s), width) for s in statuses]),
+        f"{code}.standard": np.array([float(spec["standard_deduction"].get(s, 0)) for s in statuses]),
+        f"{code}.rules": np.array([_optional(spec.get("part_year_factor"), 1.0), float("extra_withholding" in inputs),
+                                   _optional(spec.get("exempt_up_to"), -np.inf), _optional(spec.get("supplemental_rate"), 0.0)]
+                                  + [float(name in inputs) for name in RESIDENCY_INPUTS]),
+        f"{code}.deductions": np.array([[_input_index(code, d["input"]), float(d.get("per_unit", 1)), _optional(d.get("max"), np.inf)]
+                                        for d in spec.get("deductions", [])]).reshape(-1, 3),
+        f"{code}.credits": np.array([[_input_index(code, c["input"]) if "table" not in c else -1,
+                                      float(c.get("per_unit", 1)) * float(c.get("rate", 1)),
+                                      _optional(c.get("max"), np.inf), _optional(c.get("income_limit"), np.inf),
+                                      CREDIT_STAGES.index(c.get("stage", "tax")),
+                                      tables.index(c["table"]) if "table" in c else -1]
+                                     + [float(s in c.get("statuses", statuses)) for s in statuses]
+                                     for c in credits]).reshape(-1, 6 + len(statuses)),
+        f"{code}.credit_tables": np.array([[_amount_table(table.get(s, []), table_width) for s in statuses]
+                                           for table in tables]).reshape(-1, len(statuses), table_width, 2),
+    }
+    for local in spec.get("local_taxes", []):
+        rates = local.get("rates") or {s: local["rate"] for s in statuses}
+        rate_input = _input_index(code, local["rate_input"]) if local.get("rate_input") else -1
+        arrays[f"{code}.local.{local['name']}"] = np.array(
+            [_input_index(code, local["when"]), LOCAL_BASES.index(local["base"]), rate_input]
+            + [float(rates[s]) for s in statuses])
+    return arrays, statuses
+
+def _pack(arrays: Dict[str, np.ndarray], state_statuses: Dict[str, Tuple[str, ...]], version: str) -> CompiledTables:
+    layout, offset = {}, 0
+    for name, arr in arrays.items():
+        layout[name] = (offset, arr.shape)
+        offset += arr.size
+    buffer = np.empty(offset)
+    for name, arr in arrays.items():
+        start = layout[name][0]
+        buffer[start:start + arr.size] = arr.ravel()
+    # Tables are shared by every thread in the process, so nothing may write to them
+    buffer.flags.writeable = False
+    return CompiledTables(buffer, layout, state_statuses, version)
+
+def compile_tables(data: Optional[Dict[str, Any]] = None) -> CompiledTables:
+    """Compile the federal tables and every state into one buffer (built-in tables by default)."""
+    data = data or builtin_data()
+    arrays = _federal_arrays(data["federal"])
+    state_statuses = {}
+    for code in sorted(data["states"]):
+        state, statuses = _state_arrays(code, data["states"][code])
+        arrays.update(state)
+        state_statuses[code] = statuses
+    return _pack(arrays, state_statuses, data["version"])
+
+def compile_state(spec: Dict[str, Any]) -> CompiledTables:
+    """One state spec on its own, without the federal tables."""
+    arrays, statuses = _state_arrays(spec["code"], spec)
+    return _pack(arrays, {spec["code"]: statuses}, spec["code"])
+
+@lru_cache(maxsize=1)
+def default_tables() -> CompiledTables:
+    """Tables compiled once per process, for in-process callers."""
+    return compile_tables()
@@ -0,0 +1,362 @@
+"""
+Multi-worker batch runs coordinated through a SQLite work queue.
+
+    python -m payroll.coordinator run employees.csv -o results.csv --workers 4
+
+or, with workers started separately (on this machine or others that see the
+same files):
+
+    python -m payroll.coordinator plan employees.csv --queue run.db
+    python -m payroll.coordinator work --queue run.db      # as many as you like
+    python -m payroll.coordinator merge --queue run.db -o results.csv
+
+``plan`` splits the input into work units of ``--unit-size`` rows, recorded
+as byte offsets into the input. Workers lease one unit at a time, compute it
+with the exact or vectorized engine and write it to its own file under the
+queue's output directory; a unit whose lease runs out (its worker died or
+hung) goes back to the queue, and after ``max_attempts`` leases it is marked
+failed. Only the worker holding the current lease can complete a unit, and
+any two runs of a unit produce the same bytes, so ``merge`` can always
+concatenate the unit files in unit order into one deterministic result.
+A successful ``merge`` deletes the queue database and the unit files.
+
+``plan`` records the input's path, size, modification time and SHA-256;
+workers and ``run`` refuse a queue whose input no longer matches, so an
+interrupted run is only ever resumed on the file it was planned from.
+
+Workers on other machines need the input, the queue database and the output
+directory on a shared filesystem with working POSIX locks (SQLite's
+requirement); the paths recorded by ``plan`` are used as they are.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .batch import OUTPUT_COLUMNS, ExactEngine
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    start INTEGER NOT NULL,        -- byte offset of the unit's first row
+    rows INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending | leased | done | failed
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+"""
+
+@dataclass
+class Unit:
+    id: int
+    start: int
+    rows: int
+    attempts: int
+
+def scan_units(path: str, unit_size: int) -> Iterator[Tuple[int, int]]:
+    """(start offset, row count) of each unit; csv never splits a quoted multi-line field."""
+    with open(path, newline="") as src:
+        src.readline()  # header
+        reader = csv.reader(iter(src.readline, ""))
+        while True:
+            start = src.tell()
+            rows = sum(1 for _ in islice(reader, unit_size))
+            if not rows: return
+            yield start, rows
+
+def fingerprint(path: str) -> Dict[str, str]:
+    """What plan records about the input, to tell a resumed run it is still the same file."""
+    path = os.path.abspath(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    st = os.stat(path)
+    return {"input_path": path, "input_size": str(st.st_size), "input_mtime_ns": str(st.st_mtime_ns),
+            "input_sha256": digest.hexdigest()}
+
+class WorkQueue:
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    @classmethod
+    def plan(cls, queue_path: str, input_path: str, unit_size: int, output_dir: Optional[str] = None,
+             engine: str = "exact", max_attempts: int = 3) -> "WorkQueue":
+        queue = cls(queue_path)
+        if queue.meta:
+            raise ValueError(f"{queue_path} already holds a plan")
+        source = fingerprint(input_path)
+        input_path = source["input_path"]
+        output_dir = os.path.abspath(output_dir or f"{queue_path}.units")
+        os.makedirs(output_dir, exist_ok=True)
+        with open(input_path, newline="") as src:
+            fieldnames = next(csv.reader([src.readline()]))
+        meta = {**source, "fieldnames": json.dumps(fieldnames), "output_dir": output_dir,
+                "engine": engine, "max_attempts": str(max_attempts)}
+        queue.db.execute("BEGIN IMMEDIATE")
+        queue.db.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        queue.db.executemany("INSERT INTO units (start, rows) VALUES (?, ?)", scan_units(input_path, unit_size))
+        queue.db.execute("COMMIT")
+        return queue
+
+    @property
+    def meta(self) -> Dict[str, str]:
+        return dict(self.db.execute("SELECT key, value FROM meta"))
+
+    def check_input(self, input_path: Optional[str] = None) -> None:
+        """Raise ValueError unless input_path (default: the planned input) is the file the queue was planned from."""
+        meta = self.meta
+        path = input_path or meta.get("input_path")
+        try:
+            current = fingerprint(path)
+        except OSError as e:
+            raise ValueError(f"{self.path}: cannot read the planned input: {e}") from None
+        changed = [key for key, value in current.items() if meta.get(key) != value]
+        if changed:
+            raise ValueError(f"{self.path} was planned from {meta.get('input_path')!r} and does not match {path!r} "
+                             f"({', '.join(k.replace('input_', '') for k in changed)} differ); delete the queue to start over")
+
+    def unit_path(self, unit_id: int) -> str:
+        return os.path.join(self.meta["output_dir"], f"unit-{unit_id:08d}.csv")
+
+    def claim(self, worker: str, lease_seconds: float) -> Optional[Unit]:
+        """Lease the first pending (or expired) unit to worker; None if there is none right now."""
+        now = time.time()
+        max_attempts = int(self.meta["max_attempts"])
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute(
+                "UPDATE units SET status = 'failed', error = coalesce(error, 'lease expired') "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?", (now, max_attempts))
+            row = self.db.execute(
+                "SELECT id, start, rows, attempts FROM units "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            self.db.execute("UPDATE units SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                            (worker, now + lease_seconds, row[0]))
+            return Unit(row[0], row[1], row[2], row[3] + 1)
+        finally:
+            self.db.execute("COMMIT")
+
+    def complete(self, unit: Unit, worker: str) -> bool:
+        """Mark unit done if worker still holds its lease; False if the lease was lost."""
+        cur = self.db.execute("UPDATE units SET status = 'done', lease_until = NULL, error = NULL "
+                              "WHERE id = ? AND worker = ? AND status = 'leased'", (unit.id, worker))
+        return cur.rowcount == 1
+
+    def fail(self, unit: Unit, worker: str, error: str) -> None:
+        """Give a unit back after an error, or mark it failed once it is out of attempts."""
+        status = "failed" if unit.attempts >= int(self.meta["max_attempts"]) else "pending"
+        self.db.execute("UPDATE units SET status = ?, error = ?, lease_until = NULL "
+                        "WHERE id = ? AND worker = ? AND status = 'leased'", (status, error, unit.id, worker))
+
+    def release(self, worker: str) -> int:
+        """Return every unit leased to a worker known to be dead; returns how many."""
+        return self.db.execute("UPDATE units SET status = 'pending', lease_until = NULL "
+                               "WHERE worker = ? AND status = 'leased'", (worker,)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(("pending", "leased", "done", "failed"), 0)
+        counts.update(self.db.execute("SELECT status, count(*) FROM units GROUP BY status"))
+        return counts
+
+    def finished(self) -> bool:
+        counts = self.counts()
+        return counts["pending"] == 0 and counts["leased"] == 0
+
+    def close(self) -> None:
+        self.db.close()
+
+def _engine(name: str):
+    if name == "vectorized":
+        from .sharded import VectorizedEngine
+        return VectorizedEngine(1)
+    return ExactEngine(1)
+
+def _read_unit(input_path: str, fieldnames: List[str], unit: Unit) -> List[Dict[str, str]]:
+    with open(input_path, newline="") as src:
+        src.seek(unit.start)
+        return list(islice(csv.DictReader(iter(src.readline, ""), fieldnames=fieldnames), unit.rows))
+
+def work(queue_path: str, worker: Optional[str] = None, lease_seconds: float = 300.0, poll: float = 1.0) -> int:
+    """Process units until the queue is finished; returns the number of units this worker completed."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(queue_path)
+    queue.check_input()
+    meta = queue.meta
+    fieldnames = json.loads(meta["fieldnames"])
+    done = 0
+    with _engine(meta["engine"]) as engine:
+        while True:
+            unit = queue.claim(worker, lease_seconds)
+            if unit is None:
+                if queue.finished(): break
+                time.sleep(poll)  # others hold leases; wait in case one expires
+                continue
+            try:
+                rows = _read_unit(meta["input_path"], fieldnames, unit)
+                path = queue.unit_path(unit.id)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames=OUTPUT_COLUMNS)
+                    for _, results in engine.map([(None, rows)]):
+                        writer.writerows(results)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # Every run of a unit writes the same bytes, so replacing a late duplicate is harmless
+                os.replace(tmp, path)
+            except Exception as e:
+                queue.fail(unit, worker, f"{type(e).__name__}: {e}")
+                continue
+            if queue.complete(unit, worker):
+                done += 1
+    queue.close()
+    return done
+
+def _remove_queue(queue_path: str, output_dir: str, unit_files: List[str]) -> None:
+    """Delete the queue database and the unit files (and their directory once it is empty)."""
+    for path in unit_files + [queue_path, f"{queue_path}-wal", f"{queue_path}-shm"]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    try:
+        os.rmdir(output_dir)
+    except OSError:
+        pass  # not empty: --output-dir pointed somewhere shared
+
+def merge(queue_path: str, output_path: str) -> int:
+    """
+    Concatenate every unit's results in unit order, then delete the queue
+    and its unit files; returns the row count.
+    """
+    queue = WorkQueue(queue_path)
+    counts = queue.counts()
+    if counts["done"] != sum(counts.values()):
+        queue.close()
+        raise RuntimeError(f"Cannot merge: {counts}")
+    rows, unit_files = 0, []
+    tmp = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", newline="") as dst:
+        csv.DictWriter(dst, fieldnames=OUTPUT_COLUMNS).writeheader()
+        for unit_id, unit_rows in queue.db.execute("SELECT id, rows FROM units ORDER BY id"):
+            unit_files.append(queue.unit_path(unit_id))
+            with open(unit_files[-1], newline="") as src:
+                for block in iter(lambda: src.read(1 << 20), ""):
+                    dst.write(block)
+            rows += unit_rows
+    os.replace(tmp, output_path)
+    output_dir = queue.meta["output_dir"]
+    queue.close()
+    _remove_queue(queue_path, output_dir, unit_files)
+    return rows
+
+def run(input_path: str, output_path: str, workers: int, unit_size: int = 10000, engine: str = "exact",
+        queue_path: Optional[str] = None, lease_seconds: float = 300.0, max_restarts: int = 10) -> int:
+    """
+    Plan, start ``workers`` local worker processes, replace any that die
+    (returning their leases at once rather than waiting for them to expire)
+    and merge. An existing queue is picked up where it stopped, provided it
+    was planned from this same input file (ValueError otherwise).
+    """
+    queue_path = queue_path or f"{output_path}.queue.db"
+    if os.path.exists(queue_path):
+        queue = WorkQueue(queue_path)
+        try:
+            queue.check_input(input_path)
+        except ValueError:
+            queue.close()
+            raise
+    else:
+        queue = WorkQueue.plan(queue_path, input_path, unit_size, engine=engine)
+    procs: Dict[str, subprocess.Popen] = {}
+    started = 0
+
+    def spawn():
+        nonlocal started
+        name = f"local-{started}"
+        started += 1
+        procs[name] = subprocess.Popen([sys.executable, "-m", "payroll.coordinator", "work", "--queue", queue_path,
+                                        "--worker-id", name, "--lease", str(lease_seconds)])
+
+    for _ in range(workers):
+        spawn()
+    while procs:
+        time.sleep(0.2)
+        for name, proc in list(procs.items()):
+            code = proc.poll()
+            if code is None: continue
+            del procs[name]
+            if code != 0:
+                released = queue.release(name)
+                print(f"Worker {name} exited with {code}; returned {released} unit(s) to the queue", file=sys.stderr)
+                if not queue.finished() and started - workers < max_restarts:
+                    spawn()
+    counts = queue.counts()
+    queue.close()
+    if counts["failed"] or counts["pending"] or counts["leased"]:
+        raise RuntimeError(f"Run incomplete: {counts}")
+    return merge(queue_path, output_path)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.coordinator", description="Coordinate batch runs over a SQLite work queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="plan, run local workers and merge")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--queue", help="queue database (default <output>.queue.db)")
+    p = sub.add_parser("plan", help="split an input into work units")
+    p.add_argument("input")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--output-dir", help="where workers write unit results (default <queue>.units)")
+    p.add_argument("--max-attempts", type=int, default=3)
+    p = sub.add_parser("work", help="process units until the queue is finished")
+    p.add_argument("--queue", required=True)
+    p.add_argument("--worker-id", help="name recorded on leases (default host:pid)")
+    p = sub.add_parser("merge", help="concatenate finished units into one result file")
+    p.add_argument("--queue", required=True)
+    p.add_argument("-o", "--output", required=True)
+    p = sub.add_parser("status", help="unit counts by status")
+    p.add_argument("--queue", required=True)
+    for name in ("run", "plan"):
+        sub.choices[name].add_argument("--unit-size", type=int, default=10000, help="rows per work unit")
+        sub.choices[name].add_argument("--engine", choices=["exact", "vectorized"], default="exact")
+    for name in ("run", "work"):
+        sub.choices[name].add_argument("--lease", type=float, default=300.0, help="seconds before an unfinished unit is reassigned")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "plan":
+            queue = WorkQueue.plan(args.queue, args.input, args.unit_size, args.output_dir, args.engine, args.max_attempts)
+            print(f"Planned {sum(queue.counts().values())} units", file=sys.stderr)
+        elif args.command == "work":
+            print(f"Completed {work(args.queue, args.worker_id, args.lease)} units", file=sys.stderr)
+        elif args.command == "merge":
+            print(f"Merged {merge(args.queue, args.output)} rows", file=sys.stderr)
+        elif args.command == "status":
+            print(json.dumps(WorkQueue(args.queue).counts()))
+        else:
+            print(f"Processed {run(args.input, args.output, args.workers, args.unit_size, args.engine, args.queue, args.lease)} rows", file=sys.stderr)
+    except ValueError as e:
+        parser.error(str(e))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
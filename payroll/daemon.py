@@ -0,0 +1,171 @@
+"""
+Warm calculation daemon over a Unix domain socket.
+
+    python -m payroll.daemon --socket /run/payroll.sock [--engine vectorized]
+
+The tables and state calculators are loaded once at start-up; after that a
+request costs one calculation, not an interpreter start. The protocol is
+newline-delimited JSON. Each request line is either one employee object
+(the same fields as a payroll.batch CSV row, as JSON strings, numbers or
+booleans) or a batch frame: a JSON array of such objects. Each gets exactly
+one response line, an object or an array in the same order. Clients may
+pipeline: send any number of lines without waiting, then read the
+responses in order. An ``id`` field is echoed back unchanged.
+
+Responses carry the payroll.batch.OUTPUT_COLUMNS values as strings, except
+``local_taxes`` which is an object; a row that cannot be calculated gets
+``error`` instead of amounts, and a line that is not valid JSON gets
+``{"error": ...}``.
+"""
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from states import STATE_CALCULATORS, get_calculator
+
+from .batch import process_chunk
+
+Kernel = Callable[[List[Dict[str, str]]], List[Dict[str, str]]]
+
+def _field(value: Any) -> str:
+    """JSON value to the CSV text the row parsers expect."""
+    if value is None: return ""
+    if isinstance(value, bool): return "true" if value else "false"
+    return str(value)
+
+def request_row(obj: Dict[str, Any]) -> Dict[str, str]:
+    """A JSON request object as a payroll.batch CSV row."""
+    return {key: _field(value) for key, value in obj.items() if key != "id"}
+
+def response_object(obj: Dict[str, Any], result: Dict[str, str]) -> Dict[str, Any]:
+    """A result row as a JSON response object, echoing the request's id."""
+    out = {key: value for key, value in result.items() if value not in (None, "")}
+    if "local_taxes" in out:
+        out["local_taxes"] = json.loads(out["local_taxes"])
+    if "id" in obj:
+        out["id"] = obj["id"]
+    return out
+
+def parse_frame(data: bytes) -> Tuple[Any, List[Dict[str, Any]]]:
+    """(frame, request objects) for one object or array; ValueError if it is neither."""
+    # Decimal numbers are kept as their exact text so amounts never pass through float
+    frame = json.loads(data, parse_float=str)
+    objs = frame if isinstance(frame, list) else [frame]
+    if not all(isinstance(obj, dict) for obj in objs):
+        raise ValueError("Expected an object or an array of objects")
+    return frame, objs
+
+def handle_line(kernel: Kernel, line: bytes) -> bytes:
+    """One request line to one response line."""
+    try:
+        frame, objs = parse_frame(line)
+    except ValueError as e:
+        return json.dumps({"error": f"{type(e).__name__}: {e}"}).encode() + b"\n"
+    results = [response_object(obj, result) for obj, result in zip(objs, kernel([request_row(obj) for obj in objs]))]
+    return json.dumps(results if isinstance(frame, list) else results[0]).encode() + b"\n"
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(handle_line(self.server.kernel, line))
+
+class PayrollDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """One thread per connection; requests on a connection are answered in order."""
+    daemon_threads = True
+
+    def __init__(self, path: str, kernel: Kernel):
+        self.kernel = kernel
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)  # stale socket from a previous run
+            else:
+                raise OSError(f"Another daemon is already listening on {path}")
+            finally:
+                probe.close()
+        super().__init__(path, _Handler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+def warm_kernel(engine: str = "exact", tables_dir: Optional[str] = None) -> Kernel:
+    """
+    Load everything a request needs up front and return the chunk kernel.
+    With tables_dir (vectorized only) the tables are hot-reloaded from there.
+    """
+    if engine == "vectorized":
+        from .reload import TableStore
+        from .sharded import compute_chunk
+        store = TableStore(tables_dir)
+        if tables_dir:
+            store.start()
+        return lambda rows: compute_chunk(store.current, rows)
+    for code in STATE_CALCULATORS:
+        get_calculator(code)
+    return process_chunk
+
+class Client:
+    """Minimal blocking client; ``calculate_many`` sends one batch frame."""
+
+    def __init__(self, path: str):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._file = self._sock.makefile("rwb")
+
+    def _call(self, frame: Any) -> Any:
+        self._file.write(json.dumps(frame).encode() + b"\n")
+        self._file.flush()
+        return json.loads(self._file.readline())
+
+    def calculate(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        return self._call(row)
+
+    def calculate_many(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return self._call(rows)
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.daemon", description="Serve withholding calculations over a Unix socket.")
+    parser.add_argument("--socket", required=True, help="path of the Unix domain socket to listen on")
+    parser.add_argument("--engine", choices=["exact", "vectorized"], default="exact",
+                        help="exact: Decimal math per row (default); vectorized: NumPy, fastest for large batch frames")
+    parser.add_argument("--tables", metavar="DIR", help="directory of versioned tax table files to load and hot-reload (vectorized only)")
+    args = parser.parse_args(argv)
+    if args.tables and args.engine != "vectorized":
+        parser.error("--tables needs --engine vectorized; the exact engine uses the built-in tables")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    server = PayrollDaemon(args.socket, warm_kernel(args.engine, args.tables))
+    # Stop cleanly (and remove the socket) under a service manager's SIGTERM too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Listening on {args.socket}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+"""
+The two NY calculations the shared NY engine replaced, frozen as they were
+for payroll.ny_parity. Nothing else should use them.
+
+calculate_ny_withholding is the .devcontainer/app.py version (household,
+dependent and Empire State child credits, supplemental wages), copied with
+its tables; only the Streamlit error handling is gone, so a bad input
+raises instead of showing zeros. spec_without_credits() is the states/ny.py
+calculator as it was before the credits moved into states/specs/ny.json:
+the same spec with no credits and no supplemental rate.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from states.spec import SpecTaxCalculator, builtin_specs, calculator_for, freeze
+
+def round_to_penny(amount: Decimal) -> Decimal:
+    """Round to nearest penny using IRS rounding rules."""
+    return amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+# NY State Tax Constants (2024 - Subject to update when NY releases final figures)
+NY_STANDARD_DEDUCTION = {
+    "Single": Decimal("8500"),  # Estimated 2024
+    "Married": Decimal("17050"), # Estimated 2024
+    "Head": Decimal("11800"),    # Estimated 2024
+    "Separate": Decimal("8500"), # Estimated 2024
+    "Widow": Decimal("17050")    # Estimated 2024
+}
+
+NY_TAX_BRACKETS = {
+    "Single": [
+        {"min": Decimal("0"), "max": Decimal("8500"), "rate": Decimal("0.04"), "base": Decimal("0")},
+        {"min": Decimal("8500"), "max": Decimal("11700"), "rate": Decimal("0.045"), "base": Decimal("340")},
+        {"min": Decimal("11700"), "max": Decimal("13900"), "rate": Decimal("0.0525"), "base": Decimal("484")},
+        {"min": Decimal("13900"), "max": Decimal("21400"), "rate": Decimal("0.0585"), "base": Decimal("600")},
+        {"min": Decimal("21400"), "max": Decimal("80650"), "rate": Decimal("0.0625"), "base": Decimal("1042")},
+        {"min": Decimal("80650"), "max": Decimal("215400"), "rate": Decimal("0.0685"), "base": Decimal("4842")},
+        {"min": Decimal("215400"), "max": Decimal("1077550"), "rate": Decimal("0.0965"), "base": Decimal("14220")},
+        {"min": Decimal("1077550"), "max": Decimal("5000000"), "rate": Decimal("0.103"), "base": Decimal("78990")},
+        {"min": Decimal("5000000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("360491")}
+    ],
+    "Married": [
+        {"min": Decimal("0"), "max": Decimal("17150"), "rate": Decimal("0.04"), "base": Decimal("0")},
+        {"min": Decimal("17150"), "max": Decimal("23600"), "rate": Decimal("0.045"), "base": Decimal("686")},
+        {"min": Decimal("23600"), "max": Decimal("27900"), "rate": Decimal("0.0525"), "base": Decimal("899")},
+        {"min": Decimal("27900"), "max": Decimal("43000"), "rate": Decimal("0.0585"), "base": Decimal("1116")},
+        {"min": Decimal("43000"), "max": Decimal("161300"), "rate": Decimal("0.0625"), "base": Decimal("2004")},
+        {"min": Decimal("161300"), "max": Decimal("323200"), "rate": Decimal("0.0685"), "base": Decimal("9051")},
+        {"min": Decimal("323200"), "max": Decimal("2155350"), "rate": Decimal("0.0965"), "base": Decimal("20797")},
+        {"min": Decimal("2155350"), "max": Decimal("5000000"), "rate": Decimal("0.103"), "base": Decimal("183010")},
+        {"min": Decimal("5000000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("447441")}
+    ],
+    "Head": [  # Head of Household brackets
+        {"min": Decimal("0"), "max": Decimal("12800"), "rate": Decimal("0.04"), "base": Decimal("0")},
+        {"min": Decimal("12800"), "max": Decimal("17650"), "rate": Decimal("0.045"), "base": Decimal("512")},
+        {"min": Decimal("17650"), "max": Decimal("20900"), "rate": Decimal("0.0525"), "base": Decimal("730")},
+        {"min": Decimal("20900"), "max": Decimal("32200"), "rate": Decimal("0.0585"), "base": Decimal("901")},
+        {"min": Decimal("32200"), "max": Decimal("107650"), "rate": Decimal("0.0625"), "base": Decimal("1568")},
+        {"min": Decimal("107650"), "max": Decimal("269300"), "rate": Decimal("0.0685"), "base": Decimal("6253")},
+        {"min": Decimal("269300"), "max": Decimal("1616450"), "rate": Decimal("0.0965"), "base": Decimal("17233")},
+        {"min": Decimal("1616450"), "max": Decimal("5000000"), "rate": Decimal("0.103"), "base": Decimal("131000")},
+        {"min": Decimal("5000000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("404016")}
+    ],
+    "Separate": [  # Married Filing Separately (half of married brackets)
+        {"min": Decimal("0"), "max": Decimal("8575"), "rate": Decimal("0.04"), "base": Decimal("0")},
+        {"min": Decimal("8575"), "max": Decimal("11800"), "rate": Decimal("0.045"), "base": Decimal("343")},
+        {"min": Decimal("11800"), "max": Decimal("13950"), "rate": Decimal("0.0525"), "base": Decimal("450")},
+        {"min": Decimal("13950"), "max": Decimal("21500"), "rate": Decimal("0.0585"), "base": Decimal("558")},
+        {"min": Decimal("21500"), "max": Decimal("80650"), "rate": Decimal("0.0625"), "base": Decimal("1002")},
+        {"min": Decimal("80650"), "max": Decimal("161600"), "rate": Decimal("0.0685"), "base": Decimal("4526")},
+        {"min": Decimal("161600"), "max": Decimal("1077675"), "rate": Decimal("0.0965"), "base": Decimal("10399")},
+        {"min": Decimal("1077675"), "max": Decimal("2500000"), "rate": Decimal("0.103"), "base": Decimal("91505")},
+        {"min": Decimal("2500000"), "max": None, "rate": Decimal("0.109"), "base": Decimal("223721")}
+    ]
+}
+
+# NYC Tax Rates (2024 estimated)
+NYC_TAX_RATES = {
+    "Single": Decimal("0.03078"),
+    "Married": Decimal("0.03078"),
+    "Head": Decimal("0.03078"),
+    "Separate": Decimal("0.03078"),
+    "Widow": Decimal("0.03078")
+}
+
+# Yonkers Tax Rate (2024)
+YONKERS_TAX_RATE = Decimal("0.16675")  # 16.75% of NY state tax
+
+# NY Tax Credits and Deductions
+NY_DEPENDENT_CREDIT = Decimal("100")  # Per qualifying dependent
+NY_EMPIRE_STATE_CHILD_CREDIT = Decimal("333")  # Per qualifying child
+NY_HOUSEHOLD_CREDIT = {
+    "Single": [
+        (Decimal("5000"), Decimal("75")),
+        (Decimal("6000"), Decimal("60")),
+        (Decimal("7000"), Decimal("50")),
+        (Decimal("20000"), Decimal("45")),
+        (Decimal("25000"), Decimal("40")),
+        (Decimal("28000"), Decimal("20")),
+        (Decimal("32000"), Decimal("15")),
+        (None, Decimal("0"))
+    ],
+    "Married": [
+        (Decimal("5000"), Decimal("90")),
+        (Decimal("6000"), Decimal("75")),
+        (Decimal("7000"), Decimal("65")),
+        (Decimal("20000"), Decimal("60")),
+        (Decimal("22000"), Decimal("60")),
+        (Decimal("25000"), Decimal("50")),
+        (Decimal("28000"), Decimal("40")),
+        (Decimal("32000"), Decimal("20")),
+        (None, Decimal("0"))
+    ]
+}
+
+NY_ITEMIZED_CATEGORIES = {
+    "medical": "Medical and Dental Expenses",
+    "taxes": "State and Local Taxes Paid",
+    "interest": "Interest Paid",
+    "charity": "Charitable Contributions",
+    "casualty": "Casualty and Theft Losses",
+    "job": "Job Expenses",
+    "other": "Other Itemized Deductions"
+}
+
+def calculate_ny_household_credit(income: Decimal, status: str, dependents: int) -> Decimal:
+    """Calculate NY Household Credit based on income and filing status."""
+    if status not in NY_HOUSEHOLD_CREDIT:
+        return Decimal("0")
+
+    credit = Decimal("0")
+    for threshold, amount in NY_HOUSEHOLD_CREDIT[status]:
+        if threshold is None or income <= threshold:
+            credit = amount
+            break
+
+    # Additional credit for dependents (married only)
+    if status == "Married" and dependents > 0:
+        credit += Decimal("15") * Decimal(str(min(dependents, 5)))
+
+    return credit
+
+def calculate_ny_withholding(
+    annual_salary: Decimal,
+    pay_periods: int,
+    calc_ny: bool,
+    ny_status: str,
+    ny_allow: int,
+    ny_extra: Decimal,
+    is_nyc_resident: bool = False,
+    is_yonkers_resident: bool = False,
+    itemized_deductions: dict = None,
+    num_dependents: int = 0,
+    qualifying_children: int = 0,
+    part_year_resident: bool = False,
+    supplemental_wages: bool = False,
+    supplemental_amount: Decimal = Decimal("0")
+) -> tuple[Decimal, Decimal, Decimal]:
+    """
+    Calculate NY state, NYC, and Yonkers withholding with improved precision.
+    Returns a tuple of (state_tax, nyc_tax, yonkers_tax) per pay period.
+    """
+    if not calc_ny:
+        return Decimal("0"), Decimal("0"), Decimal("0")
+
+    # Convert inputs to Decimal
+    annual_salary = Decimal(str(annual_salary))
+    ny_extra = Decimal(str(ny_extra))
+
+    # Handle supplemental wages
+    if supplemental_wages:
+        supplemental_amount = Decimal(str(supplemental_amount))
+        supplemental_tax = supplemental_amount * Decimal("0.0985")  # NY supplemental wage rate
+        annual_salary += supplemental_amount
+    else:
+        supplemental_tax = Decimal("0")
+
+    # Calculate itemized deductions
+    total_itemized = Decimal("0")
+    if itemized_deductions:
+        for category, amount in itemized_deductions.items():
+            if category in NY_ITEMIZED_CATEGORIES:
+                total_itemized += Decimal(str(amount))
+
+    # Determine deduction (greater of standard or itemized)
+    standard_deduction = NY_STANDARD_DEDUCTION[ny_status]
+    deduction = max(standard_deduction, total_itemized)
+
+    # Calculate NY taxable income
+    allowance_amount = Decimal(str(ny_allow)) * Decimal("1000")
+    taxable = max(annual_salary - allowance_amount - deduction, Decimal("0"))
+
+    # Calculate base state tax
+    brackets = NY_TAX_BRACKETS[ny_status]
+    state_tax = Decimal("0")
+
+    for bracket in brackets:
+        if bracket["max"] is None or taxable <= bracket["max"]:
+            excess = taxable - bracket["min"]
+            state_tax = bracket["base"] + (excess * bracket["rate"])
+            break
+
+    # Calculate credits
+    credits = Decimal("0")
+
+    # Household credit
+    household_credit = calculate_ny_household_credit(annual_salary, ny_status, num_dependents)
+    credits += household_credit
+
+    # Dependent credit
+    if num_dependents > 0:
+        credits += NY_DEPENDENT_CREDIT * Decimal(str(num_dependents))
+
+    # Empire State Child Credit
+    if qualifying_children > 0:
+        credits += NY_EMPIRE_STATE_CHILD_CREDIT * Decimal(str(qualifying_children))
+
+    # Apply credits
+    state_tax = max(state_tax - credits, Decimal("0"))
+
+    # Part-year resident adjustment
+    if part_year_resident:
+        # Assume 6 months for demonstration - this should be configurable
+        state_tax = state_tax * Decimal("0.5")
+
+    # Calculate NYC Tax if applicable
+    nyc_tax = Decimal("0")
+    if is_nyc_resident:
+        nyc_tax = taxable * NYC_TAX_RATES[ny_status]
+        if part_year_resident:
+            nyc_tax *= Decimal("0.5")
+
+    # Calculate Yonkers Tax if applicable
+    yonkers_tax = Decimal("0")
+    if is_yonkers_resident:
+        yonkers_tax = state_tax * YONKERS_TAX_RATE
+        if part_year_resident:
+            yonkers_tax *= Decimal("0.5")
+
+    # Add supplemental tax if applicable
+    state_tax += supplemental_tax
+
+    # Convert to per-period amounts
+    periods = Decimal(str(pay_periods))
+    state_tax = round_to_penny(state_tax / periods) + ny_extra
+    nyc_tax = round_to_penny(nyc_tax / periods)
+    yonkers_tax = round_to_penny(yonkers_tax / periods)
+
+    return state_tax, nyc_tax, yonkers_tax
+
+def spec_without_credits() -> SpecTaxCalculator:
+    """The pre-credit states/ny.py calculator."""
+    spec = {**builtin_specs()["NY"], "credits": [], "supplemental_rate": None}
+    return calculator_for(freeze(spec))()
@@ -0,0 +1,235 @@
+"""
+Local income tax jurisdictions by ZIP code.
+
+The source is a CSV with one row per ZIP range:
+
+    zip_from,zip_to,state,jurisdiction,inputs
+    10001,10299,NY,New York City (Manhattan),is_nyc_resident=true
+    43001,43001,OH,Example City SD,has_school_district_tax=true; school_district_rate=0.0125
+
+``inputs`` are the state calculator keywords that living there implies,
+as ``name=value`` pairs separated by semicolons; every name must be an
+input the state's spec declares. Ranges may not overlap. The built-in
+source (states/localities.csv) covers the NYC and Yonkers ZIP codes; a
+fuller dataset (Ohio school districts, municipalities) is used by pointing
+PAYROLL_LOCALITIES at its CSV or at an index built from it:
+
+    python -m payroll.localities build districts.csv -o districts.idx
+    python -m payroll.localities lookup 10027 10701 --index districts.idx
+
+The index is a small JSON header (the jurisdictions) followed by three
+sorted int32 columns (range start, range end, jurisdiction), so it is
+memory-mapped rather than read, pages are shared by every worker process,
+and a whole column of ZIP codes resolves with one binary search
+(np.searchsorted). It is opened on first use; a CSV source is built into
+an index in the temp directory once, keyed by the CSV's hash.
+
+In batch runs a ``zip`` column fills in any state_<input> column the row
+leaves blank, when the jurisdiction is in the row's state.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from states import STATE_CALCULATORS, get_calculator
+
+BUILTIN_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "states", "localities.csv")
+ENV_VAR = "PAYROLL_LOCALITIES"
+MAGIC = b"PAYLOC1\n"
+SOURCE_COLUMNS = ("zip_from", "zip_to", "state", "jurisdiction", "inputs")
+
+@dataclass(frozen=True)
+class Jurisdiction:
+    state: str
+    name: str
+    inputs: Mapping[str, str]  # state calculator keyword -> value as written in the source
+
+def zip_number(value) -> int:
+    """The 5-digit ZIP as an int (ZIP+4 suffixes are ignored), or -1 if there is none."""
+    text = str(value or "").strip()[:5]
+    return int(text) if len(text) == 5 and text.isdigit() else -1
+
+def _parse_inputs(state: str, text: str, line: int) -> Dict[str, str]:
+    fields = {field.name: field for field in get_calculator(state).input_schema}
+    inputs = {}
+    for pair in filter(None, (p.strip() for p in (text or "").split(";"))):
+        name, sep, value = (s.strip() for s in pair.partition("="))
+        if not sep or name not in fields:
+            raise ValueError(f"line {line}: {state} has no input {name!r}")
+        fields[name].parse(value)
+        inputs[name] = value
+    return inputs
+
+def read_source(path: str) -> List[Tuple[int, int, Jurisdiction]]:
+    """Parse and check a source CSV; ranges come back sorted."""
+    ranges = []
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = set(SOURCE_COLUMNS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(sorted(missing))}")
+        for line, row in enumerate(reader, start=2):
+            start, end = zip_number(row["zip_from"]), zip_number(row["zip_to"] or row["zip_from"])
+            state = row["state"].strip().upper()
+            if start < 0 or end < start:
+                raise ValueError(f"line {line}: bad ZIP range {row['zip_from']!r}-{row['zip_to']!r}")
+            if state not in STATE_CALCULATORS:
+                raise ValueError(f"line {line}: no calculator registered for state {state!r}")
+            inputs = _parse_inputs(state, row["inputs"], line)
+            ranges.append((start, end, Jurisdiction(state, row["jurisdiction"].strip(), MappingProxyType(inputs))))
+    ranges.sort(key=lambda r: r[0])
+    for (_, end, prev), (start, _, cur) in zip(ranges, ranges[1:]):
+        if start <= end:
+            raise ValueError(f"{prev.name} and {cur.name} overlap at ZIP {start:05d}")
+    return ranges
+
+def write_index(ranges: Sequence[Tuple[int, int, Jurisdiction]], path: str, source: str = "") -> None:
+    """Write sorted ranges as an index file (atomically, so readers never see half a file)."""
+    jurisdictions, ids = [], {}
+    for _, _, j in ranges:
+        key = (j.state, j.name, tuple(sorted(j.inputs.items())))
+        if key not in ids:
+            ids[key] = len(jurisdictions)
+            jurisdictions.append({"state": j.state, "name": j.name, "inputs": dict(j.inputs)})
+    columns = np.array([[r[0] for r in ranges], [r[1] for r in ranges],
+                        [ids[(j.state, j.name, tuple(sorted(j.inputs.items())))] for _, _, j in ranges]],
+                       dtype="<i4").reshape(3, len(ranges))
+    header = json.dumps({"source": source, "count": len(ranges), "jurisdictions": jurisdictions}).encode()
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header + columns.tobytes())
+    os.replace(tmp, path)
+
+class LocalityIndex:
+    """Sorted, non-overlapping ZIP ranges, each pointing at one Jurisdiction."""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, ids: np.ndarray, jurisdictions: Sequence[Jurisdiction]):
+        self.starts = starts
+        self.ends = ends
+        self.ids = ids
+        self.jurisdictions = tuple(jurisdictions)
+        self._states = np.array([j.state for j in self.jurisdictions] + [""], dtype=object)
+        self._columns: Dict[Tuple[str, bool], Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "LocalityIndex":
+        """Memory-map an index written by write_index."""
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a locality index")
+            (size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(size))
+        offset = len(MAGIC) + 8 + size
+        columns = np.memmap(path, dtype="<i4", mode="r", offset=offset, shape=(3, header["count"])) if header["count"] else np.zeros((3, 0), dtype="<i4")
+        jurisdictions = [Jurisdiction(j["state"], j["name"], MappingProxyType(j["inputs"])) for j in header["jurisdictions"]]
+        return cls(columns[0], columns[1], columns[2], jurisdictions)
+
+    def resolve(self, zips: np.ndarray, states: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Jurisdiction number for every ZIP (ints from zip_number), or -1 where
+        no range covers it or, given states, the jurisdiction is in another state.
+        """
+        zips = np.asarray(zips, dtype=np.int64)
+        if not len(self.starts):
+            return np.full(len(zips), -1, dtype=np.int64)
+        pos = np.searchsorted(self.starts, zips, side="right") - 1
+        safe = np.maximum(pos, 0)
+        hit = (pos >= 0) & (zips >= 0) & (zips <= self.ends[safe])
+        ids = np.where(hit, self.ids[safe], -1).astype(np.int64)
+        if states is not None:
+            ids[self._states[ids] != np.asarray(states, dtype=object)] = -1
+        return ids
+
+    def lookup(self, zip_code, state: Optional[str] = None) -> Optional[Jurisdiction]:
+        """The jurisdiction for one ZIP code, if any (and if it is in state, when given)."""
+        (i,) = self.resolve([zip_number(zip_code)], None if state is None else [state])
+        return self.jurisdictions[i] if i >= 0 else None
+
+    def input_column(self, name: str, flag: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (sets, values) over jurisdictions plus a trailing "none" slot, so
+        arrays indexed by resolve() output (-1 included) give per-row values.
+        """
+        key = (name, flag)
+        if key not in self._columns:
+            values = [j.inputs.get(name) for j in self.jurisdictions] + [None]
+            sets = np.array([v is not None for v in values])
+            if flag:
+                parsed = np.array([str(v).strip().lower() in ("true", "yes", "y", "1", "x") for v in values])
+            else:
+                parsed = np.array([float(v) if v is not None else np.nan for v in values])
+            self._columns[key] = (sets, parsed)
+        return self._columns[key]
+
+    def fill_inputs(self, cols: Dict[str, np.ndarray], zips: np.ndarray, given: Mapping[str, np.ndarray],
+                    defaults: Mapping[str, object]) -> None:
+        """
+        Fill engine columns state_<name> (see payroll.vectorized) from each
+        row's jurisdiction wherever given[name] says the row left it blank.
+        """
+        ids = self.resolve(zips, cols["state"])
+        if not (ids >= 0).any():
+            return
+        for name, default in defaults.items():
+            sets, values = self.input_column(name, isinstance(default, bool))
+            fill = sets[ids] & ~given[name]
+            if fill.any():
+                column = cols[f"state_{name}"] = np.array(cols[f"state_{name}"])
+                column[fill] = values[ids[fill]]
+
+def _cached_index(source: str) -> str:
+    with open(source, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    path = os.path.join(tempfile.gettempdir(), f"payroll-localities-{digest}.idx")
+    if not os.path.exists(path):
+        write_index(read_source(source), path, source=digest)
+    return path
+
+@lru_cache(maxsize=None)
+def open_index(path: str) -> LocalityIndex:
+    """The index at path (an index file, or a source CSV built into one), opened once per process."""
+    return LocalityIndex.open(_cached_index(path) if path.lower().endswith(".csv") else path)
+
+def default_index() -> LocalityIndex:
+    """The index named by PAYROLL_LOCALITIES, or the built-in one."""
+    return open_index(os.environ.get(ENV_VAR) or BUILTIN_SOURCE)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.localities", description="Build or query a ZIP code jurisdiction index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="check a source CSV and write its index")
+    build.add_argument("source")
+    build.add_argument("-o", "--output", required=True)
+    lookup = sub.add_parser("lookup", help="print the jurisdiction for ZIP codes")
+    lookup.add_argument("zips", nargs="+")
+    lookup.add_argument("--index", help="index file or source CSV (default: PAYROLL_LOCALITIES or the built-in data)")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        try:
+            ranges = read_source(args.source)
+        except ValueError as e:
+            parser.error(str(e))
+        write_index(ranges, args.output)
+        print(f"Wrote {len(ranges)} ranges to {args.output}", file=sys.stderr)
+        return 0
+    index = open_index(args.index) if args.index else default_index()
+    for code in args.zips:
+        j = index.lookup(code)
+        print(f"{code}\t" + (f"{j.state}\t{j.name}\t" + "; ".join(f"{k}={v}" for k, v in j.inputs.items()) if j else "-"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Parity check for the NY engine against the two calculations it replaced.
+
+    python -m payroll.ny_parity --cases 50000 --seed 0
+
+A seeded corpus of NY cases (every filing status and pay period, incomes
+from zero to the top bracket with many under the household credit limit,
+allowances, itemized deductions, dependents and qualifying children,
+part-year residents, NYC and Yonkers, extra withholding and supplemental
+wages) is run through NYTaxCalculator and compared, per pay period and to
+the cent, with:
+
+    vectorized            calculate_many on the same cases
+    devcontainer          the old .devcontainer/app.py calculate_ny_withholding
+    spec without credits  the old states/ny.py calculator
+
+(the old two are frozen in payroll.legacy_ny). Where an old path was wrong
+and the engine deliberately differs, the comparison either adjusts for it
+or skips the case and counts it under the reason:
+
+- the devcontainer ran supplemental wages through the brackets as well as
+  the flat rate, so it is compared with them added to the engine's income;
+- it applied the part-year share to Yonkers tax twice, so its Yonkers
+  amount is compared with the engine's times that share again;
+- its Head and Separate brackets differed from the spec's and it had none
+  for Widow, so those statuses are skipped.
+
+Exits 1 on any mismatch.
+"""
+import argparse
+import random
+import sys
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from federal import PERIODS, round_to_penny
+from states import get_calculator
+
+from . import legacy_ny
+from .vectorized import round_cents
+
+HOUSEHOLD_CREDIT_LIMIT = 40000  # a bit past the top of the household credit tables
+Amounts = Tuple[Decimal, Decimal, Decimal]  # state, NYC, Yonkers per pay period
+Mismatch = Tuple[int, Amounts, Amounts]  # case number, engine, old path
+
+def make_cases(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """count random NY cases; income and supplemental wages are per year, extra per pay period."""
+    statuses = get_calculator("NY").available_filing_statuses
+    categories = list(legacy_ny.NY_ITEMIZED_CATEGORIES)
+    cases = []
+    for _ in range(count):
+        if rng.random() < 0.35:
+            income = rng.randint(0, HOUSEHOLD_CREDIT_LIMIT * 100)
+        else:
+            income = min(int(rng.lognormvariate(11.0, 0.9) * 100), 800_000_000)
+        dependents = rng.choice((0, 0, 0, 1, 2, 3, 6))
+        place = rng.random()
+        cases.append({
+            "income": Decimal(income) / 100,
+            "status": rng.choice(statuses),
+            "period": rng.choice(list(PERIODS)),
+            "allowances": rng.choice((0, 0, 0, 1, 2, 5)),
+            "itemized": ({c: Decimal(rng.randint(0, 1500000)) / 100 for c in rng.sample(categories, rng.randint(1, 3))}
+                         if rng.random() < 0.1 else None),
+            "num_dependents": dependents,
+            "qualifying_children": rng.randint(0, dependents),
+            "part_year": rng.random() < 0.1,
+            "nyc": place < 0.4,
+            "yonkers": 0.4 <= place < 0.5,
+            "extra": Decimal(rng.choice((0, 0, 0, 500, 1000, 2550))) / 100,
+            "supplemental": Decimal(rng.randint(0, 2000000)) / 100 if rng.random() < 0.1 else Decimal("0"),
+        })
+    return cases
+
+def engine_kwargs(case: Dict[str, Any]) -> Dict[str, Any]:
+    """calculate() keywords for a case (the engine's extra withholding is per year)."""
+    return {
+        "allowances": case["allowances"],
+        "num_dependents": case["num_dependents"],
+        "qualifying_children": case["qualifying_children"],
+        "part_year_resident": case["part_year"],
+        "is_nyc_resident": case["nyc"],
+        "is_yonkers_resident": case["yonkers"],
+        "supplemental_wages": case["supplemental"],
+        "extra_withholding": case["extra"] * PERIODS[case["period"]],
+    }
+
+def _amounts(result) -> Amounts:
+    return tuple(round_to_penny(amount) for amount in
+                 (result.state_tax, result.local_taxes.get("nyc", Decimal("0")), result.local_taxes.get("yonkers", Decimal("0"))))
+
+def _engine(calculator, case: Dict[str, Any], income: Decimal):
+    return calculator.calculate(income, case["status"], case["period"],
+                                itemized_deductions=case["itemized"] or {}, **engine_kwargs(case))
+
+def check_vectorized(cases: List[Dict[str, Any]], results: List[Any], skipped: Counter) -> Tuple[int, List[Mismatch]]:
+    """calculate_many against calculate, for every case the batch path takes."""
+    rows = [i for i, case in enumerate(cases) if not case["itemized"]]
+    skipped["itemized deductions are not a batch input"] = len(cases) - len(rows)
+    expected = [_amounts(results[i]) for i in rows]
+    batch = [cases[i] for i in rows]
+    kwargs = [engine_kwargs(case) for case in batch]
+    columns = get_calculator("NY").calculate_many(
+        [float(case["income"]) for case in batch], [case["status"] for case in batch], [case["period"] for case in batch],
+        **{key: [float(kw[key]) if isinstance(kw[key], Decimal) else kw[key] for kw in kwargs] for key in kwargs[0]})
+    got = np.stack([round_cents(columns.state_tax)]
+                   + [round_cents(np.nan_to_num(columns.local_taxes[name])) for name in ("nyc", "yonkers")], axis=1)
+    want = np.array([[float(amount) for amount in amounts] for amounts in expected])
+    return len(rows), [(i, expected[k], tuple(Decimal(f"{v:.2f}") for v in got[k]))
+                       for k, i in enumerate(rows) if not np.array_equal(got[k], want[k])]
+
+def check_devcontainer(cases: List[Dict[str, Any]], results: List[Any], skipped: Counter) -> Tuple[int, List[Mismatch]]:
+    calculator = get_calculator("NY")
+    factor = calculator.rules.part_year_factor
+    compared, mismatches = 0, []
+    for i, case in enumerate(cases):
+        if case["status"] in ("Head", "Separate"):
+            skipped["its Head and Separate brackets differ from the spec's"] += 1
+            continue
+        if case["status"] not in legacy_ny.NY_TAX_BRACKETS:
+            skipped[f"it has no {case['status']} brackets"] += 1
+            continue
+        old = legacy_ny.calculate_ny_withholding(
+            case["income"], int(PERIODS[case["period"]]), True, case["status"], case["allowances"], case["extra"],
+            case["nyc"], case["yonkers"], case["itemized"], case["num_dependents"], case["qualifying_children"],
+            case["part_year"], bool(case["supplemental"]), case["supplemental"])
+        result = _engine(calculator, case, case["income"] + case["supplemental"])
+        state, nyc, yonkers = _amounts(result)
+        if case["part_year"] and case["yonkers"]:
+            yonkers = round_to_penny(result.local_taxes["yonkers"] * factor)
+        compared += 1
+        if old != (state, nyc, yonkers):
+            mismatches.append((i, (state, nyc, yonkers), old))
+    return compared, mismatches
+
+def check_spec_without_credits(cases: List[Dict[str, Any]], results: List[Any], skipped: Counter) -> Tuple[int, List[Mismatch]]:
+    old_calculator = legacy_ny.spec_without_credits()
+    compared, mismatches = 0, []
+    for i, (case, result) in enumerate(zip(cases, results)):
+        if result.credits or case["supplemental"]:
+            skipped["credits or supplemental wages, which it did not have"] += 1
+            continue
+        old = _amounts(_engine(old_calculator, case, case["income"]))
+        compared += 1
+        if old != _amounts(result):
+            mismatches.append((i, _amounts(result), old))
+    return compared, mismatches
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.ny_parity", description="Check the NY engine against the calculations it replaced.")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    cases = make_cases(args.cases, random.Random(args.seed))
+    calculator = get_calculator("NY")
+    results = [_engine(calculator, case, case["income"]) for case in cases]
+
+    failed = 0
+    checks = {"vectorized": check_vectorized, "devcontainer": check_devcontainer,
+              "spec without credits": check_spec_without_credits}
+    for name, check in checks.items():
+        skipped: Counter = Counter()
+        compared, mismatches = check(cases, results, skipped)
+        failed += len(mismatches)
+        print(f"{name:22} {compared} compared, {len(mismatches)} mismatches", file=sys.stderr)
+        for reason, count in skipped.items():
+            print(f"{'':22} {count} skipped: {reason}", file=sys.stderr)
+        for i, got, old in mismatches[:10]:
+            print(f"{'':22} case {i}: engine {got}, {name} {old}: {cases[i]}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
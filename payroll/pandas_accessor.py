@@ -0,0 +1,69 @@
+"""
+``DataFrame.withholding`` accessor over the vectorized engine.
+
+    import payroll.pandas_accessor  # registers the accessor
+    results = df.withholding.compute(period="biweekly", state="NY")
+    df = df.join(results)
+
+Columns are matched by the CSV input names (payroll.batch.INPUT_COLUMNS
+plus ``zip`` and ``state_<kwarg>``); ``columns`` maps those names to
+differently named DataFrame columns, and keyword arguments set an input to
+one value for every row. The whole frame is computed in a single vectorized pass.
+"""
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .batch import INPUT_COLUMNS
+from .columnar import MONEY_COLUMNS, columns_from_batch
+from .compiled import default_tables
+from .vectorized import LOCAL_TAX_NAMES, STATE_KWARG_DEFAULTS, compute_columns
+
+ACCEPTED_INPUTS = frozenset(INPUT_COLUMNS) | {"zip"} | {f"state_{name}" for name in STATE_KWARG_DEFAULTS}
+
+@pd.api.extensions.register_dataframe_accessor("withholding")
+class WithholdingAccessor:
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+
+    def inputs(self, columns: Optional[Mapping[str, str]] = None, **constants: Any) -> pd.DataFrame:
+        """The engine inputs this frame maps to, after renaming and constants."""
+        columns = dict(columns or {})
+        unknown = (set(columns) | set(constants)) - ACCEPTED_INPUTS
+        if unknown:
+            raise TypeError(f"Unknown withholding inputs: {', '.join(sorted(unknown))}")
+        data: Dict[str, Any] = {}
+        for name in ACCEPTED_INPUTS:
+            source = columns.get(name, name)
+            if name in constants:
+                data[name] = constants[name]
+            elif source in self._df.columns:
+                data[name] = self._df[source].to_numpy()
+        if "gross" not in data:
+            raise KeyError("No gross pay column; pass columns={'gross': <column name>}")
+        return pd.DataFrame(data, index=pd.RangeIndex(len(self._df)))
+
+    def compute(self, columns: Optional[Mapping[str, str]] = None, **constants: Any) -> pd.DataFrame:
+        """
+        Withholding for every row, indexed like the frame.
+
+        Returns float columns federal, social_security, medicare, state_tax,
+        local_tax, net_pay and local_<name> (NaN where the row failed or the
+        local tax does not apply), plus an ``error`` column.
+        """
+        frame = self.inputs(columns, **constants)
+        for name in ("employee_id", "period", "filing_status", "state"):
+            if name in frame:
+                frame[name] = frame[name].astype("string")
+        batch = pa.RecordBatch.from_pandas(frame, preserve_index=False)
+        cols = columns_from_batch(batch)
+        res = compute_columns(default_tables(), cols)
+        ok = res["ok"]
+        out = {name: np.where(ok, res[name], np.nan) for name in MONEY_COLUMNS}
+        for name in LOCAL_TAX_NAMES:
+            values = res["local_taxes"].get(name)
+            out[f"local_{name}"] = np.full(len(frame), np.nan) if values is None else np.where(ok, values, np.nan)
+        out["error"] = np.where(ok, None, cols["error"])
+        return pd.DataFrame(out, index=self._df.index)
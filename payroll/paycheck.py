@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from federal import PERIODS, calculate_fed, calculate_ss, calculate_mi, round_to_penny
+from states import get_calculator
+
+@dataclass
+class PaycheckInput:
+    """One employee's W-4 and state inputs, mirroring the app.py sidebar."""
+    gross: Decimal
+    period: str
+    filing_status: str  # federal status: "single", "married" or "head"
+    annual: bool = False
+    multi: bool = False  # Step 2 checkbox
+    other_job_amount: Decimal = Decimal("0")  # Step 2, "Two jobs total"
+    dep_credit: Decimal = Decimal("0")  # Step 3
+    other_income: Decimal = Decimal("0")  # Step 4(a)
+    deductions: Decimal = Decimal("0")  # Step 4(b)
+    extra: Decimal = Decimal("0")  # Step 4(c)
+    state: Optional[str] = None
+    state_kwargs: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class PaycheckResult:
+    """Withholding for one paycheck (or one year when annual=True)."""
+    federal: Decimal
+    social_security: Decimal
+    medicare: Decimal
+    state_tax: Decimal
+    local_taxes: Dict[str, Decimal]
+    net_pay: Decimal
+    warnings: list[str] = None
+
+    @property
+    def local_total(self) -> Decimal:
+        return sum(self.local_taxes.values(), Decimal("0"))
+
+def calculate_paycheck(inp: PaycheckInput) -> PaycheckResult:
+    """
+    Headless equivalent of perform_calculation in app.py.
+
+    Net pay subtracts state and local tax as well as federal and FICA, which
+    is what a payroll run needs (the app's "Net Pay" metric is pre-state).
+    """
+    other_job = inp.other_job_amount if inp.multi else Decimal("0")
+    fed = calculate_fed(inp.gross, inp.filing_status, inp.multi, inp.dep_credit,
+                        inp.other_income, inp.deductions, inp.extra,
+                        inp.period, inp.annual, other_job)
+    ss = calculate_ss(inp.gross, inp.period, inp.annual)
+    mi = calculate_mi(inp.gross, inp.period, inp.annual)
+
+    state_tax, local_taxes, warnings = Decimal("0"), {}, None
+    if inp.state:
+        annual_income = inp.gross if inp.annual else inp.gross * PERIODS[inp.period]
+        result = get_calculator(inp.state).calculate(
+            income=annual_income,
+            pay_period=inp.period,
+            filing_status=inp.filing_status.capitalize(),
+            is_annual=inp.annual,
+            **{k: v for k, v in inp.state_kwargs.items() if k != 'filing_status'}
+        )
+        state_tax = round_to_penny(result.state_tax)
+        local_taxes = {k: round_to_penny(v) for k, v in result.local_taxes.items()}
+        warnings = result.warnings
+
+    net = inp.gross - fed - ss - mi - state_tax - sum(local_taxes.values(), Decimal("0"))
+    return PaycheckResult(
+        federal=fed,
+        social_security=ss,
+        medicare=mi,
+        state_tax=state_tax,
+        local_taxes=local_taxes,
+        net_pay=net,
+        warnings=warnings
+    )
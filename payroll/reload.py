@@ -0,0 +1,140 @@
+"""
+Hot reload of compiled tax tables.
+
+A TableStore watches a directory of payroll.tabledata files and serves the
+compiled tables of the newest one (highest file name, so name them by
+version: 2025.1.json, 2025.2.json, ...). A new or changed file is loaded,
+validated and compiled on the watcher thread while requests keep using the
+current tables; the finished set is then swapped in with one reference
+assignment. Callers take ``snapshot()`` once per batch, so a batch that is
+already running finishes on the version it started with.
+
+Each compiled version carries its version string, which is what caches key
+on: pool workers re-attach when a task names a version they have not mapped,
+and ``derived`` values are recomputed on the first call after a swap. A file
+whose content changes without a new version is rejected, so a version
+always means one set of tables.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .compiled import CompiledTables, TableSpec, compile_tables
+from .tabledata import validate
+
+log = logging.getLogger(__name__)
+
+# Published versions kept mapped after a swap, so tasks queued just before it can still attach
+KEEP_PUBLISHED = 2
+
+class TableStore:
+    def __init__(self, directory: Optional[str] = None, publish: bool = False):
+        self.directory = directory
+        self.publish = publish
+        self._published = deque()
+        self._source: Optional[Tuple[str, float, str]] = None  # path, mtime, digest
+        self._rejected: Optional[Tuple[str, float]] = None  # reported once, not on every poll
+        self._digests: Dict[str, str] = {}
+        self._derived: Dict[str, Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._snapshot: Tuple[CompiledTables, Optional[TableSpec]] = (None, None)
+        if not self.refresh():
+            self._swap(compile_tables())  # no data files yet: the built-in tables
+
+    def snapshot(self) -> Tuple[CompiledTables, Optional[TableSpec]]:
+        """(tables, shared memory spec or None) of the current version, read atomically."""
+        return self._snapshot
+
+    @property
+    def current(self) -> CompiledTables:
+        return self._snapshot[0]
+
+    @property
+    def version(self) -> str:
+        return self._snapshot[0].version
+
+    def derived(self, name: str, fn: Callable[[CompiledTables], Any]) -> Any:
+        """fn(tables), cached until the version changes."""
+        tables = self.current
+        cached = self._derived.get(name)
+        if cached is None or cached[0] != tables.version:
+            cached = self._derived[name] = (tables.version, fn(tables))
+        return cached[1]
+
+    def _latest(self) -> Optional[str]:
+        if not self.directory:
+            return None
+        files = sorted(glob.glob(os.path.join(self.directory, "*.json")))
+        return files[-1] if files else None
+
+    def refresh(self) -> bool:
+        """Load the newest data file if it is new or changed; returns True if tables were swapped."""
+        with self._lock:
+            path = self._latest()
+            if path is None:
+                return False
+            mtime = os.stat(path).st_mtime
+            if (self._source and self._source[:2] == (path, mtime)) or self._rejected == (path, mtime):
+                return False
+            try:
+                return self._load(path, mtime)
+            except Exception:
+                self._rejected = (path, mtime)
+                raise
+
+    def _load(self, path: str, mtime: float) -> bool:
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        if self._source and self._source[2] == digest:
+            self._source = (path, mtime, digest)
+            return False
+        data = validate(json.loads(raw))
+        version = data["version"]
+        if self._digests.get(version, digest) != digest:
+            raise ValueError(f"{path} changes version {version} in place; give the correction a new version")
+        tables = compile_tables(data)
+        self._digests[version] = digest
+        self._source = (path, mtime, digest)
+        self._swap(tables)
+        log.info("Loaded tax tables version %s from %s", version, path)
+        return True
+
+    def _swap(self, tables: CompiledTables) -> None:
+        spec = None
+        if self.publish:
+            shm, spec = tables.publish()
+            self._published.append(shm)
+            while len(self._published) > KEEP_PUBLISHED:
+                old = self._published.popleft()
+                old.close()
+                old.unlink()
+        self._snapshot = (tables, spec)
+
+    def start(self, interval: float = 5.0) -> None:
+        """Poll the directory every ``interval`` seconds on a daemon thread."""
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    # A bad file must never take down the service; keep the current version
+                    log.exception("Tax table reload failed; still serving version %s", self.version)
+        self._thread = threading.Thread(target=watch, name="table-reload", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        while self._published:
+            shm = self._published.popleft()
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,182 @@
+"""
+Out-of-core batch runs with a memory ceiling and checkpoint/resume.
+
+The input is read one chunk at a time and results are appended to the
+output file as each chunk completes. After every committed chunk a small
+JSON checkpoint records how far into the input and output files the run
+got; a killed run started again with the same checkpoint truncates the
+output back to the last commit and carries on from there.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple
+
+from .batch import OUTPUT_COLUMNS
+
+# Rough parent-process cost of one row held in flight: the parsed input
+# dict plus the formatted result dict.
+ROW_BYTES_ESTIMATE = 4096
+MIN_CHUNK_SIZE = 100
+
+class CheckpointMismatch(ValueError):
+    """The checkpoint on disk belongs to a different or modified input file."""
+
+@dataclass
+class Checkpoint:
+    """Progress of one run, written after every committed chunk."""
+    input_path: str
+    input_size: int
+    input_mtime: float
+    input_offset: int  # file position just past the last committed row
+    output_offset: int  # size of the output file at the last commit
+    rows_done: int = 0
+    chunks_done: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["Checkpoint"]:
+        if not os.path.exists(path): return None
+        with open(path) as f: return cls(**json.load(f))
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(asdict(self), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def matches(self, input_path: str) -> bool:
+        stat = os.stat(input_path)
+        return (os.path.abspath(input_path) == self.input_path
+                and stat.st_size == self.input_size and stat.st_mtime == self.input_mtime)
+
+@dataclass
+class Progress:
+    rows_done: int
+    bytes_done: int
+    bytes_total: int
+    elapsed: float
+    rows_this_run: int
+    chunk_size: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_this_run / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def fraction(self) -> float:
+        return self.bytes_done / self.bytes_total if self.bytes_total else 1.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows_done:,} rows ({self.fraction:.1%}) "
+                f"{self.rows_per_second:,.0f} rows/s, chunk {self.chunk_size:,}")
+
+def print_progress(progress: Progress) -> None:
+    print(progress, file=sys.stderr, flush=True)
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+class MemoryGovernor:
+    """
+    Picks the next chunk size so the run stays under ``limit`` bytes.
+
+    The starting size assumes ROW_BYTES_ESTIMATE per in-flight row; after
+    that the chunk size halves whenever resident memory passes 90% of the
+    limit and grows back toward ``max_chunk`` while it is under half.
+    """
+
+    def __init__(self, limit: Optional[int], max_chunk: int, in_flight: int):
+        self.limit = limit
+        self.max_chunk = max_chunk
+        self.size = max_chunk
+        if limit:
+            self.size = max(MIN_CHUNK_SIZE, min(max_chunk, limit // (ROW_BYTES_ESTIMATE * in_flight)))
+
+    def next_size(self) -> int:
+        rss = _rss_bytes() if self.limit else None
+        if rss is not None:
+            if rss > 0.9 * self.limit:
+                self.size = max(MIN_CHUNK_SIZE, self.size // 2)
+            elif rss < 0.5 * self.limit:
+                self.size = min(self.max_chunk, self.size * 2)
+        return self.size
+
+def _read_chunks(src: TextIO, fieldnames: List[str], next_size: Callable[[], int]) -> Iterator[Tuple[int, List[dict]]]:
+    """Yield (input offset after the chunk, rows); csv never reads past the rows it returns."""
+    reader = csv.DictReader(iter(src.readline, ""), fieldnames=fieldnames)
+    while True:
+        chunk = list(islice(reader, next_size()))
+        if not chunk: return
+        yield src.tell(), chunk
+
+def run_resumable(input_path: str, output_path: str, engine, checkpoint_path: Optional[str] = None,
+                  chunk_size: int = 10000, max_memory: Optional[int] = None,
+                  progress: Optional[Callable[[Progress], None]] = None) -> int:
+    """
+    Run input_path through engine into output_path; returns the total row count.
+
+    max_memory is a ceiling in bytes for this process (workers each hold one
+    chunk at a time, so the chunk size bounds them too). With checkpoint_path
+    an interrupted run resumes where it stopped; the checkpoint is removed
+    once the whole input has been written.
+    """
+    checkpoint = Checkpoint.load(checkpoint_path) if checkpoint_path else None
+    if checkpoint and not checkpoint.matches(input_path):
+        raise CheckpointMismatch(f"Checkpoint {checkpoint_path} was written for a different or modified input file")
+    if checkpoint and (not os.path.isfile(output_path) or os.path.getsize(output_path) < checkpoint.output_offset):
+        raise CheckpointMismatch(f"Checkpoint {checkpoint_path} resumes {output_path} after byte {checkpoint.output_offset}, "
+                                 "but that file is missing or shorter")
+
+    stat = os.stat(input_path)
+    in_flight = 2 * getattr(engine, "jobs", 1) + 1
+    governor = MemoryGovernor(max_memory, chunk_size, in_flight)
+    started = time.monotonic()
+    rows_this_run = 0
+
+    with open(input_path, newline="") as src:
+        fieldnames = next(csv.reader([src.readline()]))
+        if checkpoint:
+            src.seek(checkpoint.input_offset)
+            dst = open(output_path, "r+", newline="")
+            dst.truncate(checkpoint.output_offset)
+            dst.seek(checkpoint.output_offset)
+        else:
+            dst = open(output_path, "w", newline="")
+            csv.DictWriter(dst, fieldnames=OUTPUT_COLUMNS).writeheader()
+            checkpoint = Checkpoint(os.path.abspath(input_path), stat.st_size, stat.st_mtime,
+                                    input_offset=src.tell(), output_offset=dst.tell())
+        writer = csv.DictWriter(dst, fieldnames=OUTPUT_COLUMNS)
+        try:
+            with engine:
+                for offset, results in engine.map(_read_chunks(src, fieldnames, governor.next_size)):
+                    writer.writerows(results)
+                    dst.flush()
+                    if checkpoint_path:
+                        os.fsync(dst.fileno())
+                    checkpoint.input_offset = offset
+                    checkpoint.output_offset = dst.tell()
+                    checkpoint.rows_done += len(results)
+                    checkpoint.chunks_done += 1
+                    rows_this_run += len(results)
+                    if checkpoint_path:
+                        checkpoint.save(checkpoint_path)
+                    if progress:
+                        progress(Progress(checkpoint.rows_done, offset, stat.st_size,
+                                          time.monotonic() - started, rows_this_run, governor.size))
+        finally:
+            dst.close()
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return checkpoint.rows_done
@@ -0,0 +1,249 @@
+"""
+Asyncio HTTP JSON API with micro-batching.
+
+    python -m payroll.service --port 8080 [--jobs 4] [--window-ms 2] [--tables DIR]
+
+Endpoints:
+
+    POST /paycheck   one employee object or an array of them (the
+                     payroll.daemon request format); returns the same shape
+                     with federal, social_security, medicare, state_tax,
+                     local_tax, local_taxes and net_pay
+    GET  /states     registered state codes and their filing statuses
+    GET  /stats      admission, shedding and batching counters
+    GET  /health     {"status": "ok"}
+
+The event loop only parses and routes. Rows from requests that arrive
+within ``window`` seconds of each other are coalesced into one chunk and
+computed by the vectorized engine in an executor (a thread, or a process
+pool over shared-memory tables with --jobs > 1), so thousands of
+concurrent single-paycheck requests cost a handful of NumPy passes.
+Requests are admitted or shed up front by payroll.admission (bounded queue,
+optional per-client rate limit), so overload is answered immediately with
+429 or 503 instead of queueing. With --tables the tax tables come from a
+directory of versioned data files and are hot-reloaded (payroll.reload).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .admission import AdmissionController, Overloaded
+from .compiled import CompiledTables
+from .daemon import parse_frame, request_row, response_object
+from .reload import TableStore
+from .sharded import compute_chunk, run_versioned, start_pool
+
+Rows = List[Dict[str, str]]
+
+MAX_BODY_BYTES = 16 * 2**20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+log = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Coalesces concurrent submissions into one compute call.
+
+    The first submission after a flush starts a ``window`` second timer;
+    everything submitted before it fires (or before ``max_batch`` rows are
+    waiting) is computed together and each caller gets its own slice back.
+    """
+
+    def __init__(self, compute: Callable[[Rows], Awaitable[Rows]], window: float = 0.002, max_batch: int = 10000):
+        self.compute = compute
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Rows, asyncio.Future]] = []
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.rows = 0
+        self.largest = 0
+
+    async def submit(self, rows: Rows) -> Rows:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((rows, future))
+        self._size += len(rows)
+        if self._size >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._size = self._pending, [], 0
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Rows, asyncio.Future]]) -> None:
+        rows = [row for chunk, _ in batch for row in chunk]
+        self.batches += 1
+        self.rows += len(rows)
+        self.largest = max(self.largest, len(rows))
+        try:
+            results = await self.compute(rows)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done(): future.set_exception(e)
+            return
+        start = 0
+        for chunk, future in batch:
+            if not future.done():  # the client may have gone away
+                future.set_result(results[start:start + len(chunk)])
+            start += len(chunk)
+
+def _states(tables: CompiledTables) -> Dict[str, List[str]]:
+    return {code: list(statuses) for code, statuses in sorted(tables.state_statuses.items())}
+
+class WithholdingService:
+    """HTTP/1.1 with keep-alive over asyncio streams; no framework needed."""
+
+    def __init__(self, batcher: MicroBatcher, admission: AdmissionController, store: TableStore):
+        self.batcher = batcher
+        self.admission = admission
+        self.store = store
+
+    def stats(self) -> Dict[str, Any]:
+        batcher = self.batcher
+        return {
+            **self.admission.stats(),
+            "tables_version": self.store.version,
+            "batches": batcher.batches,
+            "batched_rows": batcher.rows,
+            "largest_batch": batcher.largest,
+            "mean_batch": batcher.rows / batcher.batches if batcher.batches else 0.0,
+        }
+
+    async def route(self, method: str, path: str, body: bytes, client: str) -> Tuple[int, Any]:
+        """(status, payload); raises Overloaded when the request is shed."""
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path in ("/states", "/stats"):
+            if method != "GET":
+                return 405, {"error": "Use GET"}
+            return 200, self.store.derived("states", _states) if path == "/states" else self.stats()
+        if path != "/paycheck":
+            return 404, {"error": f"No route for {path}"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+        try:
+            frame, objs = parse_frame(body)
+        except ValueError as e:
+            return 400, {"error": f"{type(e).__name__}: {e}"}
+        self.admission.admit(client, len(objs))
+        try:
+            results = await self.batcher.submit([request_row(obj) for obj in objs])
+        finally:
+            self.admission.release(len(objs))
+        out = [response_object(obj, result) for obj, result in zip(objs, results)]
+        return 200, out if isinstance(frame, list) else out[0]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        peer = peer[0] if isinstance(peer, tuple) else str(peer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                extra = {}
+                try:
+                    status, payload = await self.route(method, path.split("?")[0], body, headers.get("x-client-id", peer))
+                except Overloaded as e:
+                    status, payload = e.status, {"error": str(e), "reason": e.reason}
+                    if e.retry_after:
+                        extra["Retry-After"] = str(math.ceil(e.retry_after))
+                except Exception as e:
+                    # A failed compute fails every request in its batch; each still gets an answer
+                    log.exception("%s %s failed", method, path)
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass  # malformed request line or headers, or client gone; drop the connection
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool,
+                       extra: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                + "".join(f"{name}: {value}\r\n" for name, value in (extra or {}).items()) + "\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(host: str, port: int, jobs: int = 1, window: float = 0.002, max_batch: int = 10000,
+                admission: Optional[AdmissionController] = None, tables_dir: Optional[str] = None,
+                reload_interval: float = 5.0) -> None:
+    store = TableStore(tables_dir, publish=jobs > 1)
+    executor = start_pool(jobs) if jobs > 1 else ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    def compute(rows: Rows) -> Awaitable[Rows]:
+        # One snapshot per batch: a reload mid-batch never mixes versions
+        tables, spec = store.snapshot()
+        if spec is None:
+            return loop.run_in_executor(executor, compute_chunk, tables, rows)
+        return loop.run_in_executor(executor, partial(run_versioned, compute_chunk, spec), rows)
+
+    service = WithholdingService(MicroBatcher(compute, window, max_batch), admission or AdmissionController(), store)
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    if tables_dir:
+        store.start(reload_interval)
+    print(f"Listening on http://{host}:{port} (tables {store.version})", file=sys.stderr, flush=True)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        executor.shutdown(cancel_futures=True)
+        store.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.service", description="Serve withholding calculations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes for batch evaluation (default 1: a thread)")
+    parser.add_argument("--window-ms", type=float, default=2.0, help="how long to collect concurrent requests into one batch")
+    parser.add_argument("--max-batch", type=int, default=10000, help="rows that trigger a batch before the window ends")
+    parser.add_argument("--max-queue", type=int, default=50000, help="rows queued or in flight before requests are shed with 503")
+    parser.add_argument("--rate", type=float, help="per-client limit in rows per second (default unlimited)")
+    parser.add_argument("--burst", type=float, help="per-client burst in rows (default twice --rate)")
+    parser.add_argument("--tables", metavar="DIR", help="directory of versioned tax table files to load and hot-reload")
+    parser.add_argument("--reload-interval", type=float, default=5.0, help="seconds between checks for new table files")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    admission = AdmissionController(args.max_queue, args.rate, args.burst)
+    asyncio.run(serve(args.host, args.port, args.jobs, args.window_ms / 1000, args.max_batch, admission,
+                      args.tables, args.reload_interval))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Process-pool batch runs over shared-memory tax tables.
+
+The parent compiles the tables once and publishes them in a shared memory
+block; each worker attaches to that block in its initializer, so tasks only
+carry their rows. Workers import this module, payroll.compiled and NumPy,
+never app.py or Streamlit. Chunks are computed with the vectorized engine
+and written back in input order.
+"""
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .batch import iter_chunks, map_ordered, write_results
+from .compiled import CompiledTables, TableSpec, compile_tables
+from .vectorized import columns_from_rows, compute_columns, result_rows
+
+_tables: Optional[CompiledTables] = None
+
+def _attach(spec: TableSpec) -> None:
+    global _tables
+    _tables = CompiledTables.attach(spec)
+
+def compute_chunk(tables: CompiledTables, rows: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    cols = columns_from_rows(rows)
+    return list(result_rows(cols, compute_columns(tables, cols)))
+
+def _run_kernel(kernel: Callable, payload):
+    return kernel(_tables, payload)
+
+def run_versioned(kernel: Callable, spec: TableSpec, payload):
+    """Pool task for hot-reloaded tables: attaches first if spec is a version this worker has not mapped."""
+    if _tables is None or _tables.version != spec.version:
+        _attach(spec)
+    return kernel(_tables, payload)
+
+def start_pool(jobs: int, initializer: Callable = None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    """
+    A process pool with every worker already running, so none is forked
+    later from a parent that holds client sockets or open output files.
+    """
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs)
+    for future in [pool.submit(int) for _ in range(jobs)]:
+        future.result()
+    return pool
+
+class VectorizedEngine:
+    """
+    NumPy over whole chunks. With jobs > 1 the compiled tables are published
+    once in shared memory for the lifetime of the engine. ``data`` is a
+    payroll.tabledata dict to use instead of the built-in tables.
+    """
+
+    def __init__(self, jobs: int = 1, data: Optional[Dict[str, Any]] = None):
+        self.jobs = jobs
+        self.data = data
+        self.tables = None
+        self._shm = None
+        self._spec = None
+
+    def __enter__(self) -> "VectorizedEngine":
+        self.tables = compile_tables(self.data)
+        if self.jobs > 1:
+            self._shm, self._spec = self.tables.publish()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def map(self, tagged: Iterable[Tuple[Any, Any]], kernel: Callable = compute_chunk) -> Iterator[Tuple[Any, Any]]:
+        """
+        Apply kernel(tables, payload) to each payload, in order.
+
+        kernel must be a module-level function so workers can unpickle it;
+        the default turns CSV row dicts into result row dicts.
+        """
+        if self.jobs <= 1:
+            return ((tag, kernel(self.tables, payload)) for tag, payload in tagged)
+        return map_ordered(partial(_run_kernel, kernel), tagged, self.jobs, initializer=_attach, initargs=(self._spec,))
+
+def run_sharded(src: TextIO, dst: TextIO, jobs: int, chunk_size: int = 10000) -> int:
+    """CSV in, CSV out, like payroll.batch.run_batch but on the shared-table engine."""
+    return write_results(VectorizedEngine(jobs), iter_chunks(csv.DictReader(src), chunk_size), dst)
@@ -0,0 +1,159 @@
+"""
+Concurrency stress check for the shared state calculators.
+
+    python -m payroll.stress --threads 16 --rounds 2000
+
+Every registered state gets a set of seeded random inputs (keyword values
+drawn from its input schema) whose results are computed once, on one
+thread, as the reference. The compiled arrays are then dropped and many
+threads call get_calculator, calculate and calculate_many on the same
+inputs in random order, so they race each other through the first compile
+as well as the steady state. Every result must match its reference and
+get_calculator must always hand back the same object. Finally the frozen
+tables are checked: writing to a spec, its compiled rules or the compiled
+arrays must fail. Exits 1 on any mismatch.
+"""
+import argparse
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from states import STATE_CALCULATORS, get_calculator
+from states.base import StateTaxColumns, StateTaxResult
+from states.residency import TAX_YEAR
+from states.spec import PERIODS
+
+BATCH_ROWS = 64
+
+def _value(field, rng: random.Random) -> Any:
+    if field.type == "flag":
+        return rng.random() < 0.5
+    if field.type == "count":
+        return rng.randint(0, 5)
+    if field.type == "rate":
+        return None if rng.random() < 0.5 else Decimal(rng.choice(("0.005", "0.01", "0.015", "0.02")))
+    if field.type == "date":
+        days = (date(TAX_YEAR + 1, 1, 1) - date(TAX_YEAR, 1, 1)).days
+        return None if rng.random() < 0.8 else date(TAX_YEAR, 1, 1) + timedelta(days=rng.randrange(1, days))
+    return Decimal(rng.randint(0, 2000)) * 10
+
+def make_cases(code: str, count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """count random calculate() keyword sets for one state."""
+    calculator = get_calculator(code)
+    statuses = calculator.available_filing_statuses
+    cases = []
+    for _ in range(count):
+        kwargs = {
+            "income": Decimal(rng.randint(0, 40000000)) / 100,
+            "filing_status": rng.choice(statuses),
+            "pay_period": rng.choice(list(PERIODS)),
+            "is_annual": rng.random() < 0.5,
+        }
+        kwargs.update((field.name, _value(field, rng)) for field in calculator.input_schema)
+        if kwargs.get("moved_in") is not None and kwargs["moved_in"] == kwargs.get("moved_out"):
+            kwargs["moved_out"] = None  # moving in and out on the same day is rejected
+        cases.append(kwargs)
+    return cases
+
+def _batch(cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """calculate_many keywords for the same rows: one list per keyword."""
+    return {key: [case[key] for case in cases] for key in cases[0]}
+
+def _same(a: Any, b: Any) -> bool:
+    if isinstance(a, StateTaxColumns):
+        return (a.local_taxes.keys() == b.local_taxes.keys()
+                and all(np.array_equal(getattr(a, name), getattr(b, name), equal_nan=True)
+                        for name in ("state_tax", "effective_rate", "marginal_rate"))
+                and all(np.array_equal(a.local_taxes[k], b.local_taxes[k], equal_nan=True) for k in a.local_taxes))
+    return a == b
+
+def _forget_tables() -> None:
+    for code in STATE_CALCULATORS:
+        cls = type(get_calculator(code))
+        if "tables" in cls.__dict__:
+            del cls.tables
+
+def _worker(seed: int, rounds: int, cases: Dict[str, List[Dict[str, Any]]], singles: Dict[str, List[StateTaxResult]],
+            batches: Dict[str, List[StateTaxColumns]], shared: Dict[str, Any]) -> Tuple[int, List[str]]:
+    rng = random.Random(seed)
+    codes = sorted(cases)
+    calls, failures = 0, []
+    for _ in range(rounds):
+        code = rng.choice(codes)
+        calculator = get_calculator(code)
+        if calculator is not shared[code]:
+            failures.append(f"{code}: get_calculator returned a different instance")
+        if rng.random() < 0.2:
+            i = rng.randrange(len(batches[code]))
+            got = calculator.calculate_many(**_batch(cases[code][i * BATCH_ROWS:(i + 1) * BATCH_ROWS]))
+            expected = batches[code][i]
+        else:
+            i = rng.randrange(len(cases[code]))
+            got = calculator.calculate(**cases[code][i])
+            expected = singles[code][i]
+        calls += 1
+        if not _same(got, expected):
+            failures.append(f"{code} case {i}: result differs from the single-threaded run")
+    return calls, failures
+
+def _refuses(write) -> bool:
+    try:
+        write()
+    except (TypeError, ValueError, AttributeError):
+        return True
+    return False
+
+def check_frozen() -> List[str]:
+    """Every way of writing to the shared tables that must fail, and the ones that did not."""
+    failures = []
+    for code in sorted(STATE_CALCULATORS):
+        calculator = get_calculator(code)
+        spec, rules = calculator.SPEC, calculator.rules
+        status = rules.statuses[0]
+        checks = {
+            "spec": lambda: spec.__setitem__("name", "changed"),
+            "spec statuses": lambda: spec["filing_statuses"].__setitem__(0, "changed"),
+            "spec brackets": lambda: spec["brackets"][status].__setitem__(0, {}),
+            "standard deduction": lambda: rules.standard.__setitem__(status, Decimal("0")),
+            "rules": lambda: setattr(rules, "part_year_factor", Decimal("1")),
+            "compiled arrays": lambda: type(calculator).tables.arrays[f"{code}.standard"].__setitem__(0, 0.0),
+        }
+        failures += [f"{code}: {name} is writable" for name, write in checks.items() if not _refuses(write)]
+    return failures
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.stress", description="Hammer the shared state calculators from many threads.")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=2000, help="calls per thread")
+    parser.add_argument("--cases", type=int, default=512, help="inputs per state")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    count = max(BATCH_ROWS, args.cases - args.cases % BATCH_ROWS)
+    cases = {code: make_cases(code, count, rng) for code in sorted(STATE_CALCULATORS)}
+    shared = {code: get_calculator(code) for code in cases}
+    singles = {code: [shared[code].calculate(**case) for case in cases[code]] for code in cases}
+    batches = {code: [shared[code].calculate_many(**_batch(cases[code][i:i + BATCH_ROWS])) for i in range(0, count, BATCH_ROWS)]
+               for code in cases}
+
+    _forget_tables()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        futures = [pool.submit(_worker, args.seed + 1 + t, args.rounds, cases, singles, batches, shared)
+                   for t in range(args.threads)]
+        results = [future.result() for future in futures]
+    calls = sum(n for n, _ in results)
+    failures = [failure for _, found in results for failure in found] + check_frozen()
+
+    for failure in failures[:20]:
+        print(failure, file=sys.stderr)
+    print(f"{calls} calls on {args.threads} threads across {len(cases)} states: {len(failures)} failures", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Seeded synthetic employee populations for load tests and benchmarks.
+
+    python -m payroll.synthetic -n 1000000 --seed 7 -o workforce.csv
+    python -m payroll.synthetic -n 5000000 -o workforce.parquet
+
+Rows use the payroll.batch input columns plus ``pay_date``. Salaries are
+log-normal around a US-like median; pay frequencies, filing statuses,
+Step 2-4 entries and dependents follow rough national shares; states are
+drawn from every registered calculator (or none), each with its own
+options: NYC/Yonkers residency, allowances and dependents for NY, property tax for NJ,
+exemptions and school district rates for OH, part-year residency (with a
+move-in or move-out date in the tax year) and extra withholding where the
+calculator supports them.
+
+Rows are generated in fixed blocks, each from its own child of the seed, so
+the same seed gives the same rows whatever -n is (a smaller -n is a prefix
+of a larger one) and blocks are produced with whole-array NumPy draws.
+"""
+import argparse
+import csv
+import sys
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from states import STATE_CALCULATORS
+from states.residency import TAX_YEAR
+
+from .batch import INPUT_COLUMNS
+from .compiled import FED_STATUSES, PERIOD_CODES
+
+BLOCK_ROWS = 65536
+PERIOD_SHARES = (0.30, 0.43, 0.20, 0.07)  # weekly, biweekly, semimonthly, monthly
+STATUS_SHARES = (0.48, 0.40, 0.12)  # single, married, head
+NO_STATE_SHARE = 0.2
+SCHOOL_DISTRICT_RATES = np.array([0.0075, 0.01, 0.0125, 0.015, 0.0175, 0.02])
+PERIODS_PER_YEAR = np.array([52, 26, 24, 12])
+
+Block = Dict[str, np.ndarray]
+
+def _money(rng: np.random.Generator, median: float, sigma: float, n: int) -> np.ndarray:
+    return np.round(rng.lognormal(np.log(median), sigma, n), 2)
+
+def _sometimes(rng: np.random.Generator, share: float, values: np.ndarray) -> np.ndarray:
+    return np.where(rng.random(len(values)) < share, values, 0.0)
+
+def _part_year_and_extra(rng: np.random.Generator, n: int) -> Block:
+    return {
+        "state_part_year_resident": rng.random(n) < 0.03,
+        "state_extra_withholding": _sometimes(rng, 0.05, rng.choice([5.0, 10.0, 20.0, 50.0], n)),
+    }
+
+def _ny(rng: np.random.Generator, n: int) -> Block:
+    place = rng.random(n)
+    return {
+        "state_is_nyc_resident": place < 0.45,
+        "state_is_yonkers_resident": (place >= 0.45) & (place < 0.49),
+        "state_allowances": np.where(rng.random(n) < 0.2, np.minimum(rng.poisson(1.0, n), 5), 0).astype(float),
+        **_part_year_and_extra(rng, n),
+    }
+
+def _nj(rng: np.random.Generator, n: int) -> Block:
+    return {"state_property_tax_paid": _sometimes(rng, 0.6, _money(rng, 9000, 0.4, n)), **_part_year_and_extra(rng, n)}
+
+def _oh(rng: np.random.Generator, n: int) -> Block:
+    has_district = rng.random(n) < 0.35
+    return {
+        "state_exemptions": (1 + np.minimum(rng.poisson(0.9, n), 4)).astype(float),
+        "state_has_school_district_tax": has_district,
+        "state_school_district_rate": np.where(has_district, rng.choice(SCHOOL_DISTRICT_RATES, n), np.nan),
+        **_part_year_and_extra(rng, n),
+    }
+
+# Per-state options; states without an entry take no extra inputs
+STATE_OPTIONS: Dict[str, Callable[[np.random.Generator, int], Block]] = {"NY": _ny, "NJ": _nj, "OH": _oh}
+
+STATE_COLUMNS = [
+    "state_is_nyc_resident", "state_is_yonkers_resident", "state_allowances", "state_property_tax_paid",
+    "state_exemptions", "state_has_school_district_tax", "state_school_district_rate",
+    "state_part_year_resident", "state_extra_withholding", "state_moved_in", "state_moved_out",
+    "state_num_dependents", "state_qualifying_children",
+]
+COLUMNS = INPUT_COLUMNS + STATE_COLUMNS + ["pay_date"]
+BOOL_COLUMNS = {"annual", "multi", "state_is_nyc_resident", "state_is_yonkers_resident",
+                "state_has_school_district_tax", "state_part_year_resident"}
+TEXT_COLUMNS = {"employee_id", "period", "filing_status", "state", "pay_date"}
+COUNT_COLUMNS = {"state_allowances", "state_exemptions", "state_num_dependents", "state_qualifying_children"}
+DATE_COLUMNS = {"state_moved_in", "state_moved_out"}
+
+def generate_block(seed: int, index: int, year: int, rows: int = BLOCK_ROWS) -> Block:
+    """
+    Block ``index`` of the population for seed, cut to its first ``rows``.
+
+    The whole block is always drawn so a short final block matches the start
+    of the full one.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    first, n = index * BLOCK_ROWS, BLOCK_ROWS
+    period = rng.choice(len(PERIOD_CODES), n, p=PERIOD_SHARES)
+    status = rng.choice(len(FED_STATUSES), n, p=STATUS_SHARES)
+    salary = np.clip(_money(rng, 58000, 0.65, n), 15000, 2_000_000)
+    annual = rng.random(n) < 0.02
+    multi = rng.random(n) < 0.18
+    kids = rng.poisson(np.where(status == 0, 0.2, 0.9))
+    codes = np.array([""] + sorted(STATE_CALCULATORS), dtype=object)
+    shares = np.r_[NO_STATE_SHARE, np.full(len(codes) - 1, (1 - NO_STATE_SHARE) / (len(codes) - 1))]
+    state = rng.choice(len(codes), n, p=shares)
+    day = rng.integers(0, (date(year + 1, 1, 1) - date(year, 1, 1)).days, n)
+
+    block: Block = {
+        "employee_id": np.array([f"E{i:08d}" for i in range(first, first + n)], dtype=object),
+        "gross": np.where(annual, salary, np.round(salary / PERIODS_PER_YEAR[period], 2)),
+        "period": np.array(PERIOD_CODES, dtype=object)[period],
+        "filing_status": np.array(FED_STATUSES, dtype=object)[status],
+        "annual": annual,
+        "multi": multi,
+        "other_job_amount": np.where(multi, _money(rng, 40000, 0.6, n), 0.0),
+        "dep_credit": kids * 2000.0 + np.where(rng.random(n) < 0.1, 500.0, 0.0),
+        "other_income": _sometimes(rng, 0.08, _money(rng, 3000, 1.0, n)),
+        "deductions": _sometimes(rng, 0.10, _money(rng, 8000, 0.8, n)),
+        "extra": _sometimes(rng, 0.07, rng.choice([10.0, 25.0, 50.0, 100.0], n)),
+        "state": codes[state],
+        "pay_date": (np.datetime64(f"{year}-01-01") + day).astype(str).astype(object),
+    }
+    for name in STATE_COLUMNS:
+        block[name] = (np.zeros(n, dtype=bool) if name in BOOL_COLUMNS else np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+                       if name in DATE_COLUMNS else np.full(n, np.nan))
+    for code, options in STATE_OPTIONS.items():
+        members = np.flatnonzero(block["state"] == code)
+        for name, values in options(rng, len(members)).items():
+            block[name][members] = values
+    # Part-year residents move in or out on a random day of the tax year (drawn last so earlier columns keep their values)
+    move = np.datetime64(f"{TAX_YEAR}-01-01") + rng.integers(1, (date(TAX_YEAR + 1, 1, 1) - date(TAX_YEAR, 1, 1)).days, n)
+    arriving = rng.random(n) < 0.5
+    movers = block["state_part_year_resident"]
+    block["state_moved_in"][movers & arriving] = move[movers & arriving]
+    block["state_moved_out"][movers & ~arriving] = move[movers & ~arriving]
+    # NY credits count the same children as the federal Step 3 amount (no draws, so no other column moves)
+    ny = block["state"] == "NY"
+    block["state_num_dependents"][ny] = kids[ny]
+    block["state_qualifying_children"][ny] = kids[ny]
+    return {name: values[:rows] for name, values in block.items()} if rows < n else block
+
+def generate(n: int, seed: int = 0, year: int = 2025) -> Iterator[Block]:
+    for index, start in enumerate(range(0, n, BLOCK_ROWS)):
+        yield generate_block(seed, index, year, min(BLOCK_ROWS, n - start))
+
+def _text(name: str, values: np.ndarray) -> List[str]:
+    """CSV cells: blank for unset options so the calculators' defaults apply."""
+    if name in TEXT_COLUMNS:
+        return values.tolist()
+    if name in DATE_COLUMNS:
+        return np.where(np.isnat(values), "", values.astype(str)).tolist()
+    if name in BOOL_COLUMNS:
+        return np.where(values, "true", "" if name.startswith("state_") else "false").tolist()
+    if name == "state_school_district_rate":
+        return ["" if v != v else f"{v:g}" for v in values.tolist()]
+    if name in COUNT_COLUMNS:
+        return ["" if v != v else str(int(v)) for v in values.tolist()]
+    blank_zero = name.startswith("state_")
+    return ["" if (v != v or (blank_zero and v == 0)) else f"{v:.2f}" for v in values.tolist()]
+
+def write_csv(blocks: Iterator[Block], path: str) -> int:
+    count = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for block in blocks:
+            writer.writerows(zip(*(_text(name, block[name]) for name in COLUMNS)))
+            count += len(block["gross"])
+    return count
+
+def write_parquet(blocks: Iterator[Block], path: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from .columnar import MONEY, money_array
+
+    def arrays(block: Block) -> List[pa.Array]:
+        out = []
+        for name in COLUMNS:
+            values = block[name]
+            if name in TEXT_COLUMNS:
+                out.append(pa.array(values.tolist(), type=pa.string()))
+            elif name in BOOL_COLUMNS:
+                out.append(pa.array(values))
+            elif name in DATE_COLUMNS:
+                out.append(pa.array(values, type=pa.date32(), mask=np.isnat(values)))
+            elif name == "state_school_district_rate":
+                out.append(pa.array(values, mask=np.isnan(values)))
+            elif name in COUNT_COLUMNS:
+                out.append(pa.array(np.nan_to_num(values).astype(np.int64), mask=np.isnan(values)))
+            else:
+                out.append(money_array(values, ~np.isnan(values)))
+        return out
+
+    schema = pa.schema([(name, pa.string() if name in TEXT_COLUMNS else pa.bool_() if name in BOOL_COLUMNS
+                         else pa.date32() if name in DATE_COLUMNS else pa.float64() if name == "state_school_district_rate" else pa.int64() if name in COUNT_COLUMNS
+                         else MONEY) for name in COLUMNS])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for block in blocks:
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays(block), schema=schema))
+            count += len(block["gross"])
+    return count
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.synthetic", description="Generate a synthetic employee population.")
+    parser.add_argument("-n", "--rows", type=int, required=True)
+    parser.add_argument("-o", "--output", required=True, help="CSV, or Parquet for .parquet/.pq")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--year", type=int, default=2025, help="year of the generated pay dates")
+    args = parser.parse_args(argv)
+
+    blocks = generate(args.rows, args.seed, args.year)
+    write = write_parquet if args.output.lower().endswith((".parquet", ".pq")) else write_csv
+    print(f"Wrote {write(blocks, args.output)} rows", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
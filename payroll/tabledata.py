@@ -0,0 +1,131 @@
+"""
+Tax tables as versioned JSON data files.
+
+A data file holds everything payroll.compiled needs, with every amount and
+rate as a decimal string:
+
+    {
+      "format": 2,
+      "version": "2025.2",
+      "federal": {"periods", "standard_deduction", "fica_cap", "social_rate",
+                  "medicare_rate", "percentage_method", "multiple_jobs"},
+      "states": {"NY": <state spec, see states.spec>, ...}
+    }
+
+``python -m payroll.tabledata export tables/2025.1.json --version 2025.1``
+writes the built-in tables (federal.py and states/specs) as a starting
+point; edit a copy with a new version to issue a correction. Format 1
+files, which held only each state's numbers, are read by laying those
+numbers over the built-in spec for the state.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import federal
+from states import STATE_CALCULATORS, get_calculator
+from states.spec import check_spec
+
+FORMAT = 2
+BUILTIN_VERSION = "builtin"
+FEDERAL_KEYS = ("periods", "standard_deduction", "fica_cap", "social_rate", "medicare_rate",
+                "percentage_method", "multiple_jobs")
+
+def _plain(value: Any) -> Any:
+    """Decimals to strings, mappings to dicts, tuples to lists and infinity to null, recursively."""
+    if isinstance(value, Mapping): return {key: _plain(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)): return [_plain(v) for v in value]
+    if isinstance(value, Decimal): return str(value)
+    if isinstance(value, float) and math.isinf(value): return None
+    return value
+
+def builtin_data(version: str = BUILTIN_VERSION) -> Dict[str, Any]:
+    """The tables compiled into federal.py and states/*.py, in data file form."""
+    return {
+        "format": FORMAT,
+        "version": version,
+        "federal": _plain({
+            "periods": federal.PERIODS,
+            "standard_deduction": federal.STANDARD_DEDUCTION,
+            "fica_cap": federal.FICA_CAP,
+            "social_rate": federal.SOCIAL_RATE,
+            "medicare_rate": federal.MEDICARE_RATE,
+            "percentage_method": federal.PERCENTAGE_METHOD_TABLES,
+            "multiple_jobs": federal.MULTIPLE_JOBS_RANGES,
+        }),
+        "states": {code: _plain(get_calculator(code).SPEC) for code in sorted(STATE_CALCULATORS)},
+    }
+
+def _upgrade_v1(data: Dict[str, Any]) -> Dict[str, Any]:
+    """A format 1 file as format 2: its numbers laid over the built-in state specs."""
+    states = {}
+    for code, old in data.get("states", {}).items():
+        if code in STATE_CALCULATORS:
+            spec = _plain(get_calculator(code).SPEC)
+        else:
+            spec = {"code": code, "name": code}
+        spec.update({key: old[key] for key in ("filing_statuses", "brackets", "standard_deduction") if key in old})
+        for local in spec.get("local_taxes", []):
+            if local["name"] == "nyc" and "nyc_rates" in old:
+                local["rates"] = old["nyc_rates"]
+            elif local["name"] == "yonkers" and "yonkers_rate" in old:
+                local["rate"] = old["yonkers_rate"]
+            elif local["name"] == "school_district" and "school_district_rates" in old:
+                local["rate"] = old["school_district_rates"]["default"]
+        states[code] = spec
+    return {**data, "format": FORMAT, "states": states}
+
+def validate(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Check the shape of a data file; raises ValueError naming the first problem."""
+    if data.get("format") == 1:
+        data = _upgrade_v1(data)
+    if data.get("format") != FORMAT:
+        raise ValueError(f"Unsupported table format {data.get('format')!r}")
+    if not isinstance(data.get("version"), str) or not data["version"]:
+        raise ValueError("Tables need a non-empty string version")
+    missing = [key for key in FEDERAL_KEYS if key not in data.get("federal", {})]
+    if missing:
+        raise ValueError(f"Federal tables are missing {', '.join(missing)}")
+    for code, state in data.get("states", {}).items():
+        if state.get("code") != code:
+            raise ValueError(f"{code} tables hold the spec for {state.get('code')!r}")
+        check_spec(state)
+    return data
+
+def load_data(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return validate(json.load(f))
+
+def write_data(path: str, data: Dict[str, Any]) -> None:
+    """Write atomically, so a watcher never sees a half-written file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(validate(data), f, indent=1)
+    os.replace(tmp, path)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m payroll.tabledata", description="Manage tax table data files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="write the built-in tables as a data file")
+    export.add_argument("path")
+    export.add_argument("--version", required=True)
+    check = sub.add_parser("check", help="validate a data file")
+    check.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        write_data(args.path, builtin_data(args.version))
+    else:
+        try:
+            print(load_data(args.path)["version"])
+        except ValueError as e:
+            parser.error(f"{args.path}: {e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Quarterly and annual totals of batch results.
+
+Rows are folded into running Decimal sums keyed by (period, state) as the
+results stream past, so memory depends on the number of groups, not on the
+number of rows, and the totals equal the column sums of the full result
+file exactly. Each employee row contributes to its quarter ("2026-Q1") and
+to its year ("2026"), taken from the ``pay_date`` input column (YYYY-MM-DD;
+rows without a valid one are grouped under "undated"). Every key that appears in
+``local_taxes`` (nyc, yonkers, school_district, ...) gets its own column.
+
+Social Security wages are the per-row wages under the FICA cap, on the same
+basis calculate_ss taxes them; Medicare wages are the gross pay.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+
+from federal import FICA_CAP, PERIODS
+
+from .batch import parse_flag, parse_money
+
+TAX_COLUMNS = ("federal", "social_security", "medicare", "state_tax", "local_tax", "net_pay")
+UNDATED = "undated"
+
+@dataclass
+class GroupTotals:
+    rows: int = 0
+    errors: int = 0
+    ss_wages: Decimal = Decimal("0")
+    medicare_wages: Decimal = Decimal("0")
+    taxes: Dict[str, Decimal] = field(default_factory=lambda: {name: Decimal("0") for name in TAX_COLUMNS})
+    local: Dict[str, Decimal] = field(default_factory=dict)
+
+def periods_for(pay_date: str) -> Tuple[str, ...]:
+    """The quarter and year a pay date falls in, e.g. ("2026-Q1", "2026")."""
+    try:
+        d = date.fromisoformat((pay_date or "").strip())
+    except ValueError:
+        return (UNDATED,)
+    return (f"{d.year}-Q{(d.month - 1) // 3 + 1}", str(d.year))
+
+def fica_wages(row: Dict[str, str]) -> Tuple[Decimal, Decimal]:
+    """(Social Security wages, Medicare wages) for one input row."""
+    gross = parse_money(row["gross"], "gross")
+    if parse_flag(row.get("annual")):
+        return min(gross, FICA_CAP), gross
+    p = PERIODS[(row.get("period") or "biweekly").strip().lower()]
+    return (min(gross * p, FICA_CAP) / p).quantize(Decimal("0.01"), ROUND_HALF_UP), gross
+
+class Totals:
+    """Streaming fold of (input row, result row) pairs into group totals."""
+
+    def __init__(self):
+        self.groups: Dict[Tuple[str, str], GroupTotals] = {}
+        self.local_names: List[str] = []
+
+    def _group(self, period: str, state: str) -> GroupTotals:
+        key = (period, state)
+        if key not in self.groups:
+            self.groups[key] = GroupTotals()
+        return self.groups[key]
+
+    def add(self, row: Dict[str, str], result: Dict[str, str]) -> None:
+        state = (row.get("state") or "").strip().upper()
+        failed = bool(result.get("error"))
+        if not failed:
+            ss_wages, medicare_wages = fica_wages(row)
+            local = json.loads(result["local_taxes"]) if result.get("local_taxes") else {}
+        for period in periods_for(row.get("pay_date")):
+            group = self._group(period, state)
+            group.rows += 1
+            if failed:
+                group.errors += 1
+                continue
+            group.ss_wages += ss_wages
+            group.medicare_wages += medicare_wages
+            for name in TAX_COLUMNS:
+                group.taxes[name] += Decimal(result[name])
+            for name, amount in local.items():
+                if name not in self.local_names:
+                    self.local_names.append(name)
+                group.local[name] = group.local.get(name, Decimal("0")) + Decimal(amount)
+
+    def add_chunk(self, rows: List[Dict[str, str]], results: List[Dict[str, str]]) -> None:
+        for row, result in zip(rows, results):
+            self.add(row, result)
+
+    @property
+    def columns(self) -> List[str]:
+        return (["period", "state", "rows", "errors", "ss_wages", "medicare_wages"]
+                + list(TAX_COLUMNS) + [f"local_{name}" for name in self.local_names])
+
+    def rows(self) -> Iterator[Dict[str, str]]:
+        """One row per group, quarters before their year, states in code order."""
+        order = lambda key: (key[0][:4], len(key[0]) == 4, key[0], key[1])
+        for (period, state), group in sorted(self.groups.items(), key=lambda item: order(item[0])):
+            out = {
+                "period": period, "state": state, "rows": group.rows, "errors": group.errors,
+                "ss_wages": f"{group.ss_wages:.2f}",
+                "medicare_wages": f"{group.medicare_wages:.2f}",
+            }
+            out.update({name: f"{amount:.2f}" for name, amount in group.taxes.items()})
+            out.update({f"local_{name}": f"{group.local.get(name, Decimal('0')):.2f}" for name in self.local_names})
+            yield out
+
+    def write(self, dst: TextIO) -> None:
+        writer = csv.DictWriter(dst, fieldnames=self.columns)
+        writer.writeheader()
+        writer.writerows(self.rows())
+
+def aggregate(rows: Iterable[Dict[str, str]], results: Iterable[Dict[str, str]]) -> Totals:
+    """Totals of an existing run: input rows and result rows read in lockstep."""
+    totals = Totals()
+    for row, result in zip(rows, results):
+        totals.add(row, result)
+    return totals
+
+def aggregate_files(input_path: str, results_path: str) -> Totals:
+    with open(input_path, newline="") as src, open(results_path, newline="") as res:
+        return aggregate(csv.DictReader(src), csv.DictReader(res))
@@ -0,0 +1,128 @@
+"""
+Background runs of uploaded employee CSVs for the Streamlit app.
+
+An UploadJob copies the upload to a temporary file, then computes it chunk
+by chunk on a caller-supplied thread pool, streaming results to a second
+temporary file and counting rows as it goes, so the page can poll
+``fraction`` without waiting. Rows are calculated in worker processes
+started with "spawn" (forking the threaded Streamlit server is unsafe);
+the app shares one such pool (``start_pool``) across every session, so the
+server's own threads never spend time on rows and no job pays for starting
+processes.
+
+Computing never holds the whole file in memory, but Streamlit's download
+button does: it reads the results into its in-memory media store. That is
+why uploads are capped at MAX_UPLOAD_MB. Streamlit has no hook for a session
+ending, so every new job first deletes upload temp files older than
+STALE_SECONDS that no running job is using; abandoned sessions leave
+nothing behind for longer than that.
+"""
+import csv
+import glob
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import BinaryIO, Optional, Set
+
+from .batch import OUTPUT_COLUMNS, ExactEngine, iter_chunks
+
+MAX_UPLOAD_MB = 32
+STALE_SECONDS = 3600
+PREFIXES = ("payroll-upload-", "payroll-results-")
+
+# Temp files of jobs not yet finished in this process; the sweep never touches them
+_active: Set[str] = set()
+_active_lock = threading.Lock()
+
+def _count_rows(path: str) -> int:
+    with open(path, newline="") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+def start_pool(jobs: int = 2) -> ProcessPoolExecutor:
+    """Worker processes for UploadJob rows; at least two, so rows are always computed out of process."""
+    return ProcessPoolExecutor(max_workers=max(jobs, 2), mp_context=multiprocessing.get_context("spawn"))
+
+def sweep(max_age: float = STALE_SECONDS) -> int:
+    """Delete upload temp files older than max_age seconds that no running job uses; returns how many."""
+    cutoff = time.time() - max_age
+    removed = 0
+    for prefix in PREFIXES:
+        for path in glob.glob(os.path.join(tempfile.gettempdir(), f"{prefix}*.csv")):
+            with _active_lock:
+                if path in _active: continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
+
+class UploadJob:
+    def __init__(self, source: BinaryIO, jobs: int = 2, chunk_size: int = 500):
+        fd, self.input_path = tempfile.mkstemp(prefix=PREFIXES[0], suffix=".csv")
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(source, f)
+        fd, self.output_path = tempfile.mkstemp(prefix=PREFIXES[1], suffix=".csv")
+        os.close(fd)
+        if os.path.getsize(self.input_path) > MAX_UPLOAD_MB * 2**20:
+            self.close()
+            raise ValueError(f"Uploads are limited to {MAX_UPLOAD_MB} MB")
+        self.total = _count_rows(self.input_path)
+        self.jobs = jobs
+        self.chunk_size = chunk_size
+        self.rows_done = 0
+        self.error: Optional[str] = None
+        self.done = False
+        self.future = None
+
+    @classmethod
+    def start(cls, source: BinaryIO, executor: Executor, pool: Optional[Executor] = None, jobs: int = 2) -> "UploadJob":
+        """Start computing source on executor, with rows on pool (a start_pool pool) or a pool of the job's own."""
+        sweep()
+        job = cls(source, jobs)
+        with _active_lock:
+            _active.update((job.input_path, job.output_path))
+        job.future = executor.submit(job._run, pool)
+        return job
+
+    @property
+    def fraction(self) -> float:
+        return self.rows_done / self.total if self.total else 1.0
+
+    def _run(self, pool: Optional[Executor] = None) -> None:
+        try:
+            if pool is None:
+                engine = ExactEngine(max(self.jobs, 2), mp_context=multiprocessing.get_context("spawn"))
+            else:
+                engine = ExactEngine(max(self.jobs, 2), pool=pool)
+            with open(self.input_path, newline="") as src, open(self.output_path, "w", newline="") as dst:
+                writer = csv.DictWriter(dst, fieldnames=OUTPUT_COLUMNS)
+                writer.writeheader()
+                with engine:
+                    for _, results in engine.map((None, chunk) for chunk in iter_chunks(csv.DictReader(src), self.chunk_size)):
+                        writer.writerows(results)
+                        self.rows_done += len(results)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            with _active_lock:
+                _active.difference_update((self.input_path, self.output_path))
+            self.done = True
+
+    def results_bytes(self) -> bytes:
+        """The finished results CSV (at most a few times MAX_UPLOAD_MB)."""
+        with open(self.output_path, "rb") as f:
+            return f.read()
+
+    def close(self) -> None:
+        """Delete the temporary files (a job still running finishes into an unlinked file)."""
+        for path in (self.input_path, self.output_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,33 +1,80 @@
-from typing import Type, Dict
-from .base import StateTaxCalculator
-from .ny import NYTaxCalculator
-from .ca import CATaxCalculator
-from .nj import NJTaxCalculator
-from .oh import OHTaxCalculator
-
-# Registry of state calculators
-STATE_CALCULATORS: Dict[str, Type[StateTaxCalculator]] = {}
-
-def register_calculator(calculator_class: Type[StateTaxCalculator]):
-    """Register a state calculator class."""
-    STATE_CALCULATORS[calculator_class().state_code] = calculator_class
-    
-def get_calculator(state_code: str) -> StateTaxCalculator:
-    """Get an instance of a state calculator by state code."""
-    if state_code not in STATE_CALCULATORS:
-        raise ValueError(f"No calculator registered for state: {state_code}")
-    return STATE_CALCULATORS[state_code]()
-    
-def get_available_states() -> list[str]:
-    """Get list of states with registered calculators."""
-    return sorted(STATE_CALCULATORS.keys())
-    
-def get_state_name(state_code: str) -> str:
-    """Get full state name from state code."""
-    return get_calculator(state_code).state_name
-
-# Register available calculators
-register_calculator(NYTaxCalculator)
-register_calculator(CATaxCalculator)
-register_calculator(NJTaxCalculator)
-register_calculator(OHTaxCalculator) 
+"""
+State tax calculators.
+
+The registry records each state's code and name (read from its spec file)
+without importing or instantiating its calculator. get_calculator imports
+the state's module on first use and hands out one shared instance from then
+on; a state with no module of its own is built from its spec alone.
+"""
+import threading
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Type, Dict, Union
+from .base import StateTaxCalculator
+from .spec import builtin_specs, calculator_for
+
+# States with a module of their own; every other spec file gets a generic calculator
+STATE_MODULES = {
+    "NY": "states.ny:NYTaxCalculator",
+    "CA": "states.ca:CATaxCalculator",
+    "NJ": "states.nj:NJTaxCalculator",
+    "OH": "states.oh:OHTaxCalculator",
+}
+
+@dataclass(frozen=True)
+class StateEntry:
+    """What the registry knows about a state before its calculator is loaded."""
+    code: str
+    name: str
+    target: Union[str, Type[StateTaxCalculator], None] = None  # "module:Class", a class, or None for spec-only
+
+    def load(self) -> Type[StateTaxCalculator]:
+        if self.target is None:
+            return calculator_for(builtin_specs()[self.code])
+        if isinstance(self.target, str):
+            module, _, name = self.target.partition(":")
+            return getattr(import_module(module), name)
+        return self.target
+
+# Registry of state calculators
+STATE_CALCULATORS: Dict[str, StateEntry] = {}
+
+# One instance per state, created on first use and shared by every caller; calculators are stateless
+_INSTANCES: Dict[str, StateTaxCalculator] = {}
+_load_lock = threading.Lock()
+
+def register_calculator(state_code: str, state_name: str, target: Union[str, Type[StateTaxCalculator], None] = None):
+    """
+    Register a state by code and name. target is "module:Class", a calculator
+    class, or None to build the calculator from the state's spec file; nothing
+    is imported or instantiated until get_calculator asks for it.
+    """
+    with _load_lock:
+        STATE_CALCULATORS[state_code] = StateEntry(state_code, state_name, target)
+        _INSTANCES.pop(state_code, None)
+    
+def get_calculator(state_code: str) -> StateTaxCalculator:
+    """Get the shared calculator for a state code, loading it on first use."""
+    calculator = _INSTANCES.get(state_code)
+    if calculator is None:
+        if state_code not in STATE_CALCULATORS:
+            raise ValueError(f"No calculator registered for state: {state_code}")
+        with _load_lock:
+            if state_code not in _INSTANCES:
+                _INSTANCES[state_code] = STATE_CALCULATORS[state_code].load()()
+            calculator = _INSTANCES[state_code]
+    return calculator
+    
+def get_available_states() -> list[str]:
+    """Get list of states with registered calculators."""
+    return sorted(STATE_CALCULATORS.keys())
+    
+def get_state_name(state_code: str) -> str:
+    """Get full state name from state code, without loading its calculator."""
+    if state_code not in STATE_CALCULATORS:
+        raise ValueError(f"No calculator registered for state: {state_code}")
+    return STATE_CALCULATORS[state_code].name
+
+# Register every state with a spec file
+for _code, _spec in builtin_specs().items():
+    register_calculator(_code, _spec["name"], STATE_MODULES.get(_code))
@@ -3,6 +3,8 @@ from decimal import Decimal
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
+import numpy as np
+
 @dataclass
 class StateTaxResult:
     """Standard result format for state tax calculations."""
@@ -15,6 +17,22 @@ class StateTaxResult:
     warnings: list[str] = None
     errors: list[str] = None
 
+@dataclass
+class StateTaxColumns:
+    """Columnar results of calculate_many, one element per row (unrounded, like StateTaxResult)."""
+    state_tax: np.ndarray
+    local_taxes: Dict[str, np.ndarray]  # name -> amounts, nan where the tax does not apply
+    effective_rate: np.ndarray
+    marginal_rate: np.ndarray
+
+def broadcast_rows(value: Any, n: int) -> np.ndarray:
+    """A per-row column from an array or a single value for every row."""
+    if isinstance(value, (str, bytes)) or np.ndim(value) == 0:
+        return np.full(n, value, dtype=object)
+    if len(value) != n:
+        raise ValueError(f"Expected {n} values, got {len(value)}")
+    return np.asarray(value, dtype=object)
+
 class StateTaxCalculator(ABC):
     """Abstract base class for state tax calculators."""
     
@@ -70,6 +88,47 @@ class StateTaxCalculator(ABC):
             StateTaxResult object containing tax calculation details
         """
         pass
+
+    def calculate_many(
+        self,
+        income,
+        filing_status,
+        pay_period,
+        is_annual=False,
+        **kwargs
+    ) -> StateTaxColumns:
+        """
+        Calculate state taxes for a whole batch of rows.
+
+        Args:
+            income: Array of annual incomes
+            filing_status, pay_period, is_annual: Arrays, or one value for every row
+            **kwargs: State-specific parameters, each an array or one value for every row
+
+        Returns:
+            StateTaxColumns with one element per row
+
+        This default calls calculate() row by row; calculators with a
+        vectorized path override it.
+        """
+        n = len(income)
+        columns = {name: broadcast_rows(value, n) for name, value in kwargs.items()}
+        statuses, periods, annual = (broadcast_rows(v, n) for v in (filing_status, pay_period, is_annual))
+        out = StateTaxColumns(np.zeros(n), {}, np.zeros(n), np.zeros(n))
+        for i in range(n):
+            result = self.calculate(
+                income=Decimal(str(income[i])),
+                filing_status=statuses[i],
+                pay_period=periods[i],
+                is_annual=bool(annual[i]),
+                **{name: column[i] for name, column in columns.items()}
+            )
+            out.state_tax[i] = result.state_tax
+            out.effective_rate[i] = result.effective_rate
+            out.marginal_rate[i] = result.marginal_rate
+            for name, amount in result.local_taxes.items():
+                out.local_taxes.setdefault(name, np.full(n, np.nan))[i] = amount
+        return out
         
     @abstractmethod
     def get_ui_components(self) -> Dict[str, Any]:
@@ -0,0 +1,118 @@
+"""
+Part-year residency as a share of the year.
+
+A part-year resident's state and local tax is scaled by the share of the
+tax year spent as a resident, taken from the first of these the caller gives:
+
+    resident_income      income earned while resident, over total income
+    moved_in, moved_out  days resident in TAX_YEAR: from moved_in (or
+                         January 1) up to the day before moved_out (or
+                         December 31); moved_out before moved_in means the
+                         resident left and came back, so both ends count
+    part_year_resident   the spec's part_year_factor, an estimate
+
+All of these apply only when part_year_resident is on; a full-year
+resident's dates and resident income are ignored, with a warning. Dates
+outside TAX_YEAR, the same day for both, or dates that leave no day as a
+resident are rejected with ValueError rather than prorated to nothing.
+
+The same rules run on single values (Decimal, datetime.date) and on NumPy
+columns, where dates are days since 1970-01-01 and nan means not given.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Mapping, Optional, Tuple
+
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+TAX_YEAR = 2024  # the year the built-in tables (federal.py, states/specs) are for
+PART_YEAR_WARNING = "Part-year resident calculations are estimates"
+FULL_YEAR_WARNING = "Move dates and resident income only apply to part-year residents and were ignored"
+
+def parse_date(value: Any) -> Optional[date]:
+    """A date from a date, datetime or ISO string (anything after the date, such as a time, is ignored)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    return date.fromisoformat(text[:10]) if text else None
+
+def day_share(moved_in: Optional[date], moved_out: Optional[date], year: int = TAX_YEAR) -> Decimal:
+    """Share of the tax year spent as a resident; ValueError for dates that do not describe one."""
+    start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    for name, day in (("moved_in", moved_in), ("moved_out", moved_out)):
+        if day is not None and day.year != year:
+            raise ValueError(f"{name} {day.isoformat()} is not in the {year} tax year")
+    if moved_in is not None and moved_in == moved_out:
+        raise ValueError(f"moved_in and moved_out are the same day ({moved_in.isoformat()})")
+    if moved_in is not None and moved_out is not None and moved_out < moved_in:
+        days = (moved_out - start).days + (end - moved_in).days  # left, then came back
+    else:
+        days = ((moved_out or end) - (moved_in or start)).days
+    if days <= 0:
+        raise ValueError(f"moved_in/moved_out leave no day of {year} as a resident")
+    return Decimal(days) / Decimal((end - start).days)
+
+def income_share(resident_income: Decimal, income: Decimal) -> Decimal:
+    """Share of income earned while resident, between 0 and 1."""
+    if income <= 0:
+        return Decimal("1")
+    return min(max(resident_income / income, Decimal("0")), Decimal("1"))
+
+def residency_share(inputs: Mapping[str, Any], income: Decimal, factor: Optional[Decimal],
+                    year: int = TAX_YEAR) -> Tuple[Optional[Decimal], Optional[str]]:
+    """(share of tax owed, warning); share is None for a full-year resident."""
+    given = inputs.get("resident_income") is not None or inputs.get("moved_in") or inputs.get("moved_out")
+    if not inputs.get("part_year_resident"):
+        return None, FULL_YEAR_WARNING if given else None
+    if inputs.get("resident_income") is not None:
+        return income_share(inputs["resident_income"], income), None
+    if inputs.get("moved_in") or inputs.get("moved_out"):
+        return day_share(inputs.get("moved_in"), inputs.get("moved_out"), year), None
+    if factor is not None:
+        return factor, PART_YEAR_WARNING
+    return None, None
+
+def days_column(values: Any, n: int) -> np.ndarray:
+    """
+    Dates (date objects, ISO strings or datetime64, one for every row or a
+    single value) as days since 1970-01-01, nan where None or blank.
+    """
+    days = np.broadcast_to(np.asarray(values, dtype="datetime64[D]"), (n,))
+    return np.where(np.isnat(days), np.nan, days.astype(np.int64).astype(np.float64))
+
+def _day(days: float) -> Optional[date]:
+    return None if np.isnan(days) else date.fromordinal(EPOCH.toordinal() + int(days))
+
+def day_share_many(moved_in: np.ndarray, moved_out: np.ndarray, year: int = TAX_YEAR) -> np.ndarray:
+    """day_share over columns of days since 1970-01-01; nan where neither date is given or day_share would raise."""
+    start = float((date(year, 1, 1) - EPOCH).days)
+    end = float((date(year + 1, 1, 1) - EPOCH).days)
+    given = ~(np.isnan(moved_in) & np.isnan(moved_out))
+    first, last = np.where(np.isnan(moved_in), start, moved_in), np.where(np.isnan(moved_out), end, moved_out)
+    returned = last < first
+    days = np.where(returned, (last - start) + (end - first), last - first)
+    in_year = lambda days: np.isnan(days) | ((days >= start) & (days < end))
+    valid = given & in_year(moved_in) & in_year(moved_out) & (moved_in != moved_out) & (days > 0)
+    return np.where(valid, days / (end - start), np.nan)
+
+def day_errors_many(moved_in: np.ndarray, moved_out: np.ndarray, year: int = TAX_YEAR) -> np.ndarray:
+    """day_share's ValueError message for every row it would reject, "" elsewhere."""
+    errors = np.full(len(moved_in), "", dtype=object)
+    given = ~(np.isnan(moved_in) & np.isnan(moved_out))
+    for i in np.flatnonzero(given & np.isnan(day_share_many(moved_in, moved_out, year))):
+        try:
+            day_share(_day(moved_in[i]), _day(moved_out[i]), year)
+        except ValueError as e:
+            errors[i] = str(e)
+    return errors
+
+def income_share_many(resident_income: np.ndarray, income: np.ndarray) -> np.ndarray:
+    """income_share over columns; nan where resident_income is not given."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(income > 0, np.clip(resident_income / income, 0.0, 1.0), 1.0)
+    return np.where(np.isnan(resident_income), np.nan, share)
@@ -0,0 +1,141 @@
+"""
+Typed inputs for state calculators.
+
+A spec's "inputs" maps each keyword calculate() reads to a field:
+
+    type        flag, amount, count, rate or date
+    default     value when the keyword is absent or None; null on a rate
+                means the spec's own rate applies, on an amount or date that
+                the input was not given
+    label       sidebar label; inputs without one are batch/API only
+    help, section, min, max, step
+    widget      "radio" to show a flag as two choices, options: [off, on]
+    ui_default  starting widget value when default is null
+    show_if     flag input that must be on for this one to be shown
+    excludes    flag input that cannot be on at the same time
+
+A bare value instead of an object is shorthand for {"default": value}.
+Rates are fractions in calculate() and percentages in the sidebar. Dates
+are datetime.date (ISO strings are accepted).
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional, Tuple
+
+from .residency import TAX_YEAR, parse_date
+
+INPUT_TYPES = ("flag", "amount", "count", "rate", "date")
+TRUE_VALUES = frozenset(("true", "yes", "y", "1", "x"))
+
+def _infer_type(default: Any) -> str:
+    if isinstance(default, bool): return "flag"
+    if isinstance(default, int): return "count"
+    if default is None: return "rate"
+    return "amount"
+
+@dataclass(frozen=True)
+class InputField:
+    name: str
+    type: str
+    default: Any
+    label: Optional[str] = None
+    help: Optional[str] = None
+    section: Optional[str] = None
+    min: Optional[str] = None
+    max: Optional[str] = None
+    step: Optional[str] = None
+    widget: Optional[str] = None
+    options: Tuple[str, ...] = ("No", "Yes")
+    ui_default: Optional[str] = None
+    show_if: Optional[str] = None
+    excludes: Optional[str] = None
+
+    @classmethod
+    def from_spec(cls, name: str, item: Any) -> "InputField":
+        if not isinstance(item, Mapping):
+            item = {"default": item}
+        item = dict(item)
+        item.setdefault("type", _infer_type(item.get("default")))
+        if item["type"] not in INPUT_TYPES:
+            raise ValueError(f"Input {name} has unknown type {item['type']!r}")
+        if "options" in item:
+            item["options"] = tuple(item["options"])
+        return cls(name=name, **item)
+
+    def parse(self, value: Any) -> Any:
+        """A keyword value as bool (flags), date (dates) or Decimal; None takes the default."""
+        if value is None:
+            value = self.default
+        if self.type == "flag":
+            if isinstance(value, str):
+                return value.strip().lower() in TRUE_VALUES
+            return bool(value)
+        if value is None:
+            return None
+        if self.type == "date":
+            try:
+                return parse_date(value)
+            except ValueError:
+                raise ValueError(f"{self.name}: not a date: {value!r}") from None
+        try:
+            return Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"{self.name}: not a number: {value!r}") from None
+
+    def render(self, container) -> Any:
+        """Show this input's widget in container and return its value as calculate() takes it."""
+        if self.type == "flag":
+            if self.widget == "radio":
+                choice = container.radio(self.label, list(self.options), index=int(bool(self.default)), help=self.help)
+                return choice == self.options[1]
+            return container.checkbox(self.label, value=bool(self.default), help=self.help)
+
+        if self.type == "date":
+            return container.date_input(self.label, value=None, min_value=date(TAX_YEAR, 1, 1),
+                                        max_value=date(TAX_YEAR, 12, 31), help=self.help)
+
+        if self.type == "count":
+            value = container.number_input(
+                self.label,
+                min_value=int(self.min or 0),
+                max_value=int(self.max) if self.max is not None else None,
+                value=int(self.ui_default if self.default is None else self.default),
+                step=int(self.step or 1),
+                help=self.help
+            )
+            return int(value)
+
+        scale = 100 if self.type == "rate" else 1
+        start = Decimal(self.ui_default) if self.default is None else Decimal(str(self.default)) * scale
+        value = container.number_input(
+            self.label,
+            min_value=float(self.min or 0),
+            max_value=float(self.max) if self.max is not None else None,
+            value=float(start),
+            step=float(self.step or 1),
+            help=self.help
+        )
+        return Decimal(str(value / scale))
+
+def input_fields(spec: Dict[str, Any]) -> Tuple[InputField, ...]:
+    """The spec's inputs as typed fields, in declaration order."""
+    return tuple(InputField.from_spec(name, item) for name, item in spec.get("inputs", {}).items())
+
+def render_inputs(container, fields: Tuple[InputField, ...]) -> Dict[str, Any]:
+    """Render every labelled field in order, with a subheader whenever the section changes."""
+    values: Dict[str, Any] = {}
+    labels = {field.name: field.label for field in fields}
+    section = None
+    for field in fields:
+        if field.label is None or (field.show_if and not values.get(field.show_if)):
+            continue
+        if field.section and field.section != section:
+            container.subheader(field.section)
+            section = field.section
+        values[field.name] = field.render(container)
+        if field.excludes and values[field.name] and values.get(field.excludes):
+            container.error(f"❗ Choose either {labels[field.excludes]} or {field.label}, not both.")
+            values[field.name] = False
+    return values
@@ -0,0 +1,491 @@
+"""
+Declarative state tax specifications and the calculator that evaluates them.
+
+Each state is a JSON file in states/specs/ with every amount and rate as a
+decimal string:
+
+    code, name           two-letter code and display name
+    filing_statuses      statuses the state accepts
+    standard_deduction   amount per status
+    brackets             per status, rows of min/max/base/rate (max null on
+                         the top bracket); a status may instead name another
+                         status whose brackets it shares
+    itemized_deductions  true to use the itemized_deductions keyword when it
+                         exceeds the standard deduction
+    exempt_up_to         no state tax on income at or under this amount
+    inputs               keyword arguments the state reads, as typed fields
+                         that also describe the sidebar (see states.schema)
+    deductions           taken off income before the brackets: an input
+                         times per_unit, capped at max
+    credits              taken off the tax: an input times per_unit times
+                         rate, or instead the amount from a table (per
+                         status, rows of max/amount; the first row whose max
+                         is at least the income applies), capped at max, for
+                         income up to income_limit and, given statuses, only
+                         for those filing statuses; stage "tax" applies
+                         before the part-year factor and extra withholding,
+                         "withholding" after them
+    local_taxes          name, label, the flag input that turns it on (when),
+                         what it is levied on (base: taxable, income or tax)
+                         and a rate, per-status rates, or an input that
+                         overrides the rate (rate_input)
+    part_year_factor     share of state and local tax for part-year residents
+                         who give neither move dates nor resident income
+    supplemental_rate    flat rate withheld on the supplemental_wages input
+                         (bonuses, commissions; per year like income, and not
+                         part of income), added after the part-year share
+
+Extra withholding is added when extra_withholding is one of the inputs.
+Part-year residents are prorated by the moved_in/moved_out dates or the
+resident_income amount when the spec declares those inputs (it must then
+declare part_year_resident too) and the caller gives them (see
+states.residency).
+payroll.compiled turns the same specs into NumPy arrays, so a state added as
+a spec file gets both the Decimal and the vectorized engine.
+
+Loaded specs are frozen (mappings are read-only proxies, lists are tuples)
+and calculators keep no per-call state, so one calculator per state is
+shared by every session and thread.
+"""
+import json
+import os
+import threading
+from bisect import bisect_left
+from collections.abc import Mapping
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .base import StateTaxCalculator, StateTaxColumns, StateTaxResult, broadcast_rows
+from .residency import days_column, residency_share
+from .schema import InputField, input_fields, render_inputs
+
+SPEC_DIR = os.path.join(os.path.dirname(__file__), "specs")
+LOCAL_BASES = ("taxable", "income", "tax")
+CREDIT_STAGES = ("tax", "withholding")
+REQUIRED_KEYS = ("code", "name", "filing_statuses", "standard_deduction", "brackets")
+
+# Inputs that prorate part-year residents (states.residency), with their types
+RESIDENCY_INPUTS = MappingProxyType({"moved_in": "date", "moved_out": "date", "resident_income": "amount"})
+
+PERIODS = MappingProxyType({
+    "weekly": Decimal("52"),
+    "biweekly": Decimal("26"),
+    "semimonthly": Decimal("24"),
+    "monthly": Decimal("12")
+})
+
+PERIOD_COUNTS = MappingProxyType({period: float(count) for period, count in PERIODS.items()})
+
+# Guards the one-time compile of each calculator's arrays for calculate_many
+_compile_lock = threading.Lock()
+
+def freeze(value: Any) -> Any:
+    """A read-only copy: mappings become MappingProxyType and lists tuples, recursively."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(v) for key, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    return None if value is None else Decimal(str(value))
+
+def _lookup(values: Any, table: Dict[str, Any], n: int) -> np.ndarray:
+    """table[value] for every row, from an array of keys or a single key."""
+    if isinstance(values, str):
+        return np.full(n, table[values])
+    return np.array([table[v] for v in broadcast_rows(values, n)])
+
+def input_column(value: Any, default: Any, n: int) -> np.ndarray:
+    """A state input as a float column (bool for flags); None takes the spec default."""
+    flag = isinstance(default, bool)
+    fill = default if flag else np.nan if default is None else float(default)
+    if value is None:
+        return np.full(n, fill, dtype=bool if flag else np.float64)
+    arr = np.asarray(value)
+    if arr.dtype == object:
+        arr = np.array([fill if v is None else v for v in arr.ravel()], dtype=object).reshape(arr.shape)
+    return np.broadcast_to(arr.astype(bool if flag else np.float64), (n,))
+
+def bracket_rows(spec: Dict[str, Any], status: str) -> List[Dict[str, Any]]:
+    """The bracket rows for status, following a reference to another status."""
+    rows = spec["brackets"][status]
+    return spec["brackets"][rows] if isinstance(rows, str) else rows
+
+def check_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Check a spec's shape and references; raises ValueError naming the first problem."""
+    missing = [key for key in REQUIRED_KEYS if key not in spec]
+    code = spec.get("code", "?")
+    if missing:
+        raise ValueError(f"{code} spec is missing {', '.join(missing)}")
+    for status in spec["filing_statuses"]:
+        rows = spec["brackets"].get(status)
+        if isinstance(rows, str):
+            rows = spec["brackets"].get(rows)
+        if not rows or isinstance(rows, str):
+            raise ValueError(f"{code} has no brackets for {status}")
+    fields = {field.name: field for field in input_fields(spec)}
+    inputs = spec.get("inputs", {})
+    for field in fields.values():
+        for key in ("show_if", "excludes"):
+            other = getattr(field, key)
+            if other is not None and (other not in fields or fields[other].type != "flag"):
+                raise ValueError(f"{code} input {field.name} {key} needs a flag input, not {other!r}")
+    for item in spec.get("deductions", ()):
+        if "table" in item or "statuses" in item:
+            raise ValueError(f"{code} deduction {item['name']} cannot have a table or statuses")
+    for item in [*spec.get("deductions", ()), *spec.get("credits", ())]:
+        if "table" not in item and item.get("input") not in inputs:
+            raise ValueError(f"{code} {item['name']} reads undeclared input {item.get('input')!r}")
+        if item.get("stage", "tax") not in CREDIT_STAGES:
+            raise ValueError(f"{code} {item['name']} has unknown stage {item['stage']!r}")
+        unknown = sorted((set(item.get("table", ())) | set(item.get("statuses", ()))) - set(spec["filing_statuses"]))
+        if unknown:
+            raise ValueError(f"{code} {item['name']} names unknown filing statuses: {', '.join(unknown)}")
+    for local in spec.get("local_taxes", []):
+        for key in ("when", "rate_input"):
+            if local.get(key) is not None and local[key] not in inputs:
+                raise ValueError(f"{code} {local['name']} reads undeclared input {local[key]!r}")
+        if local["base"] not in LOCAL_BASES:
+            raise ValueError(f"{code} {local['name']} has unknown base {local['base']!r}")
+        if "rate" not in local and "rates" not in local:
+            raise ValueError(f"{code} {local['name']} needs a rate or rates")
+    if spec.get("part_year_factor") is not None and "part_year_resident" not in inputs:
+        raise ValueError(f"{code} has a part_year_factor but no part_year_resident input")
+    if spec.get("supplemental_rate") is not None and "supplemental_wages" not in inputs:
+        raise ValueError(f"{code} has a supplemental_rate but no supplemental_wages input")
+    for name, kind in RESIDENCY_INPUTS.items():
+        if name in fields and fields[name].type != kind:
+            raise ValueError(f"{code} input {name} must be of type {kind}")
+        if name in fields and "part_year_resident" not in inputs:
+            raise ValueError(f"{code} has a {name} input but no part_year_resident input")
+    return spec
+
+def load_spec(name: str) -> Mapping:
+    """Load states/specs/<name>.json, frozen."""
+    with open(os.path.join(SPEC_DIR, f"{name}.json")) as f:
+        return freeze(check_spec(json.load(f)))
+
+@lru_cache(maxsize=1)
+def builtin_specs() -> Mapping:
+    """Every spec in states/specs, by state code."""
+    names = sorted(f[:-len(".json")] for f in os.listdir(SPEC_DIR) if f.endswith(".json"))
+    return MappingProxyType({spec["code"]: spec for spec in map(load_spec, names)})
+
+def input_defaults(specs) -> Dict[str, Any]:
+    """Union of the inputs the given specs declare, first declaration winning."""
+    defaults = {}
+    for spec in specs:
+        for field in input_fields(spec):
+            defaults.setdefault(field.name, field.default)
+    return defaults
+
+@dataclass(frozen=True)
+class Brackets:
+    """One status's brackets, searched by bisection on the upper bounds."""
+    maxes: Tuple[Decimal, ...]  # top bracket is Infinity
+    rows: Tuple[Tuple[Decimal, Decimal, Decimal], ...]  # min, base, rate
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "Brackets":
+        return cls(tuple(Decimal("Infinity") if r["max"] is None else Decimal(r["max"]) for r in rows),
+                   tuple((Decimal(r["min"]), Decimal(r["base"]), Decimal(r["rate"])) for r in rows))
+
+    def lookup(self, amount: Decimal) -> Tuple[Decimal, Decimal]:
+        """(tax, marginal rate) from the first bracket whose max is at least amount."""
+        i = bisect_left(self.maxes, amount)
+        if i == len(self.rows):
+            return Decimal("0"), Decimal("0")
+        low, base, rate = self.rows[i]
+        return base + max(amount - low, Decimal("0")) * rate, rate
+
+@dataclass(frozen=True)
+class AmountTable:
+    """Amounts by income, searched by bisection on the upper bounds like Brackets."""
+    maxes: Tuple[Decimal, ...]  # a null max is Infinity
+    amounts: Tuple[Decimal, ...]
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "AmountTable":
+        return cls(tuple(Decimal("Infinity") if r["max"] is None else Decimal(r["max"]) for r in rows),
+                   tuple(Decimal(r["amount"]) for r in rows))
+
+    def lookup(self, income: Decimal) -> Decimal:
+        """The amount of the first row whose max is at least income; zero past the last row."""
+        i = bisect_left(self.maxes, income)
+        return self.amounts[i] if i < len(self.amounts) else Decimal("0")
+
+@dataclass(frozen=True)
+class Adjustment:
+    """
+    A deduction or credit: input x per_unit x rate, or a table amount by
+    income, capped, for income up to income_limit and the given statuses.
+    """
+    name: str
+    input: Optional[str]
+    per_unit: Decimal
+    rate: Decimal
+    cap: Optional[Decimal]
+    income_limit: Optional[Decimal]
+    stage: str
+    statuses: Optional[FrozenSet[str]]
+    table: Optional[Dict[str, AmountTable]]
+
+    @classmethod
+    def from_spec(cls, item: Dict[str, Any]) -> "Adjustment":
+        table = item.get("table")
+        return cls(item["name"], item.get("input"), Decimal(item.get("per_unit", "1")), Decimal(item.get("rate", "1")),
+                   _decimal(item.get("max")), _decimal(item.get("income_limit")), item.get("stage", "tax"),
+                   frozenset(item["statuses"]) if "statuses" in item else None,
+                   None if table is None else MappingProxyType({s: AmountTable.from_rows(rows) for s, rows in table.items()}))
+
+    def amount(self, inputs: Dict[str, Any], income: Decimal, status: str) -> Decimal:
+        if self.income_limit is not None and income > self.income_limit:
+            return Decimal("0")
+        if self.statuses is not None and status not in self.statuses:
+            return Decimal("0")
+        if self.table is not None:
+            value = self.table[status].lookup(income) if status in self.table else Decimal("0")
+        else:
+            value = max(inputs[self.input], Decimal("0")) * self.per_unit * self.rate
+        return value if self.cap is None else min(value, self.cap)
+
+@dataclass(frozen=True)
+class LocalTax:
+    name: str
+    label: str
+    when: str
+    base: str
+    rates: Dict[str, Decimal]
+    rate_input: Optional[str]
+
+    @classmethod
+    def from_spec(cls, item: Dict[str, Any], statuses: List[str]) -> "LocalTax":
+        rates = item.get("rates") or {status: item["rate"] for status in statuses}
+        return cls(item["name"], item.get("label", item["name"]), item["when"], item["base"],
+                   MappingProxyType({status: Decimal(rate) for status, rate in rates.items()}), item.get("rate_input"))
+
+@dataclass(frozen=True)
+class CompiledSpec:
+    """A spec with every amount parsed once, ready for repeated evaluation."""
+    statuses: Tuple[str, ...]
+    standard: Dict[str, Decimal]
+    brackets: Dict[str, Brackets]
+    itemized: bool
+    exempt_up_to: Optional[Decimal]
+    fields: Tuple[InputField, ...]
+    deductions: Tuple[Adjustment, ...]
+    credits: Tuple[Adjustment, ...]
+    local_taxes: Tuple[LocalTax, ...]
+    part_year_factor: Optional[Decimal]
+    supplemental_rate: Optional[Decimal]
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> "CompiledSpec":
+        statuses = tuple(spec["filing_statuses"])
+        return cls(
+            statuses=statuses,
+            standard=MappingProxyType({s: Decimal(spec["standard_deduction"].get(s, "0")) for s in statuses}),
+            brackets=MappingProxyType({s: Brackets.from_rows(bracket_rows(spec, s)) for s in statuses}),
+            itemized=spec.get("itemized_deductions", False),
+            exempt_up_to=_decimal(spec.get("exempt_up_to")),
+            fields=input_fields(spec),
+            deductions=tuple(map(Adjustment.from_spec, spec.get("deductions", []))),
+            credits=tuple(map(Adjustment.from_spec, spec.get("credits", []))),
+            local_taxes=tuple(LocalTax.from_spec(item, statuses) for item in spec.get("local_taxes", [])),
+            part_year_factor=_decimal(spec.get("part_year_factor")),
+            supplemental_rate=_decimal(spec.get("supplemental_rate")),
+        )
+
+    def inputs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """The declared inputs from kwargs, defaulted and typed (flags as bool, the rest Decimal or None)."""
+        return {field.name: field.parse(kwargs.get(field.name)) for field in self.fields}
+
+    def credit_total(self, stage: str, inputs: Dict[str, Any], income: Decimal, status: str) -> Decimal:
+        return sum((c.amount(inputs, income, status) for c in self.credits if c.stage == stage), Decimal("0"))
+
+class SpecTaxCalculator(StateTaxCalculator):
+    """
+    A state calculator whose rules all come from SPEC.
+
+    Subclasses set SPEC (and may override get_ui_components); the spec is
+    compiled once per class and instances hold no state of their own.
+    """
+    SPEC: Mapping = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.SPEC is not None:
+            cls.rules = CompiledSpec.from_spec(cls.SPEC)
+
+    @property
+    def state_code(self) -> str:
+        return self.SPEC["code"]
+
+    @property
+    def state_name(self) -> str:
+        return self.SPEC["name"]
+
+    @property
+    def input_schema(self) -> Tuple[InputField, ...]:
+        """The keyword arguments calculate() reads, typed and in sidebar order."""
+        return self.rules.fields
+
+    @property
+    def has_local_tax(self) -> bool:
+        return bool(self.rules.local_taxes)
+
+    @property
+    def available_filing_statuses(self) -> list[str]:
+        return list(self.rules.statuses)
+
+    def get_local_jurisdictions(self) -> list[str]:
+        return [local.label for local in self.rules.local_taxes]
+
+    def calculate(
+        self,
+        income: Decimal,
+        filing_status: str,
+        pay_period: str,
+        is_annual: bool = False,
+        **kwargs
+    ) -> StateTaxResult:
+        """Calculate state and local taxes as the spec describes."""
+        rules = self.rules
+        inputs = rules.inputs(kwargs)
+
+        # Income is already annualized by app.py
+        annual_income = income
+
+        # Deductions
+        standard_ded = rules.standard[filing_status]
+        itemized_deductions = kwargs.get("itemized_deductions", {}) if rules.itemized else {}
+        itemized_total = sum(Decimal(str(amt)) for amt in itemized_deductions.values())
+        deduction = max(standard_ded, itemized_total)
+        deductions = {"standard": standard_ded} if itemized_total <= standard_ded else dict(itemized_deductions)
+        if not standard_ded and not itemized_total:
+            deductions = {}
+        taxable_income = annual_income
+        for item in rules.deductions:
+            amount = item.amount(inputs, annual_income, filing_status)
+            taxable_income -= amount
+            if amount:
+                deductions[item.name] = amount
+        taxable_income = max(taxable_income - deduction, Decimal("0"))
+
+        # Bracket tax, then credits against it
+        state_tax, marginal_rate = rules.brackets[filing_status].lookup(taxable_income)
+        if rules.exempt_up_to is not None and annual_income <= rules.exempt_up_to:
+            state_tax = Decimal("0")
+        credits = {c.name: c.amount(inputs, annual_income, filing_status) for c in rules.credits}
+        state_tax = max(Decimal("0"), state_tax - rules.credit_total("tax", inputs, annual_income, filing_status))
+
+        # Local taxes
+        bases = {"taxable": taxable_income, "income": annual_income, "tax": state_tax}
+        local_taxes = {}
+        for local in rules.local_taxes:
+            if inputs[local.when]:
+                rate = inputs.get(local.rate_input) if local.rate_input else None
+                local_taxes[local.name] = bases[local.base] * (local.rates[filing_status] if rate is None else rate)
+
+        # Part-year adjustment
+        share, warning = residency_share(inputs, annual_income, rules.part_year_factor)
+        if share is not None:
+            state_tax *= share
+            local_taxes = {k: v * share for k, v in local_taxes.items()}
+
+        # Add extra withholding and flat-rate supplemental wages, then credits against withholding
+        if "extra_withholding" in inputs:
+            state_tax += inputs["extra_withholding"]
+        if rules.supplemental_rate is not None:
+            state_tax += max(inputs["supplemental_wages"], Decimal("0")) * rules.supplemental_rate
+        state_tax = max(Decimal("0"), state_tax - rules.credit_total("withholding", inputs, annual_income, filing_status))
+
+        # Convert to per-period if needed
+        if not is_annual:
+            period_count = PERIODS[pay_period]
+            state_tax = state_tax / period_count
+            local_taxes = {k: v / period_count for k, v in local_taxes.items()}
+
+        # Calculate effective rate (using annual amounts)
+        total_tax = state_tax + sum(local_taxes.values())
+        effective_rate = total_tax / annual_income if annual_income > 0 else Decimal("0")
+
+        return StateTaxResult(
+            state_tax=state_tax,
+            local_taxes=local_taxes,
+            credits={k: v for k, v in credits.items() if v},
+            deductions=deductions,
+            effective_rate=effective_rate,
+            marginal_rate=marginal_rate,
+            warnings=[warning] if warning else None,
+            errors=None
+        )
+
+    def calculate_many(
+        self,
+        income,
+        filing_status,
+        pay_period,
+        is_annual=False,
+        **kwargs
+    ) -> StateTaxColumns:
+        """Calculate state taxes for a whole batch with NumPy (see StateTaxCalculator.calculate_many)."""
+        # Imported here because payroll builds on this package
+        from payroll.compiled import compile_state
+        from payroll.vectorized import residency_errors, state_many
+
+        cls = type(self)
+        if "tables" not in cls.__dict__:
+            with _compile_lock:
+                if "tables" not in cls.__dict__:
+                    cls.tables = compile_state(cls.SPEC)
+        income = np.asarray(income, dtype=np.float64)
+        n = len(income)
+        index = {status: i for i, status in enumerate(self.rules.statuses)}
+        try:
+            status = _lookup(filing_status, index, n).astype(np.int64)
+            periods = _lookup(pay_period, PERIOD_COUNTS, n).astype(np.float64)
+        except KeyError as e:
+            raise ValueError(f"Unknown {self.state_code} filing status or pay period: {e.args[0]!r}") from None
+        annual = broadcast_rows(is_annual, n).astype(bool)
+        kw = {field.name: days_column(kwargs.get(field.name), n) if field.type == "date"
+              else input_column(kwargs.get(field.name), field.default, n) for field in self.rules.fields}
+        errors = residency_errors(cls.tables, self.state_code, kw, n)
+        if (errors != "").any():
+            i = int(np.flatnonzero(errors != "")[0])
+            raise ValueError(f"Row {i}: {errors[i]}")
+
+        tax, local, marginal_rate = state_many(cls.tables, self.state_code, income, status, periods, annual, kw)
+        total = tax + sum((amount for _, amount in local.values()), np.zeros(n))
+        return StateTaxColumns(
+            state_tax=tax,
+            local_taxes={name: np.where(applies, amount, np.nan) for name, (applies, amount) in local.items()},
+            effective_rate=np.divide(total, income, out=np.zeros(n), where=income > 0),
+            marginal_rate=marginal_rate,
+        )
+
+    def get_ui_components(self) -> Dict[str, Any]:
+        """Filing status plus every labelled input of the schema."""
+        def render(container):
+            container.subheader(f"{self.state_code} State Tax Options")
+
+            filing_status = container.selectbox(
+                f"{self.state_code} Filing Status",
+                self.available_filing_statuses,
+                help=f"Select your {self.state_code} state filing status"
+            )
+
+            # Return all inputs as a dict
+            return {"filing_status": filing_status, **render_inputs(container, self.input_schema)}
+
+        return {"render": render}
+
+def calculator_for(spec: Mapping) -> Type[SpecTaxCalculator]:
+    """A calculator class for a state that has only a spec file."""
+    return type(f"{spec['code']}TaxCalculator", (SpecTaxCalculator,), {"SPEC": spec})